@@ -20135,9 +20135,9 @@ async function loadQuestions() {
     bookData,
     auditData,
   ] = await Promise.all([
-    fetchDataset("/api/data/questions", "data/questions.json", []),
-    fetchDataset("/api/data/kortsvar", "data/kortsvar.json", []),
-    fetchDataset("/api/data/sygdomslaere", "data/sygdomslaere.json", {}),
+    fetchDataset("/api/data/questions", "data/questions.min.json", []),
+    fetchDataset("/api/data/kortsvar", "data/kortsvar.min.json", []),
+    fetchDataset("/api/data/sygdomslaere", "data/sygdomslaere.min.json", {}),
     fetchJson("data/figure_captions.json", {}),
     fetchJson("data/book_captions.json", {}),
     fetchJson("data/figure_audit.json", []),
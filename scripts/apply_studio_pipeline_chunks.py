@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional, Set
+
+from pipeline_manifest import pending_path, promote_pending
+from pipeline_paths import CHUNK_INDEX_NAME, PIPELINE_CHUNK_DIR, PIPELINE_STATE_PATH, load_env
+
+DSN_ENV_KEYS = ("DATABASE_URL", "SUPABASE_DB_URL")
+
+LEDGER_SQL = """create table if not exists public.pipeline_chunk_ledger (
+  chunk_hash text primary key,
+  chunk_file text not null,
+  pipeline_version text,
+  duration_ms integer not null,
+  applied_at timestamptz not null default now()
+);"""
+
+
+@dataclass
+class ChunkTier:
+    name: str
+    parallel: bool
+    chunks: List[Path]
+
+
+@dataclass
+class ChunkResult:
+    path: Path
+    chunk_hash: str
+    status: str
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+def load_chunk_plan(chunk_dir: Path) -> List[ChunkTier]:
+    index_path = chunk_dir / CHUNK_INDEX_NAME
+    if index_path.exists():
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+        return [
+            ChunkTier(
+                name=tier["name"],
+                parallel=bool(tier["parallel"]),
+                chunks=[chunk_dir / chunk["file"] for chunk in tier["chunks"]],
+            )
+            for tier in index["tiers"]
+        ]
+    # Chunks split by statement count carry no dependency information, so they
+    # are applied one at a time in file order.
+    chunks = sorted(chunk_dir.glob("chunk_*.sql"))
+    return [ChunkTier(name="chunks", parallel=False, chunks=chunks)] if chunks else []
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_pipeline_version(text: str) -> Optional[str]:
+    for line in text.splitlines():
+        if not line.startswith("--"):
+            break
+        if line.startswith("-- pipeline_version:"):
+            return line.split(":", 1)[1].strip()
+    return None
+
+
+def chunk_body(text: str) -> str:
+    # The applier owns the transaction so the ledger row commits together with
+    # the chunk; drop the begin/commit wrapper written by build_studio_pipeline.
+    lines = text.rstrip("\n").split("\n")
+    start = next((index for index, line in enumerate(lines) if not line.startswith("--")), len(lines))
+    if start < len(lines) and lines[start].strip().lower() == "begin;":
+        lines.pop(start)
+    if lines and lines[-1].strip().lower() == "commit;":
+        lines.pop()
+    return "\n".join(lines) + "\n"
+
+
+def connect(dsn: str) -> Any:
+    try:
+        import psycopg  # type: ignore
+
+        return psycopg.connect(dsn)
+    except ImportError:
+        pass
+    try:
+        import psycopg2  # type: ignore
+    except ImportError as error:
+        raise SystemExit("Install psycopg (or psycopg2) to apply pipeline chunks.") from error
+    return psycopg2.connect(dsn)
+
+
+class ConnectionPool:
+    def __init__(self, factory: Callable[[], Any], size: int) -> None:
+        if size < 1:
+            raise ValueError("size must be >= 1")
+        self.connections: "queue.Queue[Any]" = queue.Queue()
+        self.opened: List[Any] = []
+        for _ in range(size):
+            connection = factory()
+            self.opened.append(connection)
+            self.connections.put(connection)
+
+    def acquire(self) -> Any:
+        return self.connections.get()
+
+    def release(self, connection: Any) -> None:
+        self.connections.put(connection)
+
+    def close(self) -> None:
+        for connection in self.opened:
+            connection.close()
+
+
+def ensure_ledger(connection: Any) -> None:
+    with connection.cursor() as cursor:
+        cursor.execute(LEDGER_SQL)
+    connection.commit()
+
+
+def applied_hashes(connection: Any) -> Set[str]:
+    with connection.cursor() as cursor:
+        cursor.execute("select chunk_hash from public.pipeline_chunk_ledger")
+        rows = cursor.fetchall()
+    connection.commit()
+    return {row[0] for row in rows}
+
+
+def apply_chunk(pool: ConnectionPool, path: Path, text: str, digest: str) -> ChunkResult:
+    connection = pool.acquire()
+    started = time.perf_counter()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(chunk_body(text))
+            seconds = time.perf_counter() - started
+            cursor.execute(
+                "insert into public.pipeline_chunk_ledger "
+                "(chunk_hash, chunk_file, pipeline_version, duration_ms) values (%s, %s, %s, %s) "
+                "on conflict (chunk_hash) do nothing",
+                (digest, path.name, chunk_pipeline_version(text), round(seconds * 1000)),
+            )
+        connection.commit()
+        return ChunkResult(path, digest, "applied", time.perf_counter() - started)
+    except Exception as error:
+        connection.rollback()
+        return ChunkResult(path, digest, "failed", time.perf_counter() - started, str(error).strip())
+    finally:
+        pool.release(connection)
+
+
+def apply_chunks(
+    plan: List[ChunkTier], pool: ConnectionPool, workers: int, skip: Set[str]
+) -> Iterator[ChunkResult]:
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for tier in plan:
+            pending = []
+            for path in tier.chunks:
+                text = path.read_text(encoding="utf-8")
+                digest = chunk_hash(text)
+                if digest in skip:
+                    yield ChunkResult(path, digest, "skipped")
+                    continue
+                if tier.parallel:
+                    pending.append(executor.submit(apply_chunk, pool, path, text, digest))
+                    continue
+                result = apply_chunk(pool, path, text, digest)
+                yield result
+                if result.status == "failed":
+                    return
+            results = [future.result() for future in pending]
+            yield from results
+            # Later tiers reference rows from this one; stop at the first failing tier.
+            if any(result.status == "failed" for result in results):
+                return
+
+
+def resolve_dsn(value: Optional[str]) -> Optional[str]:
+    if value:
+        return value
+    load_env()
+    for key in DSN_ENV_KEYS:
+        if os.environ.get(key):
+            return os.environ[key]
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Apply supabase/studio_pipeline_chunks to Postgres.")
+    parser.add_argument(
+        "--chunk-dir",
+        type=Path,
+        default=PIPELINE_CHUNK_DIR,
+        help="Directory with chunk_*.sql files (and chunk_index.json for tiered chunks).",
+    )
+    parser.add_argument("--dsn", help="Postgres connection string (defaults to DATABASE_URL or SUPABASE_DB_URL).")
+    parser.add_argument("--workers", type=int, default=4, help="Chunks applied concurrently within a tier.")
+    parser.add_argument("--pool-size", type=int, default=0, help="Database connections (0 = --workers).")
+    parser.add_argument("--force", action="store_true", help="Re-apply chunks already recorded in the ledger.")
+    parser.add_argument("--dry-run", action="store_true", help="Print the apply plan without connecting.")
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=PIPELINE_STATE_PATH,
+        help="Build manifest to mark as applied (from its .pending.json) once every chunk is in.",
+    )
+    args = parser.parse_args()
+    if args.workers < 1:
+        raise SystemExit("--workers must be >= 1")
+    if args.pool_size < 0:
+        raise SystemExit("--pool-size must be >= 0")
+
+    plan = load_chunk_plan(args.chunk_dir)
+    if not plan:
+        raise SystemExit(f"No chunk files found in {args.chunk_dir}")
+    if args.dry_run:
+        for tier in plan:
+            mode = "parallel" if tier.parallel else "serial"
+            print(f"{tier.name} ({mode}): {', '.join(path.name for path in tier.chunks)}")
+        return
+
+    dsn = resolve_dsn(args.dsn)
+    if not dsn:
+        raise SystemExit("Missing --dsn (or DATABASE_URL / SUPABASE_DB_URL in .env).")
+    pool = ConnectionPool(lambda: connect(dsn), args.pool_size or args.workers)
+    started = time.perf_counter()
+    counts = {"applied": 0, "skipped": 0, "failed": 0}
+    try:
+        connection = pool.acquire()
+        try:
+            ensure_ledger(connection)
+            skip = set() if args.force else applied_hashes(connection)
+        finally:
+            pool.release(connection)
+        for result in apply_chunks(plan, pool, args.workers, skip):
+            counts[result.status] += 1
+            if result.status == "skipped":
+                print(f"{result.path.name}: skipped (already applied)")
+            elif result.status == "failed":
+                print(f"{result.path.name}: failed after {result.seconds * 1000:.0f} ms: {result.error}")
+            else:
+                print(f"{result.path.name}: applied in {result.seconds * 1000:.0f} ms")
+    finally:
+        pool.close()
+    elapsed = time.perf_counter() - started
+    print(
+        f"{counts['applied']} applied, {counts['skipped']} skipped, {counts['failed']} failed "
+        f"in {elapsed:.1f} s"
+    )
+    if counts["failed"]:
+        sys.exit(1)
+    if promote_pending(args.state):
+        print(f"Marked {pending_path(args.state).name} as applied: {args.state}")
+
+
+if __name__ == "__main__":
+    main()
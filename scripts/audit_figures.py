@@ -12,6 +12,8 @@ from typing import Any, Dict, List
 from urllib.error import HTTPError, URLError
 from urllib.request import Request, urlopen
 
+from pipeline_paths import load_env
+
 ROOT_PATH = Path(__file__).resolve().parent.parent
 DATA_PATH = ROOT_PATH / "data" / "kortsvar.json"
 CAPTIONS_PATH = ROOT_PATH / "data" / "figure_captions.json"
@@ -23,21 +25,6 @@ MAX_IMAGE_BYTES = 5 * 1024 * 1024
 PROMPT_VERSION = "v1"
 
 
-def load_env() -> None:
-    env_path = ROOT_PATH / ".env"
-    if not env_path.exists():
-        return
-    for line in env_path.read_text(encoding="utf-8").splitlines():
-        raw = line.strip()
-        if not raw or raw.startswith("#") or "=" not in raw:
-            continue
-        key, value = raw.split("=", 1)
-        key = key.strip()
-        value = value.strip().strip('"').strip("'")
-        if key and key not in os.environ:
-            os.environ[key] = value
-
-
 def parse_openai_error(error: HTTPError) -> str:
     detail = f"OpenAI error: {error.code}"
     try:
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+import build_studio_pipeline as pipeline
+from benchmark_pipeline import BENCHMARK_DIR, build_corpus, corpus_paths
+from pipeline_hashing import RowHasher
+
+Payloads = Dict[str, Tuple[RowHasher, List[Tuple[Any, ...]]]]
+
+
+def collect_payloads(build: pipeline.PipelineBuild) -> Payloads:
+    payloads: Payloads = {}
+
+    def add(name: str, hasher: RowHasher, values: Tuple[Any, ...]) -> None:
+        payloads.setdefault(name, (hasher, []))[1].append(values)
+
+    rows = {emitter.table: table_rows for emitter, table_rows in build.tables}
+    for row in rows.get("study_items", []):
+        if row.item_type == "disease":
+            hasher = pipeline.DISEASE_ITEM_HASHER
+            add("disease_items", hasher, tuple(getattr(row, name) for name in hasher.fields))
+        else:
+            add("items", pipeline.ITEM_HASHER, tuple(getattr(row, name) for name in pipeline.ITEM_HASHER.fields))
+    for row in rows.get("item_choices", []):
+        values = (row.label, row.choice_text, row.is_correct, row.sort_order)
+        add("choices", pipeline.CHOICE_HASHER, values)
+    for row in rows.get("item_parts", []):
+        if row.part_type == "disease_domain":
+            add("domain_parts", pipeline.DOMAIN_PART_HASHER, (row.domain_key, row.prompt, row.sort_order))
+        else:
+            add("short_parts", pipeline.SHORT_PART_HASHER, (row.label, row.prompt, row.sort_order))
+    for row in rows.get("item_model_answers", []):
+        add("answers", pipeline.ANSWER_HASHER, (row.answer_text,))
+    for row in rows.get("item_assets", []):
+        add("assets", pipeline.ASSET_HASHER, (row.asset_path,))
+    for row in rows.get("asset_annotations", []):
+        if row.annotation_type == "caption":
+            add("captions", pipeline.CAPTION_HASHER, (row.text,))
+        else:
+            add("audits", pipeline.AUDIT_HASHER, (row.text, row.match, row.confidence, row.issues))
+    return payloads
+
+
+def timed(function: Callable[[], List[str]]) -> Tuple[float, List[str]]:
+    started = time.perf_counter()
+    digests = function()
+    return time.perf_counter() - started, digests
+
+
+def benchmark_payloads(payloads: Payloads, repeat: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {}
+    for name, (hasher, values) in payloads.items():
+        best: Dict[str, float] = {}
+        for _ in range(repeat):
+            legacy_seconds, legacy = timed(
+                lambda: [pipeline.content_hash(dict(zip(hasher.fields, row))) for row in values]
+            )
+            # A fresh hasher per round so the cached timing includes every miss.
+            fresh = RowHasher(hasher.fields)
+            direct_seconds, direct = timed(lambda: [fresh.digest(*row) for row in values])
+            cached_seconds, cached = timed(lambda: [fresh(*row) for row in values])
+            if not legacy == direct == cached:
+                raise SystemExit(f"{name}: row hashes differ from content_hash")
+            timings = {"content_hash": legacy_seconds, "row_hasher": direct_seconds, "cached": cached_seconds}
+            for key, seconds in timings.items():
+                best[key] = min(best.get(key, seconds), seconds)
+        best["rows"] = len(values)
+        results[name] = best
+    return results
+
+
+def speedups(timings: Dict[str, float]) -> str:
+    base = timings["content_hash"]
+    return f"{base / max(timings['row_hasher'], 1e-9):>7.2f}x {base / max(timings['cached'], 1e-9):>7.2f}x"
+
+
+def format_results(results: Dict[str, Dict[str, float]]) -> List[str]:
+    columns = ["content_hash", "row_hasher", "cached"]
+    lines = [
+        f"{'payload':<14} {'rows':>8} "
+        + " ".join(f"{column + ' s':>14}" for column in columns)
+        + f" {'direct':>8} {'cached':>8}"
+    ]
+    totals = {column: 0.0 for column in columns}
+    for name, timings in results.items():
+        for column in columns:
+            totals[column] += timings[column]
+        lines.append(
+            f"{name:<14} {int(timings['rows']):>8} "
+            + " ".join(f"{timings[column]:>14.4f}" for column in columns)
+            + f" {speedups(timings)}"
+        )
+    rows = sum(int(timings["rows"]) for timings in results.values())
+    lines.append(
+        f"{'total':<14} {rows:>8} " + " ".join(f"{totals[column]:>14.4f}" for column in columns) + f" {speedups(totals)}"
+    )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare content_hash with the per-row hashers on the payloads of a synthetic corpus."
+    )
+    parser.add_argument("--scale", type=int, default=10, help="Corpus multiplier (see benchmark_pipeline.py).")
+    parser.add_argument("--corpus-dir", type=Path, default=BENCHMARK_DIR, help="Where synthetic corpora are written.")
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds per payload type; the best time is reported.")
+    args = parser.parse_args()
+    if args.scale < 1 or args.repeat < 1:
+        raise SystemExit("--scale and --repeat must be >= 1")
+    corpus_dir = args.corpus_dir.resolve()
+    try:
+        corpus_dir.relative_to(pipeline.ROOT_PATH)
+    except ValueError:
+        raise SystemExit("--corpus-dir must be inside the repository (asset paths are repo-relative).")
+
+    scale_dir = corpus_dir / f"x{args.scale}"
+    build_corpus(args.scale, scale_dir)
+    with corpus_paths(scale_dir):
+        build = pipeline.build_pipeline_rows()
+    results = benchmark_payloads(collect_payloads(build), args.repeat)
+    for line in format_results(results):
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
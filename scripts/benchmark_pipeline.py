@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import platform
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import build_studio_pipeline as pipeline
+import convert_kortsvar
+import convert_rawdata
+import convert_sygdomslaere
+from pipeline_metrics import Instrument, Metrics
+
+BENCHMARK_DIR = pipeline.ROOT_PATH / ".cache" / "studio_benchmark"
+BASELINE_PATH = BENCHMARK_DIR / "baseline.json"
+DEFAULT_SCALES = [1, 10, 100]
+STAGES = ["parse", "images", "rows", "hashing", "validation", "render", "write"]
+YEAR_PREFIX_RE = re.compile(r"^\d{4}")
+
+# Functions wrapped while building rows, grouped into benchmark stages. Stage
+# times are self times, so the hashing done inside a row builder is counted under
+# "hashing" and not under "rows".
+TIMED_FUNCTIONS = [
+    Instrument(convert_rawdata, "iter_questions", "parse"),
+    Instrument(convert_kortsvar, "iter_questions", "parse"),
+    Instrument(convert_kortsvar, "fill_missing_answers", "parse"),
+    Instrument(convert_sygdomslaere, "iter_tsv", "parse"),
+    Instrument(convert_sygdomslaere, "iter_entries", "parse"),
+    Instrument(convert_sygdomslaere, "build_payload", "parse"),
+    Instrument(convert_kortsvar, "assign_images", "images"),
+    Instrument(pipeline, "build_mcq_items", "rows"),
+    Instrument(pipeline, "build_short_items", "rows"),
+    Instrument(pipeline, "build_disease_items", "rows"),
+    Instrument(pipeline, "build_annotations", "rows"),
+    Instrument(pipeline, "content_hash", "hashing"),
+    *(
+        Instrument(pipeline, name, "hashing")
+        for name in (
+            "ITEM_HASHER",
+            "DISEASE_ITEM_HASHER",
+            "CHOICE_HASHER",
+            "SHORT_PART_HASHER",
+            "DOMAIN_PART_HASHER",
+            "ANSWER_HASHER",
+            "ASSET_HASHER",
+            "CAPTION_HASHER",
+            "AUDIT_HASHER",
+        )
+    ),
+    Instrument(pipeline, "hash_text", "hashing"),
+    Instrument(pipeline, "hash_bytes", "hashing"),
+    Instrument(pipeline, "validate_rows", "validation"),
+    Instrument(pipeline, "check_references", "validation"),
+]
+
+# Parser throughput is measured on its own, best of PARSE_REPEATS runs over
+# each raw file, so it is not diluted by the row builders around it.
+PARSE_REPEATS = 3
+
+
+def parse_mcq(path: Path) -> Any:
+    return convert_rawdata.parse_raw_data(path.read_text(encoding="utf-8"))
+
+
+def parse_short(path: Path) -> Any:
+    return convert_kortsvar.parse_raw_data(path.read_text(encoding="utf-8"))
+
+
+def parse_disease(path: Path) -> Any:
+    return convert_sygdomslaere.parse_rows(convert_sygdomslaere.read_tsv(path))
+
+
+PARSERS = [
+    ("rawdata-mc", parse_mcq),
+    ("rawdata-kortsvar", parse_short),
+    ("rawdata-sygdomslaere.txt", parse_disease),
+]
+
+# Kortsvar shapes that make a parser with forward scans or repeated per-line
+# checks degrade: long blank runs behind lookahead lines, many unlabeled
+# underspørgsmål each needing a lookahead, and answers padded with blanks. Each
+# is parsed at both sizes; a linear parser keeps the same lines/s at the larger.
+PATHOLOGICAL_LINES = (20_000, 200_000)
+PATHOLOGICAL_SHORT = {
+    "blank-runs": "Opgave 1 Cellebiologi\nUnderspørgsmål 1 - Forklar:\n" + "\n" * 1000 + "a) Hvad?\n  Svar.\n",
+    "intro-lines": "Opgave 1 Cellebiologi\n" + "Underspørgsmål 1 - Intro:\n\n" * 200 + "a) Hvad?\n  Svar.\n",
+    "answer-blanks": "Opgave 1 Cellebiologi\na) Hvad?\n  Svar.\n" + "\n" * 1000,
+}
+
+
+def pathological_text(shape: str, lines: int) -> str:
+    block = PATHOLOGICAL_SHORT[shape]
+    return "2024\n" + block * -(-lines // block.count("\n"))
+
+
+def shift_year_lines(text: str, pattern: re.Pattern, offset: int) -> str:
+    lines = []
+    for line in text.split("\n"):
+        if pattern.match(line.strip()):
+            stripped = line.lstrip()
+            indent = line[: len(line) - len(stripped)]
+            year = int(stripped[:4]) + offset
+            line = f"{indent}{year}{stripped[4:]}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def year_span(texts: List[Tuple[str, re.Pattern]]) -> Tuple[int, int]:
+    years = [
+        int(line.strip()[:4])
+        for text, pattern in texts
+        for line in text.split("\n")
+        if pattern.match(line.strip())
+    ]
+    if not years:
+        return 0, 0
+    return min(years), max(years)
+
+
+def replica_offsets(scale: int, first_year: int, last_year: int) -> List[int]:
+    # Each replica moves the exam years into its own block so source keys and image
+    # names never collide with the original corpus or with each other.
+    span = last_year - first_year + 1
+    offsets = [replica * span for replica in range(scale)]
+    if last_year + offsets[-1] > 9999:
+        raise ValueError(f"Cannot fit {scale} replicas of {first_year}-{last_year} into four-digit years")
+    return offsets
+
+
+def build_corpus(scale: int, corpus_dir: Path) -> Dict[str, Any]:
+    if scale < 1:
+        raise ValueError("scale must be >= 1")
+    mcq_text = pipeline.RAW_MC_PATH.read_text(encoding="utf-8")
+    short_text = pipeline.RAW_SHORT_PATH.read_text(encoding="utf-8")
+    first_year, last_year = year_span(
+        [(mcq_text, convert_rawdata.YEAR_HEADER_RE), (short_text, convert_kortsvar.YEAR_RE)]
+    )
+    offsets = replica_offsets(scale, first_year, last_year)
+
+    if corpus_dir.exists():
+        shutil.rmtree(corpus_dir)
+    images_dir = corpus_dir / "images"
+    images_dir.mkdir(parents=True)
+
+    mcq = [shift_year_lines(mcq_text, convert_rawdata.YEAR_HEADER_RE, offset) for offset in offsets]
+    short = [shift_year_lines(short_text, convert_kortsvar.YEAR_RE, offset) for offset in offsets]
+    (corpus_dir / "rawdata-mc").write_text("\n".join(mcq), encoding="utf-8")
+    (corpus_dir / "rawdata-kortsvar").write_text("\n".join(short), encoding="utf-8")
+
+    rows = convert_sygdomslaere.read_tsv(pipeline.RAW_DISEASE_PATH)
+    with (corpus_dir / "rawdata-sygdomslaere.txt").open("w", encoding="utf-8", newline="") as handle:
+        writer = csv.writer(handle, delimiter="\t", lineterminator="\n")
+        writer.writerow(rows[0])
+        for replica in range(scale):
+            for row in rows[1:]:
+                name = row[0] if replica == 0 else f"{row[0]} {replica + 1}"
+                writer.writerow([name, *row[1:]])
+
+    image_paths: Dict[str, List[str]] = {}
+    image_files = sorted(p for p in convert_kortsvar.IMAGES_PATH.iterdir() if p.is_file() and p.name != ".DS_Store")
+    for image in image_files:
+        original = str(image.relative_to(pipeline.ROOT_PATH))
+        for offset in offsets:
+            name = image.name
+            if convert_kortsvar.parse_image_filename(image):
+                name = YEAR_PREFIX_RE.sub(str(int(name[:4]) + offset), name)
+            target = images_dir / name
+            shutil.copyfile(image, target)
+            image_paths.setdefault(original, []).append(str(target.relative_to(pipeline.ROOT_PATH)))
+
+    captions = pipeline.load_json(pipeline.FIGURE_CAPTIONS_PATH) or {}
+    scaled_captions = {path: caption for original, caption in captions.items() for path in image_paths.get(original, [])}
+    audits = pipeline.load_json(pipeline.FIGURE_AUDIT_PATH) or []
+    scaled_audits = [
+        {**audit, "image": path} for audit in audits for path in image_paths.get(audit.get("image"), [])
+    ]
+    (corpus_dir / "figure_captions.json").write_text(json.dumps(scaled_captions, ensure_ascii=False), encoding="utf-8")
+    (corpus_dir / "figure_audit.json").write_text(json.dumps(scaled_audits, ensure_ascii=False), encoding="utf-8")
+    return {"scale": scale, "images": len(image_files) * scale, "years": [first_year, last_year + offsets[-1]]}
+
+
+@contextmanager
+def corpus_paths(corpus_dir: Path) -> Iterator[None]:
+    targets = [
+        (pipeline, "RAW_MC_PATH", corpus_dir / "rawdata-mc"),
+        (pipeline, "RAW_SHORT_PATH", corpus_dir / "rawdata-kortsvar"),
+        (pipeline, "RAW_DISEASE_PATH", corpus_dir / "rawdata-sygdomslaere.txt"),
+        (pipeline, "FIGURE_CAPTIONS_PATH", corpus_dir / "figure_captions.json"),
+        (pipeline, "FIGURE_AUDIT_PATH", corpus_dir / "figure_audit.json"),
+        (convert_kortsvar, "IMAGES_PATH", corpus_dir / "images"),
+    ]
+    originals = [(module, attribute, getattr(module, attribute)) for module, attribute, _ in targets]
+    for module, attribute, value in targets:
+        setattr(module, attribute, value)
+    try:
+        yield
+    finally:
+        for module, attribute, value in originals:
+            setattr(module, attribute, value)
+
+
+def parse_rates(corpus_dir: Path) -> Dict[str, Dict[str, float]]:
+    rates = {}
+    for name, parse in PARSERS:
+        path = corpus_dir / name
+        with path.open("rb") as handle:
+            lines = sum(1 for _ in handle)
+        best = float("inf")
+        for _ in range(PARSE_REPEATS):
+            started = time.perf_counter()
+            parse(path)
+            best = min(best, time.perf_counter() - started)
+        rates[name] = {"lines": lines, "seconds": round(best, 4), "lines_per_second": round(lines / best)}
+    return rates
+
+
+def pathological_rates() -> Dict[str, Dict[str, int]]:
+    rates = {}
+    for shape in PATHOLOGICAL_SHORT:
+        rates[shape] = {}
+        for size in PATHOLOGICAL_LINES:
+            text = pathological_text(shape, size)
+            best = float("inf")
+            for _ in range(PARSE_REPEATS):
+                started = time.perf_counter()
+                convert_kortsvar.parse_raw_data(text)
+                best = min(best, time.perf_counter() - started)
+            rates[shape][str(size)] = round(text.count("\n") / best)
+    return rates
+
+
+def stage_times(metrics: Metrics) -> Dict[str, float]:
+    return {stage: metrics.stages[stage].self_wall if stage in metrics.stages else 0.0 for stage in STAGES}
+
+
+def run_pipeline(metrics: Metrics, batch_size: int, output_dir: Path) -> Dict[str, int]:
+    with metrics.patched(TIMED_FUNCTIONS):
+        build = pipeline.build_pipeline_rows()
+    with metrics.stage("render"):
+        plan = pipeline.plan_pipeline_statements(build, batch_size)
+        statements = list(pipeline.iter_pipeline_statements(plan))
+    with metrics.stage("write"):
+        writers = [
+            pipeline.PipelineSqlWriter(output_dir / "studio_pipeline.sql"),
+            pipeline.TieredChunkWriter(output_dir / "chunks", 256 * 1024),
+        ]
+        for table, statement in statements:
+            for writer in writers:
+                writer.write(table, statement)
+        for writer in writers:
+            writer.close()
+    return {emitter.table: len(rows) for emitter, rows in build.tables}
+
+
+def benchmark_scale(scale: int, corpus_root: Path, batch_size: int, memory: bool) -> Dict[str, Any]:
+    corpus_dir = corpus_root / f"x{scale}"
+    started = time.perf_counter()
+    corpus = build_corpus(scale, corpus_dir)
+    corpus["seconds"] = round(time.perf_counter() - started, 4)
+
+    with corpus_paths(corpus_dir), tempfile.TemporaryDirectory() as tmp:
+        metrics = Metrics()
+        started = time.perf_counter()
+        rows = run_pipeline(metrics, batch_size, Path(tmp))
+        total = time.perf_counter() - started
+        peak_memory = None
+        if memory:
+            tracemalloc.start()
+            try:
+                run_pipeline(Metrics(), batch_size, Path(tmp))
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+    return {
+        "corpus": corpus,
+        "rows": rows,
+        "stages": {stage: round(seconds, 4) for stage, seconds in stage_times(metrics).items()},
+        "total": round(total, 4),
+        "peak_memory": peak_memory,
+        "parse_rates": parse_rates(corpus_dir),
+    }
+
+
+def run_benchmarks(scales: List[int], corpus_root: Path, batch_size: int, memory: bool) -> Dict[str, Any]:
+    results: Dict[str, Any] = {
+        "pipeline_version": pipeline.PIPELINE_VERSION,
+        "python": platform.python_version(),
+        "batch_size": batch_size,
+        "scales": {},
+    }
+    for scale in scales:
+        # A fresh process per scale keeps the peak memory of one scale out of the next.
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            results["scales"][str(scale)] = executor.submit(
+                benchmark_scale, scale, corpus_root, batch_size, memory
+            ).result()
+    results["pathological"] = pathological_rates()
+    return results
+
+
+def compare_results(
+    current: Dict[str, Any],
+    baseline: Dict[str, Any],
+    max_slowdown: float,
+    max_memory_growth: float,
+    min_delta: float,
+) -> List[str]:
+    regressions = []
+    for scale, result in current["scales"].items():
+        previous = baseline.get("scales", {}).get(scale)
+        if not previous:
+            continue
+        timings = [*result["stages"].items(), ("total", result["total"])]
+        previous_timings = {**previous.get("stages", {}), "total": previous.get("total")}
+        for stage, seconds in timings:
+            before = previous_timings.get(stage)
+            if not before or seconds - before < min_delta:
+                continue
+            if seconds > before * max_slowdown:
+                regressions.append(f"x{scale} {stage}: {before:.3f}s -> {seconds:.3f}s ({seconds / before:.2f}x)")
+        before_memory = previous.get("peak_memory")
+        memory = result.get("peak_memory")
+        if before_memory and memory and memory > before_memory * max_memory_growth:
+            regressions.append(
+                f"x{scale} peak memory: {before_memory / 2**20:.1f} MiB -> {memory / 2**20:.1f} MiB "
+                f"({memory / before_memory:.2f}x)"
+            )
+    return regressions
+
+
+def format_results(results: Dict[str, Any]) -> List[str]:
+    lines = []
+    for scale, result in results["scales"].items():
+        rows = sum(result["rows"].values())
+        memory = result["peak_memory"]
+        memory_text = f", peak {memory / 2**20:.1f} MiB" if memory is not None else ""
+        lines.append(f"x{scale}: {rows} rows in {result['total']:.3f}s{memory_text}")
+        lines.append("  " + ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in result["stages"].items()))
+        rates = result.get("parse_rates") or {}
+        if rates:
+            parsed = (f"{name} {rate['lines_per_second'] / 1000:.0f}k lines/s" for name, rate in rates.items())
+            lines.append("  parse: " + ", ".join(parsed))
+    for shape, rates in (results.get("pathological") or {}).items():
+        sizes = ", ".join(f"{int(size) // 1000}k lines {rate / 1000:.0f}k lines/s" for size, rate in rates.items())
+        lines.append(f"kortsvar {shape}: {sizes}")
+    return lines
+
+
+def parse_scales(value: str) -> List[int]:
+    try:
+        scales = [int(part) for part in value.split(",") if part.strip()]
+    except ValueError as error:
+        raise argparse.ArgumentTypeError(f"Invalid scales: {value}") from error
+    if not scales or any(scale < 1 for scale in scales):
+        raise argparse.ArgumentTypeError("Scales must be positive integers")
+    return scales
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the studio pipeline on synthetic corpora.")
+    parser.add_argument(
+        "--scales",
+        type=parse_scales,
+        default=DEFAULT_SCALES,
+        help="Comma-separated corpus multipliers of the current raw files and images (default: 1,10,100).",
+    )
+    parser.add_argument("--batch-size", type=int, default=1, help="Rows per insert statement when rendering.")
+    parser.add_argument("--corpus-dir", type=Path, default=BENCHMARK_DIR, help="Where synthetic corpora are written.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline results to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline.")
+    parser.add_argument("--output", type=Path, help="Write the results of this run as JSON.")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass for peak memory.")
+    parser.add_argument(
+        "--max-slowdown",
+        type=float,
+        default=1.25,
+        help="Fail when a stage takes longer than this multiple of the baseline.",
+    )
+    parser.add_argument(
+        "--max-memory-growth",
+        type=float,
+        default=1.25,
+        help="Fail when peak memory exceeds this multiple of the baseline.",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.05,
+        help="Ignore stage slowdowns smaller than this many seconds.",
+    )
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        raise SystemExit("--batch-size must be >= 1")
+
+    try:
+        corpus_dir = args.corpus_dir.resolve()
+        corpus_dir.relative_to(pipeline.ROOT_PATH)
+    except ValueError:
+        raise SystemExit("--corpus-dir must be inside the repository (asset paths are repo-relative).")
+
+    results = run_benchmarks(args.scales, corpus_dir, args.batch_size, not args.no_memory)
+    for line in format_results(results):
+        print(line)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+
+    regressions: List[str] = []
+    baseline: Optional[Dict[str, Any]] = pipeline.load_json(args.baseline)
+    if baseline:
+        regressions = compare_results(
+            results, baseline, args.max_slowdown, args.max_memory_growth, args.min_delta
+        )
+        if baseline.get("pipeline_version") != results["pipeline_version"]:
+            print(f"Note: baseline was recorded with pipeline_version {baseline.get('pipeline_version')}")
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if not regressions:
+            print(f"No regressions against {args.baseline}")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {args.baseline}")
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import hashlib
 import json
+import os
 import re
 import sys
+import time
 import uuid
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from operator import attrgetter
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
 ROOT_PATH = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(ROOT_PATH / "scripts"))
@@ -16,11 +23,30 @@ import convert_rawdata  # type: ignore
 import convert_kortsvar  # type: ignore
 import convert_sygdomslaere  # type: ignore
 from human_categories import normalize_human_category
+import pipeline_metrics
+from pipeline_cache import DEFAULT_MAX_ENTRIES, ParseCache, directory_fingerprint, files_fingerprint
+from pipeline_hashing import RowHasher, canonical_json
+from pipeline_manifest import PipelineManifest, pending_path, table_digest, write_manifest
+from pipeline_outputs import AtomicOutput, OutputReport, remove_stale, replace_if_changed, write_text_if_changed
+from pipeline_paths import CHUNK_INDEX_NAME, PIPELINE_CHUNK_DIR, PIPELINE_STATE_PATH
+from pipeline_rows import (
+    AssetAnnotationRow,
+    ItemAssetRow,
+    ItemChoiceRow,
+    ItemPartRow,
+    ItemSourceRow,
+    ModelAnswerRow,
+    PipelineRow,
+    StudyItemRow,
+    TextBlobRow,
+)
 
 PIPELINE_VERSION = "2026-01-11.1"
 NAMESPACE_UUID = uuid.UUID("9e2d6f3b-6a3a-4e4b-8f36-9a7c56a8d5a4")
 MARKER_START = "-- BEGIN STUDIO_PIPELINE_DATA"
 MARKER_END = "-- END STUDIO_PIPELINE_DATA"
+RENDER_TASKS_PER_TABLE = 16
+RENDER_WINDOW = 4
 
 RAW_MC_PATH = ROOT_PATH / "rawdata-mc"
 RAW_SHORT_PATH = ROOT_PATH / "rawdata-kortsvar"
@@ -29,7 +55,18 @@ FIGURE_CAPTIONS_PATH = ROOT_PATH / "data" / "figure_captions.json"
 FIGURE_AUDIT_PATH = ROOT_PATH / "data" / "figure_audit.json"
 SCHEMA_PATH = ROOT_PATH / "supabase" / "schema.sql"
 PIPELINE_SQL_PATH = ROOT_PATH / "supabase" / "studio_pipeline.sql"
-PIPELINE_CHUNK_DIR = ROOT_PATH / "supabase" / "studio_pipeline_chunks"
+PIPELINE_COPY_DIR = ROOT_PATH / "supabase" / "studio_pipeline_copy"
+PIPELINE_CACHE_DIR = ROOT_PATH / ".cache" / "studio_pipeline"
+# Builder code is part of the cache key so edits without a PIPELINE_VERSION bump stay safe.
+PIPELINE_CODE_PATHS = [
+    ROOT_PATH / "scripts" / "build_studio_pipeline.py",
+    ROOT_PATH / "scripts" / "convert_rawdata.py",
+    ROOT_PATH / "scripts" / "convert_kortsvar.py",
+    ROOT_PATH / "scripts" / "convert_sygdomslaere.py",
+    ROOT_PATH / "scripts" / "human_categories.py",
+    ROOT_PATH / "scripts" / "pipeline_hashing.py",
+    ROOT_PATH / "scripts" / "pipeline_rows.py",
+]
 
 SOURCE_VERSIONS = {
     "rawdata-mc": "rawdata-mc-v1",
@@ -39,6 +76,14 @@ SOURCE_VERSIONS = {
     "figure-audit": "figure-audit-v1",
 }
 
+# Every source_key starts with its item's prefix, which names the source (and
+# so the ingest run) a row or a removed key belongs to.
+SOURCE_BY_KEY_PREFIX = {
+    "human:mcq": "rawdata-mc",
+    "human:short": "rawdata-kortsvar",
+    "sygdomslaere:disease": "rawdata-sygdomslaere",
+}
+
 STUDY_SLUG_HUMAN = "human"
 STUDY_SLUG_DISEASE = "sygdomslaere"
 
@@ -61,10 +106,6 @@ def normalize_session_key(value: Optional[str]) -> str:
     return value or "na"
 
 
-def canonical_json(payload: Any) -> str:
-    return json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
-
-
 def hash_text(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
@@ -77,11 +118,30 @@ def content_hash(payload: Any) -> str:
     return hash_text(canonical_json(payload))
 
 
+# Row builders hash fixed payloads through these; each digest equals
+# content_hash of the dict with the same fields.
+ITEM_HASHER = RowHasher(("item_type", "year", "session", "category", "title", "stem"))
+DISEASE_ITEM_HASHER = RowHasher(
+    ("item_type", "year", "session", "category", "title", "stem", "priority", "weight")
+)
+CHOICE_HASHER = RowHasher(("label", "text", "is_correct", "sort_order"))
+SHORT_PART_HASHER = RowHasher(("label", "prompt", "sort_order"))
+DOMAIN_PART_HASHER = RowHasher(("domain_key", "prompt", "sort_order"))
+ANSWER_HASHER = RowHasher(("answer_text",))
+ASSET_HASHER = RowHasher(("asset_path",))
+CAPTION_HASHER = RowHasher(("text",))
+AUDIT_HASHER = RowHasher(("text", "match", "confidence", "issues"))
+
+
 def build_run_id(source_system: str, source_hash: str) -> str:
     name = f"{source_system}:{source_hash}:{PIPELINE_VERSION}"
     return str(uuid.uuid5(NAMESPACE_UUID, name))
 
 
+def build_row_id(table: str, source_key: str) -> str:
+    return str(uuid.uuid5(NAMESPACE_UUID, f"{table}:{source_key}"))
+
+
 def slugify(text: str) -> str:
     lowered = text.strip().lower()
     lowered = re.sub(r"[^a-z0-9\s_-]", "", lowered)
@@ -111,166 +171,231 @@ def sql_literal(value: Any) -> str:
     return f"'{text}'"
 
 
-def ensure_keys(record: Dict[str, Any], required: Iterable[str], allowed: Iterable[str]) -> None:
-    required_set = set(required)
-    allowed_set = set(allowed)
-    missing = [key for key in required_set if record.get(key) is None]
-    if missing:
-        raise ValueError(f"Missing required fields: {', '.join(sorted(missing))}")
-    unknown = [key for key in record.keys() if key not in allowed_set]
-    if unknown:
-        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+@dataclass(frozen=True)
+class RowSchema:
+    table: str
+    row_type: type
+    required: Tuple[str, ...]
+    types: Tuple[Tuple[str, type], ...] = ()
+
+
+@dataclass(frozen=True)
+class Violation:
+    table: str
+    index: int
+    source_key: Optional[str]
+    problem: str
+
+    def __str__(self) -> str:
+        return f"{self.table}[{self.index}] {self.source_key or '<no source_key>'}: {self.problem}"
+
+
+class RowValidationError(ValueError):
+    max_listed = 20
+
+    def __init__(self, violations: List[Violation]) -> None:
+        self.violations = violations
+        rows = len({(violation.table, violation.index) for violation in violations})
+        lines = [f"{len(violations)} problems in {rows} rows:"]
+        lines.extend(f"  {violation}" for violation in violations[: self.max_listed])
+        if len(violations) > self.max_listed:
+            lines.append(f"  ... and {len(violations) - self.max_listed} more")
+        super().__init__("\n".join(lines))
+
+
+# Compiled once per row type. Each check walks one column over all rows, and
+# every failing row is reported instead of stopping at the first one.
+class RowValidator:
+    def __init__(self, schema: RowSchema) -> None:
+        self.table = schema.table
+        self.row_type = schema.row_type
+        self.required = tuple((name, attrgetter(name)) for name in schema.required)
+        self.types = tuple((name, attrgetter(name), expected, expected.__name__) for name, expected in schema.types)
+
+    def __call__(self, rows: List[PipelineRow]) -> List[Violation]:
+        found: List[Tuple[int, str]] = []
+        row_type = self.row_type
+        wrong = {index for index, row in enumerate(rows) if type(row) is not row_type}
+        for index in sorted(wrong):
+            found.append((index, f"expected {row_type.__name__}, got {type(rows[index]).__name__}"))
+        checked = [row for index, row in enumerate(rows) if index not in wrong] if wrong else rows
+        positions = [index for index in range(len(rows)) if index not in wrong] if wrong else range(len(rows))
+        for name, getter in self.required:
+            found.extend(
+                (positions[index], f"missing required field {name}")
+                for index, value in enumerate(map(getter, checked))
+                if value is None
+            )
+        for name, getter, expected, type_name in self.types:
+            found.extend(
+                (positions[index], f"{name}: expected {type_name}, got {type(value).__name__}")
+                for index, value in enumerate(map(getter, checked))
+                if value is not None and not isinstance(value, expected)
+            )
+        found.sort(key=lambda entry: entry[0])
+        return [Violation(self.table, index, rows[index].get("source_key"), problem) for index, problem in found]
+
+
+def validate_rows(checks: Iterable[Tuple[RowValidator, List[PipelineRow]]]) -> None:
+    violations = [violation for validator, rows in checks for violation in validator(rows)]
+    if violations:
+        raise RowValidationError(violations)
+
+
+ITEM_VALIDATOR = RowValidator(
+    RowSchema(
+        table="study_items",
+        row_type=StudyItemRow,
+        required=("study_slug", "item_type", "source_system", "source_key", "source_version", "content_hash", "stem"),
+        types=(
+            ("study_slug", str),
+            ("item_type", str),
+            ("source_key", str),
+            ("stem", str),
+            ("year", int),
+            ("is_active", bool),
+        ),
+    )
+)
+PART_VALIDATOR = RowValidator(
+    RowSchema(
+        table="item_parts",
+        row_type=ItemPartRow,
+        required=("item_source_key", "part_type", "prompt", "source_key", "content_hash"),
+        types=(("item_source_key", str), ("prompt", str), ("sort_order", int)),
+    )
+)
+CHOICE_VALIDATOR = RowValidator(
+    RowSchema(
+        table="item_choices",
+        row_type=ItemChoiceRow,
+        required=("item_source_key", "label", "choice_text", "is_correct", "source_key", "content_hash"),
+        types=(
+            ("item_source_key", str),
+            ("label", str),
+            ("choice_text", str),
+            ("is_correct", bool),
+            ("sort_order", int),
+        ),
+    )
+)
+MODEL_ANSWER_VALIDATOR = RowValidator(
+    RowSchema(
+        table="item_model_answers",
+        row_type=ModelAnswerRow,
+        required=("item_source_key", "answer_text", "version", "source_key", "content_hash"),
+        types=(("item_source_key", str), ("answer_text", str), ("version", str)),
+    )
+)
+SOURCE_VALIDATOR = RowValidator(
+    RowSchema(
+        table="item_sources",
+        row_type=ItemSourceRow,
+        required=("source_text", "source_key"),
+        types=(("source_text", str),),
+    )
+)
+ASSET_VALIDATOR = RowValidator(
+    RowSchema(
+        table="item_assets",
+        row_type=ItemAssetRow,
+        required=("item_source_key", "asset_type", "asset_path", "source_key", "content_hash"),
+        types=(("asset_path", str),),
+    )
+)
+ANNOTATION_VALIDATOR = RowValidator(
+    RowSchema(
+        table="asset_annotations",
+        row_type=AssetAnnotationRow,
+        required=("asset_source_key", "annotation_type", "llm_output_version", "source_key", "content_hash"),
+        types=(("annotation_type", str), ("llm_output_version", str)),
+    )
+)
 
 
-def ensure_type(value: Any, expected: type, field: str) -> None:
-    if value is None:
-        return
-    if not isinstance(value, expected):
-        raise TypeError(f"Invalid type for {field}: expected {expected.__name__}")
-
-
-def validate_items(items: List[Dict[str, Any]]) -> None:
-    allowed = {
-        "study_slug",
-        "item_type",
-        "source_system",
-        "source_key",
-        "source_version",
-        "source_hash",
-        "content_hash",
-        "ingest_run_id",
-        "year",
-        "session",
-        "category",
-        "title",
-        "stem",
-        "priority",
-        "weight",
-        "is_active",
-    }
-    required = {
-        "study_slug",
-        "item_type",
-        "source_system",
-        "source_key",
-        "source_version",
-        "content_hash",
-        "stem",
-    }
-    for item in items:
-        ensure_keys(item, required, allowed)
-        ensure_type(item.get("study_slug"), str, "study_slug")
-        ensure_type(item.get("item_type"), str, "item_type")
-        ensure_type(item.get("source_key"), str, "source_key")
-        ensure_type(item.get("stem"), str, "stem")
-        ensure_type(item.get("year"), int, "year")
-        ensure_type(item.get("is_active"), bool, "is_active")
-
-
-def validate_parts(parts: List[Dict[str, Any]]) -> None:
-    allowed = {
-        "item_source_key",
-        "part_type",
-        "label",
-        "domain_key",
-        "prompt",
-        "sort_order",
-        "source_key",
-        "content_hash",
-    }
-    required = {"item_source_key", "part_type", "prompt", "source_key", "content_hash"}
-    for part in parts:
-        ensure_keys(part, required, allowed)
-        ensure_type(part.get("item_source_key"), str, "item_source_key")
-        ensure_type(part.get("prompt"), str, "prompt")
-        ensure_type(part.get("sort_order"), int, "sort_order")
-
-
-def validate_choices(choices: List[Dict[str, Any]]) -> None:
-    allowed = {
-        "item_source_key",
-        "label",
-        "choice_text",
-        "is_correct",
-        "sort_order",
-        "source_key",
-        "content_hash",
-    }
-    required = {"item_source_key", "label", "choice_text", "is_correct", "source_key", "content_hash"}
-    for choice in choices:
-        ensure_keys(choice, required, allowed)
-        ensure_type(choice.get("item_source_key"), str, "item_source_key")
-        ensure_type(choice.get("label"), str, "label")
-        ensure_type(choice.get("choice_text"), str, "choice_text")
-        ensure_type(choice.get("is_correct"), bool, "is_correct")
-        ensure_type(choice.get("sort_order"), int, "sort_order")
-
-
-def validate_model_answers(model_answers: List[Dict[str, Any]]) -> None:
-    allowed = {
-        "item_source_key",
-        "part_source_key",
-        "answer_text",
-        "version",
-        "source_key",
-        "source_type",
-        "source_system",
-        "source_version",
-        "content_hash",
-    }
-    required = {"item_source_key", "answer_text", "version", "source_key", "content_hash"}
-    for answer in model_answers:
-        ensure_keys(answer, required, allowed)
-        ensure_type(answer.get("item_source_key"), str, "item_source_key")
-        ensure_type(answer.get("answer_text"), str, "answer_text")
-        ensure_type(answer.get("version"), str, "version")
+class IntegrityError(RowValidationError):
+    pass
 
 
-def validate_sources(sources: List[Dict[str, Any]]) -> None:
-    allowed = {"item_source_key", "part_source_key", "source_text", "source_key"}
-    required = {"source_text", "source_key"}
-    for source in sources:
-        ensure_keys(source, required, allowed)
-        ensure_type(source.get("source_text"), str, "source_text")
-
-
-def validate_assets(assets: List[Dict[str, Any]]) -> None:
-    allowed = {
-        "item_source_key",
-        "part_source_key",
-        "asset_type",
-        "asset_path",
-        "source_key",
-        "content_hash",
-    }
-    required = {"item_source_key", "asset_type", "asset_path", "source_key", "content_hash"}
-    for asset in assets:
-        ensure_keys(asset, required, allowed)
-        ensure_type(asset.get("asset_path"), str, "asset_path")
-
-
-def validate_annotations(annotations: List[Dict[str, Any]]) -> None:
-    allowed = {
-        "asset_source_key",
-        "annotation_type",
-        "text",
-        "match",
-        "confidence",
-        "issues",
-        "source_type",
-        "llm_model",
-        "llm_prompt_version",
-        "llm_output_version",
-        "source_key",
-        "source_system",
-        "source_version",
-        "content_hash",
-    }
-    required = {"asset_source_key", "annotation_type", "llm_output_version", "source_key", "content_hash"}
-    for annotation in annotations:
-        ensure_keys(annotation, required, allowed)
-        ensure_type(annotation.get("annotation_type"), str, "annotation_type")
-        ensure_type(annotation.get("llm_output_version"), str, "llm_output_version")
+@dataclass(frozen=True)
+class Reference:
+    column: str
+    target: str
+
+
+# Parent tables each reference column must resolve to within the same build;
+# null references are left to the row validators.
+TABLE_REFERENCES: Dict[str, Tuple[Reference, ...]] = {
+    "study_items": (Reference("ingest_run_id", "ingest_runs"),),
+    "item_choices": (Reference("item_source_key", "study_items"),),
+    "item_parts": (Reference("item_source_key", "study_items"),),
+    "item_model_answers": (Reference("item_source_key", "study_items"), Reference("part_source_key", "item_parts")),
+    "item_sources": (Reference("item_source_key", "study_items"), Reference("part_source_key", "item_parts")),
+    "item_assets": (Reference("item_source_key", "study_items"), Reference("part_source_key", "item_parts")),
+    "asset_annotations": (Reference("asset_source_key", "item_assets"),),
+}
+# The legacy figure audit lists some figures more than once and the last entry
+# wins (see latest_by_source_key), so repeats there are reported, not fatal.
+REPEATABLE_KEY_TABLES = frozenset({"asset_annotations"})
+
+
+def check_references(tables: List[Tuple[str, List[PipelineRow]]], run_ids: Iterable[str]) -> List[Violation]:
+    # One pass per table indexes its keys (and finds repeats), one pass per
+    # reference column resolves it; returns the tolerated repeats.
+    keys: Dict[str, Set[str]] = {"ingest_runs": set(run_ids)}
+    violations: List[Violation] = []
+    repeats: List[Violation] = []
+    for table, rows in tables:
+        source_keys = list(map(attrgetter("source_key"), rows))
+        keys[table] = unique = set(source_keys)
+        if len(unique) == len(source_keys):
+            continue
+        first_index: Dict[str, int] = {}
+        for index, source_key in enumerate(source_keys):
+            first = first_index.setdefault(source_key, index)
+            if first != index:
+                found = repeats if table in REPEATABLE_KEY_TABLES else violations
+                found.append(Violation(table, index, source_key, f"duplicate source_key (first at row {first})"))
+    for table, rows in tables:
+        for reference in TABLE_REFERENCES.get(table, ()):
+            targets = keys.get(reference.target, set())
+            problem = f"has no {reference.target} row"
+            violations.extend(
+                Violation(table, index, rows[index].source_key, f"{reference.column} {value!r} {problem}")
+                for index, value in enumerate(map(attrgetter(reference.column), rows))
+                if value is not None and value not in targets
+            )
+    if violations:
+        raise IntegrityError(violations)
+    return repeats
+
+
+def validate_items(items: List[StudyItemRow]) -> None:
+    validate_rows([(ITEM_VALIDATOR, items)])
+
+
+def validate_parts(parts: List[ItemPartRow]) -> None:
+    validate_rows([(PART_VALIDATOR, parts)])
+
+
+def validate_choices(choices: List[ItemChoiceRow]) -> None:
+    validate_rows([(CHOICE_VALIDATOR, choices)])
+
+
+def validate_model_answers(model_answers: List[ModelAnswerRow]) -> None:
+    validate_rows([(MODEL_ANSWER_VALIDATOR, model_answers)])
+
+
+def validate_sources(sources: List[ItemSourceRow]) -> None:
+    validate_rows([(SOURCE_VALIDATOR, sources)])
+
+
+def validate_assets(assets: List[ItemAssetRow]) -> None:
+    validate_rows([(ASSET_VALIDATOR, assets)])
+
+
+def validate_annotations(annotations: List[AssetAnnotationRow]) -> None:
+    validate_rows([(ANNOTATION_VALIDATOR, annotations)])
 
 
 def load_json(path: Path) -> Any:
@@ -279,58 +404,47 @@ def load_json(path: Path) -> Any:
     return json.loads(path.read_text(encoding="utf-8"))
 
 
-def build_mcq_items(raw_text: str, ingest_run_id: str, source_hash: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
-    questions = convert_rawdata.parse_raw_data(raw_text)
-    items: List[Dict[str, Any]] = []
-    choices: List[Dict[str, Any]] = []
-    for question in questions:
+def build_mcq_items(
+    raw_text: str, ingest_run_id: str, source_hash: str
+) -> Tuple[List[StudyItemRow], List[ItemChoiceRow]]:
+    items: List[StudyItemRow] = []
+    choices: List[ItemChoiceRow] = []
+    for question in convert_rawdata.iter_questions(raw_text.splitlines()):
         session_key = normalize_session_key(question.session)
         source_key = f"human:mcq:{question.year}:{session_key}:{question.number}"
-        item_payload = {
-            "item_type": "mcq",
-            "year": question.year,
-            "session": question.session,
-            "category": question.category,
-            "title": None,
-            "stem": question.text,
-        }
         items.append(
-            {
-                "study_slug": STUDY_SLUG_HUMAN,
-                "item_type": "mcq",
-                "source_system": "rawdata-mc",
-                "source_key": source_key,
-                "source_version": SOURCE_VERSIONS["rawdata-mc"],
-                "source_hash": source_hash,
-                "content_hash": content_hash(item_payload),
-                "ingest_run_id": ingest_run_id,
-                "year": question.year,
-                "session": question.session,
-                "category": question.category,
-                "title": None,
-                "stem": question.text,
-                "priority": None,
-                "weight": None,
-                "is_active": True,
-            }
+            StudyItemRow(
+                study_slug=STUDY_SLUG_HUMAN,
+                item_type="mcq",
+                source_system="rawdata-mc",
+                source_key=source_key,
+                source_version=SOURCE_VERSIONS["rawdata-mc"],
+                source_hash=source_hash,
+                content_hash=ITEM_HASHER(
+                    "mcq", question.year, question.session, question.category, None, question.text
+                ),
+                ingest_run_id=ingest_run_id,
+                year=question.year,
+                session=question.session,
+                category=question.category,
+                title=None,
+                stem=question.text,
+                priority=None,
+                weight=None,
+                is_active=True,
+            )
         )
         for idx, option in enumerate(question.options):
-            choice_payload = {
-                "label": option.label,
-                "text": option.text,
-                "is_correct": option.is_correct,
-                "sort_order": idx,
-            }
             choices.append(
-                {
-                    "item_source_key": source_key,
-                    "label": option.label,
-                    "choice_text": option.text,
-                    "is_correct": option.is_correct,
-                    "sort_order": idx,
-                    "source_key": f"{source_key}:choice:{option.label}",
-                    "content_hash": content_hash(choice_payload),
-                }
+                ItemChoiceRow(
+                    item_source_key=source_key,
+                    label=option.label,
+                    choice_text=option.text,
+                    is_correct=option.is_correct,
+                    sort_order=idx,
+                    source_key=f"{source_key}:choice:{option.label}",
+                    content_hash=CHOICE_HASHER(option.label, option.text, option.is_correct, idx),
+                )
             )
     return items, choices
 
@@ -342,15 +456,15 @@ def normalize_short_category(title: Optional[str]) -> str:
 
 
 def build_short_items(raw_text: str, ingest_run_id: str, source_hash: str) -> Tuple[
-    List[Dict[str, Any]],
-    List[Dict[str, Any]],
-    List[Dict[str, Any]],
-    List[Dict[str, Any]],
-    List[Dict[str, Any]],
+    List[StudyItemRow],
+    List[ItemPartRow],
+    List[ModelAnswerRow],
+    List[ItemSourceRow],
+    List[ItemAssetRow],
 ]:
     questions = convert_kortsvar.parse_raw_data(raw_text)
     convert_kortsvar.fill_missing_answers(questions)
-    convert_kortsvar.assign_images(questions)
+    convert_kortsvar.assign_images(questions, convert_kortsvar.IMAGES_PATH)
 
     groups: Dict[Tuple[int, Optional[str], int, str, Optional[str], str], List[Any]] = {}
     for question in questions:
@@ -365,118 +479,101 @@ def build_short_items(raw_text: str, ingest_run_id: str, source_hash: str) -> Tu
         )
         groups.setdefault(key, []).append(question)
 
-    items: List[Dict[str, Any]] = []
-    parts: List[Dict[str, Any]] = []
-    model_answers: List[Dict[str, Any]] = []
-    sources: List[Dict[str, Any]] = []
-    assets: List[Dict[str, Any]] = []
+    items: List[StudyItemRow] = []
+    parts: List[ItemPartRow] = []
+    model_answers: List[ModelAnswerRow] = []
+    sources: List[ItemSourceRow] = []
+    assets: List[ItemAssetRow] = []
 
     for (year, session, opgave, title, intro, category), group in groups.items():
         session_key = normalize_session_key(session)
         source_key = f"human:short:{year}:{session_key}:{opgave}"
         stem = intro or title
-        item_payload = {
-            "item_type": "short",
-            "year": year,
-            "session": session,
-            "category": category,
-            "title": title,
-            "stem": stem,
-        }
         items.append(
-            {
-                "study_slug": STUDY_SLUG_HUMAN,
-                "item_type": "short",
-                "source_system": "rawdata-kortsvar",
-                "source_key": source_key,
-                "source_version": SOURCE_VERSIONS["rawdata-kortsvar"],
-                "source_hash": source_hash,
-                "content_hash": content_hash(item_payload),
-                "ingest_run_id": ingest_run_id,
-                "year": year,
-                "session": session,
-                "category": category,
-                "title": title,
-                "stem": stem,
-                "priority": None,
-                "weight": None,
-                "is_active": True,
-            }
+            StudyItemRow(
+                study_slug=STUDY_SLUG_HUMAN,
+                item_type="short",
+                source_system="rawdata-kortsvar",
+                source_key=source_key,
+                source_version=SOURCE_VERSIONS["rawdata-kortsvar"],
+                source_hash=source_hash,
+                content_hash=ITEM_HASHER("short", year, session, category, title, stem),
+                ingest_run_id=ingest_run_id,
+                year=year,
+                session=session,
+                category=category,
+                title=title,
+                stem=stem,
+                priority=None,
+                weight=None,
+                is_active=True,
+            )
         )
         sorted_group = sorted(group, key=lambda q: (q.label or "", q.prompt))
         for idx, question in enumerate(sorted_group):
             label = question.label.lower() if question.label else None
             part_suffix = label or f"p{idx + 1}"
             part_key = f"{source_key}:part:{part_suffix}"
-            part_payload = {
-                "label": label,
-                "prompt": question.prompt,
-                "sort_order": idx,
-            }
             parts.append(
-                {
-                    "item_source_key": source_key,
-                    "part_type": "short_part",
-                    "label": label,
-                    "domain_key": None,
-                    "prompt": question.prompt,
-                    "sort_order": idx,
-                    "source_key": part_key,
-                    "content_hash": content_hash(part_payload),
-                }
+                ItemPartRow(
+                    item_source_key=source_key,
+                    part_type="short_part",
+                    label=label,
+                    domain_key=None,
+                    prompt=question.prompt,
+                    sort_order=idx,
+                    source_key=part_key,
+                    content_hash=SHORT_PART_HASHER(label, question.prompt, idx),
+                )
             )
-            answer_payload = {"answer_text": question.answer}
             model_answers.append(
-                {
-                    "item_source_key": source_key,
-                    "part_source_key": part_key,
-                    "answer_text": question.answer,
-                    "version": SOURCE_VERSIONS["rawdata-kortsvar"],
-                    "source_key": f"{part_key}:model_answer:{SOURCE_VERSIONS['rawdata-kortsvar']}",
-                    "source_type": "human",
-                    "source_system": "rawdata-kortsvar",
-                    "source_version": SOURCE_VERSIONS["rawdata-kortsvar"],
-                    "content_hash": content_hash(answer_payload),
-                }
+                ModelAnswerRow(
+                    item_source_key=source_key,
+                    part_source_key=part_key,
+                    answer_text=question.answer,
+                    version=SOURCE_VERSIONS["rawdata-kortsvar"],
+                    source_key=f"{part_key}:model_answer:{SOURCE_VERSIONS['rawdata-kortsvar']}",
+                    source_type="human",
+                    source_system="rawdata-kortsvar",
+                    source_version=SOURCE_VERSIONS["rawdata-kortsvar"],
+                    content_hash=ANSWER_HASHER(question.answer),
+                )
             )
             for source_index, source_text in enumerate(question.sources or []):
                 sources.append(
-                    {
-                        "item_source_key": source_key,
-                        "part_source_key": part_key,
-                        "source_text": source_text,
-                        "source_key": f"{part_key}:source:{source_index}",
-                    }
+                    ItemSourceRow(
+                        item_source_key=source_key,
+                        part_source_key=part_key,
+                        source_text=source_text,
+                        source_key=f"{part_key}:source:{source_index}",
+                    )
                 )
             for asset_path in question.images or []:
                 asset_key = f"{part_key}:asset:{hash_text(asset_path)[:12]}"
-                asset_payload = {"asset_path": asset_path}
                 assets.append(
-                    {
-                        "item_source_key": source_key,
-                        "part_source_key": part_key,
-                        "asset_type": "image",
-                        "asset_path": asset_path,
-                        "source_key": asset_key,
-                        "content_hash": content_hash(asset_payload),
-                    }
+                    ItemAssetRow(
+                        item_source_key=source_key,
+                        part_source_key=part_key,
+                        asset_type="image",
+                        asset_path=asset_path,
+                        source_key=asset_key,
+                        content_hash=ASSET_HASHER(asset_path),
+                    )
                 )
 
     return items, parts, model_answers, sources, assets
 
 
 def build_disease_items(ingest_run_id: str, source_hash: str) -> Tuple[
-    List[Dict[str, Any]],
-    List[Dict[str, Any]],
-    List[Dict[str, Any]],
+    List[StudyItemRow],
+    List[ItemPartRow],
+    List[ModelAnswerRow],
 ]:
-    rows = convert_sygdomslaere.read_tsv(RAW_DISEASE_PATH)
-    header, mapped = convert_sygdomslaere.parse_rows(rows)
-    payload = convert_sygdomslaere.build_payload(mapped, header)
+    payload = convert_sygdomslaere.read_payload(RAW_DISEASE_PATH)
 
-    items: List[Dict[str, Any]] = []
-    parts: List[Dict[str, Any]] = []
-    model_answers: List[Dict[str, Any]] = []
+    items: List[StudyItemRow] = []
+    parts: List[ItemPartRow] = []
+    model_answers: List[ModelAnswerRow] = []
 
     diseases = payload.get("diseases") or []
     for disease in diseases:
@@ -486,35 +583,34 @@ def build_disease_items(ingest_run_id: str, source_hash: str) -> Tuple[
         source_key = f"sygdomslaere:disease:{disease_id}"
         weight = disease.get("weight") or None
         priority = disease.get("priority") or None
-        item_payload = {
-            "item_type": "disease",
-            "year": None,
-            "session": None,
-            "category": disease.get("category"),
-            "title": disease.get("name"),
-            "stem": disease.get("name"),
-            "priority": priority,
-            "weight": weight,
-        }
         items.append(
-            {
-                "study_slug": STUDY_SLUG_DISEASE,
-                "item_type": "disease",
-                "source_system": "rawdata-sygdomslaere",
-                "source_key": source_key,
-                "source_version": SOURCE_VERSIONS["rawdata-sygdomslaere"],
-                "source_hash": source_hash,
-                "content_hash": content_hash(item_payload),
-                "ingest_run_id": ingest_run_id,
-                "year": None,
-                "session": None,
-                "category": disease.get("category"),
-                "title": disease.get("name"),
-                "stem": disease.get("name"),
-                "priority": priority,
-                "weight": weight,
-                "is_active": True,
-            }
+            StudyItemRow(
+                study_slug=STUDY_SLUG_DISEASE,
+                item_type="disease",
+                source_system="rawdata-sygdomslaere",
+                source_key=source_key,
+                source_version=SOURCE_VERSIONS["rawdata-sygdomslaere"],
+                source_hash=source_hash,
+                content_hash=DISEASE_ITEM_HASHER(
+                    "disease",
+                    None,
+                    None,
+                    disease.get("category"),
+                    disease.get("name"),
+                    disease.get("name"),
+                    priority,
+                    weight,
+                ),
+                ingest_run_id=ingest_run_id,
+                year=None,
+                session=None,
+                category=disease.get("category"),
+                title=disease.get("name"),
+                stem=disease.get("name"),
+                priority=priority,
+                weight=weight,
+                is_active=True,
+            )
         )
         sections = disease.get("sections") or []
         for idx, section in enumerate(sections):
@@ -522,76 +618,70 @@ def build_disease_items(ingest_run_id: str, source_hash: str) -> Tuple[
             normalized_title = normalize_domain_title(title)
             domain_key = DOMAIN_KEY_MAP.get(normalized_title) or slugify(normalized_title)
             part_key = f"{source_key}:domain:{domain_key}"
-            part_payload = {
-                "domain_key": domain_key,
-                "prompt": title,
-                "sort_order": idx,
-            }
             parts.append(
-                {
-                    "item_source_key": source_key,
-                    "part_type": "disease_domain",
-                    "label": None,
-                    "domain_key": domain_key,
-                    "prompt": title,
-                    "sort_order": idx,
-                    "source_key": part_key,
-                    "content_hash": content_hash(part_payload),
-                }
+                ItemPartRow(
+                    item_source_key=source_key,
+                    part_type="disease_domain",
+                    label=None,
+                    domain_key=domain_key,
+                    prompt=title,
+                    sort_order=idx,
+                    source_key=part_key,
+                    content_hash=DOMAIN_PART_HASHER(domain_key, title, idx),
+                )
             )
-            answer_payload = {"answer_text": section.get("content")}
             model_answers.append(
-                {
-                    "item_source_key": source_key,
-                    "part_source_key": part_key,
-                    "answer_text": section.get("content"),
-                    "version": SOURCE_VERSIONS["rawdata-sygdomslaere"],
-                    "source_key": f"{part_key}:model_answer:{SOURCE_VERSIONS['rawdata-sygdomslaere']}",
-                    "source_type": "human",
-                    "source_system": "rawdata-sygdomslaere",
-                    "source_version": SOURCE_VERSIONS["rawdata-sygdomslaere"],
-                    "content_hash": content_hash(answer_payload),
-                }
+                ModelAnswerRow(
+                    item_source_key=source_key,
+                    part_source_key=part_key,
+                    answer_text=section.get("content"),
+                    version=SOURCE_VERSIONS["rawdata-sygdomslaere"],
+                    source_key=f"{part_key}:model_answer:{SOURCE_VERSIONS['rawdata-sygdomslaere']}",
+                    source_type="human",
+                    source_system="rawdata-sygdomslaere",
+                    source_version=SOURCE_VERSIONS["rawdata-sygdomslaere"],
+                    content_hash=ANSWER_HASHER(section.get("content")),
+                )
             )
 
     return items, parts, model_answers
 
 
 def build_annotations(
-    assets: List[Dict[str, Any]],
+    assets: List[ItemAssetRow],
     captions: Optional[Dict[str, Any]],
     audits: Optional[List[Dict[str, Any]]],
-) -> List[Dict[str, Any]]:
-    asset_by_path: Dict[str, List[Dict[str, Any]]] = {}
+) -> List[AssetAnnotationRow]:
+    asset_by_path: Dict[str, List[ItemAssetRow]] = {}
     for asset in assets:
-        asset_by_path.setdefault(asset["asset_path"], []).append(asset)
-    annotations: List[Dict[str, Any]] = []
+        asset_by_path.setdefault(asset.asset_path, []).append(asset)
+    annotations: List[AssetAnnotationRow] = []
 
     if captions:
         for path, caption in captions.items():
             asset_list = asset_by_path.get(path, [])
             if not asset_list:
                 continue
+            caption_hash = CAPTION_HASHER(caption)
             for asset in asset_list:
-                payload = {"text": caption}
-                source_key = f"{asset['source_key']}:caption:legacy"
+                source_key = f"{asset.source_key}:caption:legacy"
                 annotations.append(
-                    {
-                        "asset_source_key": asset["source_key"],
-                        "annotation_type": "caption",
-                        "text": caption,
-                        "match": None,
-                        "confidence": None,
-                        "issues": None,
-                        "source_type": "legacy",
-                        "llm_model": None,
-                        "llm_prompt_version": None,
-                        "llm_output_version": "legacy",
-                        "source_key": source_key,
-                        "source_system": "figure-captions",
-                        "source_version": SOURCE_VERSIONS["figure-captions"],
-                        "content_hash": content_hash(payload),
-                    }
+                    AssetAnnotationRow(
+                        asset_source_key=asset.source_key,
+                        annotation_type="caption",
+                        text=caption,
+                        match=None,
+                        confidence=None,
+                        issues=None,
+                        source_type="legacy",
+                        llm_model=None,
+                        llm_prompt_version=None,
+                        llm_output_version="legacy",
+                        source_key=source_key,
+                        source_system="figure-captions",
+                        source_version=SOURCE_VERSIONS["figure-captions"],
+                        content_hash=caption_hash,
+                    )
                 )
 
     if audits:
@@ -606,64 +696,212 @@ def build_annotations(
             prompt_version = audit.get("prompt_version")
             source_type = "llm" if model and prompt_version else "legacy"
             output_version = prompt_version or "legacy"
-            payload = {
-                "text": audit.get("description"),
-                "match": audit.get("match"),
-                "confidence": audit.get("confidence"),
-                "issues": audit.get("issues"),
-            }
+            audit_hash = AUDIT_HASHER(
+                audit.get("description"), audit.get("match"), audit.get("confidence"), audit.get("issues")
+            )
             for asset in asset_list:
-                source_key = f"{asset['source_key']}:audit:{output_version}"
+                source_key = f"{asset.source_key}:audit:{output_version}"
                 annotations.append(
-                    {
-                        "asset_source_key": asset["source_key"],
-                        "annotation_type": "audit",
-                        "text": audit.get("description"),
-                        "match": bool(audit.get("match")) if audit.get("match") is not None else None,
-                        "confidence": float(audit.get("confidence"))
+                    AssetAnnotationRow(
+                        asset_source_key=asset.source_key,
+                        annotation_type="audit",
+                        text=audit.get("description"),
+                        match=bool(audit.get("match")) if audit.get("match") is not None else None,
+                        confidence=float(audit.get("confidence"))
                         if audit.get("confidence") is not None
                         else None,
-                        "issues": audit.get("issues"),
-                        "source_type": source_type,
-                        "llm_model": model,
-                        "llm_prompt_version": prompt_version,
-                        "llm_output_version": output_version,
-                        "source_key": source_key,
-                        "source_system": "figure-audit",
-                        "source_version": SOURCE_VERSIONS["figure-audit"],
-                        "content_hash": content_hash(payload),
-                    }
+                        issues=audit.get("issues"),
+                        source_type=source_type,
+                        llm_model=model,
+                        llm_prompt_version=prompt_version,
+                        llm_output_version=output_version,
+                        source_key=source_key,
+                        source_system="figure-audit",
+                        source_version=SOURCE_VERSIONS["figure-audit"],
+                        content_hash=audit_hash,
+                    )
                 )
 
     return annotations
 
 
-def insert_ingest_run_sql(run_id: str, source_system: str, source_hash: str) -> str:
+def insert_ingest_run_sql(run_id: str, source_system: str, source_hash: str, status: str = "completed") -> str:
     return (
         "insert into public.ingest_runs "
         "(id, source_system, source_version, source_hash, pipeline_version, status) values ("
         f"{sql_literal(run_id)}, {sql_literal(source_system)}, {sql_literal(SOURCE_VERSIONS[source_system])}, "
-        f"{sql_literal(source_hash)}, {sql_literal(PIPELINE_VERSION)}, 'completed') "
+        f"{sql_literal(source_hash)}, {sql_literal(PIPELINE_VERSION)}, {sql_literal(status)}) "
         "on conflict (id) do nothing;"
     )
 
 
-def build_item_insert_sql(item: Dict[str, Any]) -> str:
-    study_id = f"(select id from public.studies where slug = {sql_literal(item['study_slug'])})"
-    fields = (
-        "study_id, item_type, source_system, source_key, source_version, source_hash, content_hash, "
-        "ingest_run_id, year, session, category, title, stem, priority, weight, is_active"
+def complete_ingest_run_sql(stats: RunStats) -> str:
+    # Written after the data, so a run stays pending until its last chunk is in.
+    # Only the first completion records stats; rebuilding an applied source
+    # leaves the run as it was. Timings stay out so the SQL is deterministic.
+    return (
+        "insert into public.ingest_runs "
+        "(id, source_system, source_version, source_hash, pipeline_version, status, "
+        "row_count, output_bytes, stats) values ("
+        f"{sql_literal(stats.run_id)}, {sql_literal(stats.source_system)}, "
+        f"{sql_literal(SOURCE_VERSIONS[stats.source_system])}, {sql_literal(stats.source_hash)}, "
+        f"{sql_literal(PIPELINE_VERSION)}, 'completed', {stats.row_count}, "
+        f"{stats.output_bytes}, {sql_literal(canonical_json(stats.to_dict()))}::jsonb) "
+        "on conflict (id) do update set status = excluded.status, completed_at = now(), "
+        "row_count = excluded.row_count, "
+        "output_bytes = excluded.output_bytes, stats = excluded.stats "
+        "where ingest_runs.status = 'pending';"
     )
+
+
+@dataclass(frozen=True)
+class TableEmitter:
+    table: str
+    fields: str
+    conflict: str
+    values_sql: Callable[[Any, bool], str]
+    row_ids: bool = True
+
+    def insert_sql(self, values: List[str], deterministic_ids: bool = False) -> str:
+        fields = f"id, {self.fields}" if deterministic_ids and self.row_ids else self.fields
+        rows = ",\n  ".join(values)
+        return f"insert into public.{self.table} ({fields}) values {rows} {self.conflict};"
+
+
+def parent_id_sql(table: str, source_key: Optional[str], deterministic_ids: bool) -> str:
+    if not source_key:
+        return "null"
+    if deterministic_ids:
+        return sql_literal(build_row_id(table, source_key))
+    return f"(select id from public.{table} where source_key = {sql_literal(source_key)})"
+
+
+def row_values_sql(table: str, row: PipelineRow, values: str, deterministic_ids: bool) -> str:
+    if deterministic_ids:
+        return f"({sql_literal(build_row_id(table, row.source_key))}, {values})"
+    return f"({values})"
+
+
+@dataclass
+class PipelineBuild:
+    runs: List[Tuple[str, str, str]]
+    tables: List[Tuple[TableEmitter, List[PipelineRow]]]
+    removed: Dict[str, List[str]] = field(default_factory=dict)
+    build_ms: Dict[str, int] = field(default_factory=dict)
+
+
+def build_item_values_sql(item: StudyItemRow, deterministic_ids: bool = False) -> str:
+    study_id = f"(select id from public.studies where slug = {sql_literal(item.study_slug)})"
     values = (
-        f"{study_id}, {sql_literal(item['item_type'])}, {sql_literal(item['source_system'])}, "
-        f"{sql_literal(item['source_key'])}, {sql_literal(item['source_version'])}, {sql_literal(item.get('source_hash'))}, "
-        f"{sql_literal(item['content_hash'])}, {sql_literal(item.get('ingest_run_id'))}, {sql_literal(item.get('year'))}, "
-        f"{sql_literal(item.get('session'))}, {sql_literal(item.get('category'))}, {sql_literal(item.get('title'))}, "
-        f"{sql_literal(item.get('stem'))}, {sql_literal(item.get('priority'))}, {sql_literal(item.get('weight'))}, "
-        f"{sql_literal(item.get('is_active'))}"
+        f"{study_id}, {sql_literal(item.item_type)}, {sql_literal(item.source_system)}, "
+        f"{sql_literal(item.source_key)}, {sql_literal(item.source_version)}, {sql_literal(item.source_hash)}, "
+        f"{sql_literal(item.content_hash)}, {sql_literal(item.ingest_run_id)}, {sql_literal(item.year)}, "
+        f"{sql_literal(item.session)}, {sql_literal(item.category)}, {sql_literal(item.title)}, "
+        f"{sql_literal(item.stem)}, {sql_literal(item.priority)}, {sql_literal(item.weight)}, "
+        f"{sql_literal(item.is_active)}"
     )
-    return (
-        f"insert into public.study_items ({fields}) values ({values}) "
+    return row_values_sql("study_items", item, values, deterministic_ids)
+
+
+def build_choice_values_sql(choice: ItemChoiceRow, deterministic_ids: bool = False) -> str:
+    item_id = parent_id_sql("study_items", choice.item_source_key, deterministic_ids)
+    values = (
+        f"{item_id}, {sql_literal(choice.label)}, {sql_literal(choice.choice_text)}, "
+        f"{sql_literal(choice.is_correct)}, {sql_literal(choice.sort_order)}, "
+        f"{sql_literal(choice.source_key)}, {sql_literal(choice.content_hash)}"
+    )
+    return row_values_sql("item_choices", choice, values, deterministic_ids)
+
+
+def build_part_values_sql(part: ItemPartRow, deterministic_ids: bool = False) -> str:
+    item_id = parent_id_sql("study_items", part.item_source_key, deterministic_ids)
+    # disease_domains is seeded by schema.sql with random ids, so it is always looked up.
+    domain_id = (
+        f"(select id from public.disease_domains where domain_key = {sql_literal(part.domain_key)})"
+        if part.domain_key
+        else "null"
+    )
+    values = (
+        f"{item_id}, {sql_literal(part.part_type)}, {sql_literal(part.label)}, {domain_id}, "
+        f"{sql_literal(part.prompt)}, {sql_literal(part.sort_order)}, "
+        f"{sql_literal(part.source_key)}, {sql_literal(part.content_hash)}"
+    )
+    return row_values_sql("item_parts", part, values, deterministic_ids)
+
+
+def build_model_answer_values_sql(answer: ModelAnswerRow, deterministic_ids: bool = False) -> str:
+    item_id = parent_id_sql("study_items", answer.item_source_key, deterministic_ids)
+    part_id = parent_id_sql("item_parts", answer.part_source_key, deterministic_ids)
+    values = (
+        f"{item_id}, {part_id}, {sql_literal(answer.answer_text)}, {sql_literal(answer.version)}, "
+        f"{sql_literal(answer.source_key)}, {sql_literal(answer.source_type)}, "
+        f"{sql_literal(answer.source_system)}, {sql_literal(answer.source_version)}, "
+        f"{sql_literal(answer.content_hash)}"
+    )
+    return row_values_sql("item_model_answers", answer, values, deterministic_ids)
+
+
+def build_model_answer_blob_values_sql(answer: ModelAnswerRow, deterministic_ids: bool = False) -> str:
+    item_id = parent_id_sql("study_items", answer.item_source_key, deterministic_ids)
+    part_id = parent_id_sql("item_parts", answer.part_source_key, deterministic_ids)
+    values = (
+        f"{item_id}, {part_id}, {sql_literal(answer.answer_blob)}, {sql_literal(answer.version)}, "
+        f"{sql_literal(answer.source_key)}, {sql_literal(answer.source_type)}, "
+        f"{sql_literal(answer.source_system)}, {sql_literal(answer.source_version)}, "
+        f"{sql_literal(answer.content_hash)}"
+    )
+    return row_values_sql("item_model_answers", answer, values, deterministic_ids)
+
+
+def build_source_values_sql(source: ItemSourceRow, deterministic_ids: bool = False) -> str:
+    item_id = parent_id_sql("study_items", source.item_source_key, deterministic_ids)
+    part_id = parent_id_sql("item_parts", source.part_source_key, deterministic_ids)
+    values = f"{item_id}, {part_id}, {sql_literal(source.source_text)}, {sql_literal(source.source_key)}"
+    return row_values_sql("item_sources", source, values, deterministic_ids)
+
+
+def build_source_blob_values_sql(source: ItemSourceRow, deterministic_ids: bool = False) -> str:
+    item_id = parent_id_sql("study_items", source.item_source_key, deterministic_ids)
+    part_id = parent_id_sql("item_parts", source.part_source_key, deterministic_ids)
+    values = f"{item_id}, {part_id}, {sql_literal(source.source_blob)}, {sql_literal(source.source_key)}"
+    return row_values_sql("item_sources", source, values, deterministic_ids)
+
+
+def build_text_blob_values_sql(blob: TextBlobRow, deterministic_ids: bool = False) -> str:
+    return f"({sql_literal(blob.source_key)}, {sql_literal(blob.body)})"
+
+
+def build_asset_values_sql(asset: ItemAssetRow, deterministic_ids: bool = False) -> str:
+    item_id = parent_id_sql("study_items", asset.item_source_key, deterministic_ids)
+    part_id = parent_id_sql("item_parts", asset.part_source_key, deterministic_ids)
+    values = (
+        f"{item_id}, {part_id}, {sql_literal(asset.asset_type)}, {sql_literal(asset.asset_path)}, "
+        f"{sql_literal(asset.source_key)}, {sql_literal(asset.content_hash)}"
+    )
+    return row_values_sql("item_assets", asset, values, deterministic_ids)
+
+
+def build_annotation_values_sql(annotation: AssetAnnotationRow, deterministic_ids: bool = False) -> str:
+    asset_id = parent_id_sql("item_assets", annotation.asset_source_key, deterministic_ids)
+    values = (
+        f"{asset_id}, {sql_literal(annotation.annotation_type)}, {sql_literal(annotation.text)}, "
+        f"{sql_literal(annotation.match)}, {sql_literal(annotation.confidence)}, "
+        f"{sql_literal(annotation.issues)}, {sql_literal(annotation.source_type)}, "
+        f"{sql_literal(annotation.llm_model)}, {sql_literal(annotation.llm_prompt_version)}, "
+        f"{sql_literal(annotation.llm_output_version)}, {sql_literal(annotation.source_key)}, "
+        f"{sql_literal(annotation.source_system)}, {sql_literal(annotation.source_version)}, "
+        f"{sql_literal(annotation.content_hash)}"
+    )
+    return row_values_sql("asset_annotations", annotation, values, deterministic_ids)
+
+
+STUDY_ITEMS = TableEmitter(
+    table="study_items",
+    fields=(
+        "study_id, item_type, source_system, source_key, source_version, source_hash, content_hash, "
+        "ingest_run_id, year, session, category, title, stem, priority, weight, is_active"
+    ),
+    conflict=(
         "on conflict (source_key) do update set "
         "item_type = excluded.item_type, "
         "source_system = excluded.source_system, "
@@ -679,46 +917,32 @@ def build_item_insert_sql(item: Dict[str, Any]) -> str:
         "priority = excluded.priority, "
         "weight = excluded.weight, "
         "is_active = excluded.is_active "
-        "where public.study_items.content_hash is distinct from excluded.content_hash;"
-    )
-
-
-def build_choice_insert_sql(choice: Dict[str, Any]) -> str:
-    item_id = (
-        f"(select id from public.study_items where source_key = {sql_literal(choice['item_source_key'])})"
-    )
-    fields = "item_id, label, choice_text, is_correct, sort_order, source_key, content_hash"
-    values = (
-        f"{item_id}, {sql_literal(choice['label'])}, {sql_literal(choice['choice_text'])}, "
-        f"{sql_literal(choice['is_correct'])}, {sql_literal(choice.get('sort_order'))}, "
-        f"{sql_literal(choice['source_key'])}, {sql_literal(choice['content_hash'])}"
-    )
-    return (
-        f"insert into public.item_choices ({fields}) values ({values}) "
+        # Items removed by a delta build are deactivated with their hash intact;
+        # re-adding one unchanged must still turn it back on.
+        "where public.study_items.content_hash is distinct from excluded.content_hash "
+        "or not public.study_items.is_active"
+    ),
+    values_sql=build_item_values_sql,
+)
+
+ITEM_CHOICES = TableEmitter(
+    table="item_choices",
+    fields="item_id, label, choice_text, is_correct, sort_order, source_key, content_hash",
+    conflict=(
         "on conflict (source_key) do update set "
         "choice_text = excluded.choice_text, "
         "is_correct = excluded.is_correct, "
         "sort_order = excluded.sort_order, "
         "content_hash = excluded.content_hash "
-        "where public.item_choices.content_hash is distinct from excluded.content_hash;"
-    )
-
-
-def build_part_insert_sql(part: Dict[str, Any]) -> str:
-    item_id = f"(select id from public.study_items where source_key = {sql_literal(part['item_source_key'])})"
-    domain_id = (
-        f"(select id from public.disease_domains where domain_key = {sql_literal(part.get('domain_key'))})"
-        if part.get("domain_key")
-        else "null"
-    )
-    fields = "item_id, part_type, label, domain_id, prompt, sort_order, source_key, content_hash"
-    values = (
-        f"{item_id}, {sql_literal(part['part_type'])}, {sql_literal(part.get('label'))}, {domain_id}, "
-        f"{sql_literal(part.get('prompt'))}, {sql_literal(part.get('sort_order'))}, "
-        f"{sql_literal(part['source_key'])}, {sql_literal(part['content_hash'])}"
-    )
-    return (
-        f"insert into public.item_parts ({fields}) values ({values}) "
+        "where public.item_choices.content_hash is distinct from excluded.content_hash"
+    ),
+    values_sql=build_choice_values_sql,
+)
+
+ITEM_PARTS = TableEmitter(
+    table="item_parts",
+    fields="item_id, part_type, label, domain_id, prompt, sort_order, source_key, content_hash",
+    conflict=(
         "on conflict (source_key) do update set "
         "part_type = excluded.part_type, "
         "label = excluded.label, "
@@ -726,31 +950,18 @@ def build_part_insert_sql(part: Dict[str, Any]) -> str:
         "prompt = excluded.prompt, "
         "sort_order = excluded.sort_order, "
         "content_hash = excluded.content_hash "
-        "where public.item_parts.content_hash is distinct from excluded.content_hash;"
-    )
-
-
-def build_model_answer_insert_sql(answer: Dict[str, Any]) -> str:
-    item_id = (
-        f"(select id from public.study_items where source_key = {sql_literal(answer['item_source_key'])})"
-    )
-    part_id = (
-        f"(select id from public.item_parts where source_key = {sql_literal(answer.get('part_source_key'))})"
-        if answer.get("part_source_key")
-        else "null"
-    )
-    fields = (
+        "where public.item_parts.content_hash is distinct from excluded.content_hash"
+    ),
+    values_sql=build_part_values_sql,
+)
+
+ITEM_MODEL_ANSWERS = TableEmitter(
+    table="item_model_answers",
+    fields=(
         "item_id, part_id, answer_text, version, source_key, source_type, source_system, "
         "source_version, content_hash"
-    )
-    values = (
-        f"{item_id}, {part_id}, {sql_literal(answer['answer_text'])}, {sql_literal(answer['version'])}, "
-        f"{sql_literal(answer['source_key'])}, {sql_literal(answer.get('source_type'))}, "
-        f"{sql_literal(answer.get('source_system'))}, {sql_literal(answer.get('source_version'))}, "
-        f"{sql_literal(answer['content_hash'])}"
-    )
-    return (
-        f"insert into public.item_model_answers ({fields}) values ({values}) "
+    ),
+    conflict=(
         "on conflict (source_key) do update set "
         "answer_text = excluded.answer_text, "
         "version = excluded.version, "
@@ -758,77 +969,43 @@ def build_model_answer_insert_sql(answer: Dict[str, Any]) -> str:
         "source_system = excluded.source_system, "
         "source_version = excluded.source_version, "
         "content_hash = excluded.content_hash "
-        "where public.item_model_answers.content_hash is distinct from excluded.content_hash;"
-    )
-
-
-def build_source_insert_sql(source: Dict[str, Any]) -> str:
-    item_id = (
-        f"(select id from public.study_items where source_key = {sql_literal(source.get('item_source_key'))})"
-        if source.get("item_source_key")
-        else "null"
-    )
-    part_id = (
-        f"(select id from public.item_parts where source_key = {sql_literal(source.get('part_source_key'))})"
-        if source.get("part_source_key")
-        else "null"
-    )
-    fields = "item_id, part_id, source_text, source_key"
-    values = (
-        f"{item_id}, {part_id}, {sql_literal(source['source_text'])}, {sql_literal(source['source_key'])}"
-    )
-    return (
-        f"insert into public.item_sources ({fields}) values ({values}) "
+        "where public.item_model_answers.content_hash is distinct from excluded.content_hash"
+    ),
+    values_sql=build_model_answer_values_sql,
+)
+
+ITEM_SOURCES = TableEmitter(
+    table="item_sources",
+    fields="item_id, part_id, source_text, source_key",
+    conflict=(
         "on conflict (source_key) do update set "
         "source_text = excluded.source_text "
-        "where public.item_sources.source_text is distinct from excluded.source_text;"
-    )
-
-
-def build_asset_insert_sql(asset: Dict[str, Any]) -> str:
-    item_id = (
-        f"(select id from public.study_items where source_key = {sql_literal(asset['item_source_key'])})"
-    )
-    part_id = (
-        f"(select id from public.item_parts where source_key = {sql_literal(asset.get('part_source_key'))})"
-        if asset.get("part_source_key")
-        else "null"
-    )
-    fields = "item_id, part_id, asset_type, asset_path, source_key, content_hash"
-    values = (
-        f"{item_id}, {part_id}, {sql_literal(asset['asset_type'])}, {sql_literal(asset['asset_path'])}, "
-        f"{sql_literal(asset['source_key'])}, {sql_literal(asset['content_hash'])}"
-    )
-    return (
-        f"insert into public.item_assets ({fields}) values ({values}) "
+        "where public.item_sources.source_text is distinct from excluded.source_text"
+    ),
+    values_sql=build_source_values_sql,
+)
+
+ITEM_ASSETS = TableEmitter(
+    table="item_assets",
+    fields="item_id, part_id, asset_type, asset_path, source_key, content_hash",
+    conflict=(
         "on conflict (source_key) do update set "
         "asset_type = excluded.asset_type, "
         "asset_path = excluded.asset_path, "
         "content_hash = excluded.content_hash "
-        "where public.item_assets.content_hash is distinct from excluded.content_hash;"
-    )
-
-
-def build_annotation_insert_sql(annotation: Dict[str, Any]) -> str:
-    asset_id = (
-        f"(select id from public.item_assets where source_key = {sql_literal(annotation['asset_source_key'])})"
-    )
-    fields = (
+        "where public.item_assets.content_hash is distinct from excluded.content_hash"
+    ),
+    values_sql=build_asset_values_sql,
+)
+
+ASSET_ANNOTATIONS = TableEmitter(
+    table="asset_annotations",
+    fields=(
         "asset_id, annotation_type, text, match, confidence, issues, source_type, "
         "llm_model, llm_prompt_version, llm_output_version, source_key, source_system, "
         "source_version, content_hash"
-    )
-    values = (
-        f"{asset_id}, {sql_literal(annotation['annotation_type'])}, {sql_literal(annotation.get('text'))}, "
-        f"{sql_literal(annotation.get('match'))}, {sql_literal(annotation.get('confidence'))}, "
-        f"{sql_literal(annotation.get('issues'))}, {sql_literal(annotation.get('source_type'))}, "
-        f"{sql_literal(annotation.get('llm_model'))}, {sql_literal(annotation.get('llm_prompt_version'))}, "
-        f"{sql_literal(annotation.get('llm_output_version'))}, {sql_literal(annotation['source_key'])}, "
-        f"{sql_literal(annotation.get('source_system'))}, {sql_literal(annotation.get('source_version'))}, "
-        f"{sql_literal(annotation['content_hash'])}"
-    )
-    return (
-        f"insert into public.asset_annotations ({fields}) values ({values}) "
+    ),
+    conflict=(
         "on conflict (source_key) do update set "
         "annotation_type = excluded.annotation_type, "
         "text = excluded.text, "
@@ -842,58 +1019,789 @@ def build_annotation_insert_sql(annotation: Dict[str, Any]) -> str:
         "source_system = excluded.source_system, "
         "source_version = excluded.source_version, "
         "content_hash = excluded.content_hash "
-        "where public.asset_annotations.content_hash is distinct from excluded.content_hash;"
+        "where public.asset_annotations.content_hash is distinct from excluded.content_hash"
+    ),
+    values_sql=build_annotation_values_sql,
+)
+
+PIPELINE_TABLES = [
+    STUDY_ITEMS,
+    ITEM_CHOICES,
+    ITEM_PARTS,
+    ITEM_MODEL_ANSWERS,
+    ITEM_SOURCES,
+    ITEM_ASSETS,
+    ASSET_ANNOTATIONS,
+]
+
+EMITTERS_BY_TABLE = {emitter.table: emitter for emitter in PIPELINE_TABLES}
+
+# --text-blobs: answer and source texts that occur more than once are stored
+# once in text_blobs and referenced by hash. Unique and short texts stay inline
+# (with the plain emitters) since a hash reference would not be any smaller.
+TEXT_BLOB_MIN_BYTES = 128
+
+TEXT_BLOBS = TableEmitter(
+    table="text_blobs",
+    fields="hash, body",
+    conflict="on conflict (hash) do nothing",
+    values_sql=build_text_blob_values_sql,
+    row_ids=False,
+)
+
+ITEM_MODEL_ANSWERS_BLOBS = TableEmitter(
+    table="item_model_answers",
+    fields=(
+        "item_id, part_id, answer_blob, version, source_key, source_type, source_system, "
+        "source_version, content_hash"
+    ),
+    conflict=(
+        "on conflict (source_key) do update set "
+        "answer_text = null, "
+        "answer_blob = excluded.answer_blob, "
+        "version = excluded.version, "
+        "source_type = excluded.source_type, "
+        "source_system = excluded.source_system, "
+        "source_version = excluded.source_version, "
+        "content_hash = excluded.content_hash "
+        "where public.item_model_answers.content_hash is distinct from excluded.content_hash"
+    ),
+    values_sql=build_model_answer_blob_values_sql,
+)
+
+ITEM_SOURCES_BLOBS = TableEmitter(
+    table="item_sources",
+    fields="item_id, part_id, source_blob, source_key",
+    conflict=(
+        "on conflict (source_key) do update set "
+        "source_text = null, "
+        "source_blob = excluded.source_blob "
+        "where public.item_sources.source_blob is distinct from excluded.source_blob"
+    ),
+    values_sql=build_source_blob_values_sql,
+)
+
+
+def externalize_texts(build: PipelineBuild) -> PipelineBuild:
+    answers: List[ModelAnswerRow] = []
+    sources: List[ItemSourceRow] = []
+    for emitter, rows in build.tables:
+        if emitter.table == "item_model_answers":
+            answers = rows
+        elif emitter.table == "item_sources":
+            sources = rows
+    counts: Dict[str, int] = {}
+    for text in [*(answer.answer_text for answer in answers), *(source.source_text for source in sources)]:
+        counts[text] = counts.get(text, 0) + 1
+    blobs: Dict[str, TextBlobRow] = {}
+
+    def blob_key(text: str) -> Optional[str]:
+        if counts[text] < 2 or len(text.encode("utf-8")) < TEXT_BLOB_MIN_BYTES:
+            return None
+        key = hash_text(text)
+        if key not in blobs:
+            blobs[key] = TextBlobRow(key, text)
+        return key
+
+    inline_answers: List[ModelAnswerRow] = []
+    blob_answers: List[ModelAnswerRow] = []
+    for answer in answers:
+        key = blob_key(answer.answer_text)
+        if key is None:
+            inline_answers.append(answer)
+        else:
+            blob_answers.append(replace(answer, answer_text=None, answer_blob=key))
+    inline_sources: List[ItemSourceRow] = []
+    blob_sources: List[ItemSourceRow] = []
+    for source in sources:
+        key = blob_key(source.source_text)
+        if key is None:
+            inline_sources.append(source)
+        else:
+            blob_sources.append(replace(source, source_text=None, source_blob=key))
+
+    tables: List[Tuple[TableEmitter, List[PipelineRow]]] = [(TEXT_BLOBS, list(blobs.values()))]
+    for emitter, rows in build.tables:
+        if emitter.table == "item_model_answers":
+            tables += [(emitter, inline_answers), (ITEM_MODEL_ANSWERS_BLOBS, blob_answers)]
+        elif emitter.table == "item_sources":
+            tables += [(emitter, inline_sources), (ITEM_SOURCES_BLOBS, blob_sources)]
+        else:
+            tables.append((emitter, rows))
+    return PipelineBuild(runs=build.runs, tables=tables, removed=build.removed, build_ms=build.build_ms)
+
+
+def build_item_insert_sql(item: StudyItemRow) -> str:
+    return STUDY_ITEMS.insert_sql([build_item_values_sql(item)])
+
+
+def build_choice_insert_sql(choice: ItemChoiceRow) -> str:
+    return ITEM_CHOICES.insert_sql([build_choice_values_sql(choice)])
+
+
+def build_part_insert_sql(part: ItemPartRow) -> str:
+    return ITEM_PARTS.insert_sql([build_part_values_sql(part)])
+
+
+def build_model_answer_insert_sql(answer: ModelAnswerRow) -> str:
+    return ITEM_MODEL_ANSWERS.insert_sql([build_model_answer_values_sql(answer)])
+
+
+def build_source_insert_sql(source: ItemSourceRow) -> str:
+    return ITEM_SOURCES.insert_sql([build_source_values_sql(source)])
+
+
+def build_asset_insert_sql(asset: ItemAssetRow) -> str:
+    return ITEM_ASSETS.insert_sql([build_asset_values_sql(asset)])
+
+
+def build_annotation_insert_sql(annotation: AssetAnnotationRow) -> str:
+    return ASSET_ANNOTATIONS.insert_sql([build_annotation_values_sql(annotation)])
+
+
+def plan_batches(rows: List[PipelineRow], batch_size: int) -> List[List[PipelineRow]]:
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    batches: List[List[PipelineRow]] = []
+    batch: List[PipelineRow] = []
+    batch_keys: set = set()
+    for row in rows:
+        source_key = row.source_key
+        # Postgres rejects a multi-row upsert that touches the same key twice, so a
+        # repeated source_key starts a new statement (keeps per-row last-write-wins).
+        if len(batch) >= batch_size or source_key in batch_keys:
+            batches.append(batch)
+            batch = []
+            batch_keys = set()
+        batch.append(row)
+        batch_keys.add(source_key)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def render_batches(
+    emitter: TableEmitter, batches: List[List[PipelineRow]], deterministic_ids: bool = False
+) -> List[str]:
+    return [
+        emitter.insert_sql([emitter.values_sql(row, deterministic_ids) for row in batch], deterministic_ids)
+        for batch in batches
+    ]
+
+
+def iter_table_statements(
+    emitter: TableEmitter,
+    batches: List[List[PipelineRow]],
+    deterministic_ids: bool = False,
+    executor: Optional[Executor] = None,
+) -> Iterator[str]:
+    if executor is None or len(batches) < 2:
+        stage_name = f"render {emitter.table}"
+        for batch in batches:
+            with pipeline_metrics.stage(stage_name, rows=len(batch)):
+                statements = render_batches(emitter, [batch], deterministic_ids)
+            yield from statements
+        return
+    step = max(1, -(-len(batches) // RENDER_TASKS_PER_TABLE))
+    pending: Deque[Future] = deque()
+    for start in range(0, len(batches), step):
+        pending.append(
+            executor.submit(render_batches, emitter, batches[start : start + step], deterministic_ids)
+        )
+        if len(pending) >= RENDER_WINDOW:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def build_table_statements(
+    emitter: TableEmitter,
+    rows: List[PipelineRow],
+    batch_size: int = 1,
+    deterministic_ids: bool = False,
+    executor: Optional[Executor] = None,
+) -> List[str]:
+    batches = plan_batches(rows, batch_size)
+    return list(iter_table_statements(emitter, batches, deterministic_ids, executor))
+
+
+@dataclass(frozen=True)
+class StagingTable:
+    emitter: TableEmitter
+    columns: Tuple[Tuple[str, str], ...]
+    select: str
+    joins: str
+
+
+STAGING_TABLES = [
+    StagingTable(
+        emitter=STUDY_ITEMS,
+        columns=(
+            ("study_slug", "text"),
+            ("item_type", "public.study_item_type"),
+            ("source_system", "text"),
+            ("source_key", "text"),
+            ("source_version", "text"),
+            ("source_hash", "text"),
+            ("content_hash", "text"),
+            ("ingest_run_id", "uuid"),
+            ("year", "integer"),
+            ("session", "text"),
+            ("category", "text"),
+            ("title", "text"),
+            ("stem", "text"),
+            ("priority", "text"),
+            ("weight", "text"),
+            ("is_active", "boolean"),
+        ),
+        select=(
+            "studies.id, s.item_type, s.source_system, s.source_key, s.source_version, s.source_hash, "
+            "s.content_hash, s.ingest_run_id, s.year, s.session, s.category, s.title, s.stem, "
+            "s.priority, s.weight, s.is_active"
+        ),
+        joins="left join public.studies studies on studies.slug = s.study_slug",
+    ),
+    StagingTable(
+        emitter=ITEM_CHOICES,
+        columns=(
+            ("item_source_key", "text"),
+            ("label", "text"),
+            ("choice_text", "text"),
+            ("is_correct", "boolean"),
+            ("sort_order", "integer"),
+            ("source_key", "text"),
+            ("content_hash", "text"),
+        ),
+        select="items.id, s.label, s.choice_text, s.is_correct, s.sort_order, s.source_key, s.content_hash",
+        joins="left join public.study_items items on items.source_key = s.item_source_key",
+    ),
+    StagingTable(
+        emitter=ITEM_PARTS,
+        columns=(
+            ("item_source_key", "text"),
+            ("part_type", "public.item_part_type"),
+            ("label", "text"),
+            ("domain_key", "text"),
+            ("prompt", "text"),
+            ("sort_order", "integer"),
+            ("source_key", "text"),
+            ("content_hash", "text"),
+        ),
+        select=(
+            "items.id, s.part_type, s.label, domains.id, s.prompt, s.sort_order, s.source_key, "
+            "s.content_hash"
+        ),
+        joins=(
+            "left join public.study_items items on items.source_key = s.item_source_key "
+            "left join public.disease_domains domains on domains.domain_key = s.domain_key"
+        ),
+    ),
+    StagingTable(
+        emitter=ITEM_MODEL_ANSWERS,
+        columns=(
+            ("item_source_key", "text"),
+            ("part_source_key", "text"),
+            ("answer_text", "text"),
+            ("version", "text"),
+            ("source_key", "text"),
+            ("source_type", "public.source_type"),
+            ("source_system", "text"),
+            ("source_version", "text"),
+            ("content_hash", "text"),
+        ),
+        select=(
+            "items.id, parts.id, s.answer_text, s.version, s.source_key, s.source_type, "
+            "s.source_system, s.source_version, s.content_hash"
+        ),
+        joins=(
+            "left join public.study_items items on items.source_key = s.item_source_key "
+            "left join public.item_parts parts on parts.source_key = s.part_source_key"
+        ),
+    ),
+    StagingTable(
+        emitter=ITEM_SOURCES,
+        columns=(
+            ("item_source_key", "text"),
+            ("part_source_key", "text"),
+            ("source_text", "text"),
+            ("source_key", "text"),
+        ),
+        select="items.id, parts.id, s.source_text, s.source_key",
+        joins=(
+            "left join public.study_items items on items.source_key = s.item_source_key "
+            "left join public.item_parts parts on parts.source_key = s.part_source_key"
+        ),
+    ),
+    StagingTable(
+        emitter=ITEM_ASSETS,
+        columns=(
+            ("item_source_key", "text"),
+            ("part_source_key", "text"),
+            ("asset_type", "public.asset_type"),
+            ("asset_path", "text"),
+            ("source_key", "text"),
+            ("content_hash", "text"),
+        ),
+        select="items.id, parts.id, s.asset_type, s.asset_path, s.source_key, s.content_hash",
+        joins=(
+            "left join public.study_items items on items.source_key = s.item_source_key "
+            "left join public.item_parts parts on parts.source_key = s.part_source_key"
+        ),
+    ),
+    StagingTable(
+        emitter=ASSET_ANNOTATIONS,
+        columns=(
+            ("asset_source_key", "text"),
+            ("annotation_type", "text"),
+            ("text", "text"),
+            ("match", "boolean"),
+            ("confidence", "numeric"),
+            ("issues", "text"),
+            ("source_type", "public.source_type"),
+            ("llm_model", "text"),
+            ("llm_prompt_version", "text"),
+            ("llm_output_version", "text"),
+            ("source_key", "text"),
+            ("source_system", "text"),
+            ("source_version", "text"),
+            ("content_hash", "text"),
+        ),
+        select=(
+            "assets.id, s.annotation_type, s.text, s.match, s.confidence, s.issues, s.source_type, "
+            "s.llm_model, s.llm_prompt_version, s.llm_output_version, s.source_key, s.source_system, "
+            "s.source_version, s.content_hash"
+        ),
+        joins="left join public.item_assets assets on assets.source_key = s.asset_source_key",
+    ),
+]
+
+
+def copy_literal(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
     )
 
 
-def replace_schema_section(schema_path: Path, block: str) -> None:
-    if not schema_path.exists():
-        raise FileNotFoundError(f"Schema file not found: {schema_path}")
-    content = schema_path.read_text(encoding="utf-8")
-    if MARKER_START in content and MARKER_END in content:
-        before, remainder = content.split(MARKER_START, 1)
-        _, after = remainder.split(MARKER_END, 1)
-        updated = f"{before.rstrip()}\n\n{block}\n\n{after.lstrip()}"
-    else:
-        separator = "" if content.endswith("\n") else "\n"
-        updated = f"{content}{separator}\n{block}\n"
-    schema_path.write_text(updated, encoding="utf-8")
+def latest_by_source_key(rows: List[PipelineRow]) -> List[PipelineRow]:
+    # A set-based merge cannot update the same key twice; keep the row the
+    # per-row upserts would have left behind.
+    latest: Dict[str, PipelineRow] = {}
+    for row in rows:
+        latest.pop(row.source_key, None)
+        latest[row.source_key] = row
+    return list(latest.values())
 
 
-def write_pipeline_sql(path: Path, statements: List[str]) -> None:
-    path.write_text("\n".join(statements) + "\n", encoding="utf-8")
+def write_copy_file(
+    path: Path,
+    staging: StagingTable,
+    rows: List[PipelineRow],
+    report: Optional[OutputReport] = None,
+    deterministic_ids: bool = False,
+) -> None:
+    columns = attrgetter(*(name for name, _ in staging.columns))
+    table = staging.emitter.table
+    with AtomicOutput(path, report, newline="\n") as handle:
+        for row in rows:
+            values = columns(row)
+            if deterministic_ids:
+                values = (build_row_id(table, row.source_key), *values)
+            handle.write("\t".join(copy_literal(value) for value in values))
+            handle.write("\n")
+
+
+def display_path(path: Path) -> str:
+    resolved = path.resolve()
+    try:
+        return str(resolved.relative_to(ROOT_PATH))
+    except ValueError:
+        return str(resolved)
+
+
+def build_merge_sql(staging: StagingTable, data_path: Path, deterministic_ids: bool = False) -> List[str]:
+    table = staging.emitter.table
+    # With deterministic ids the TSV leads with the uuid5 id the SQL path would use.
+    staged = (("id", "uuid"), *staging.columns) if deterministic_ids else staging.columns
+    fields = f"id, {staging.emitter.fields}" if deterministic_ids else staging.emitter.fields
+    select = f"s.id, {staging.select}" if deterministic_ids else staging.select
+    columns = ", ".join(f"{name} {sql_type}" for name, sql_type in staged)
+    names = ", ".join(name for name, _ in staged)
+    return [
+        f"create temp table staging_{table} ({columns}) on commit drop;",
+        f"\\copy staging_{table} ({names}) from {sql_literal(display_path(data_path))}",
+        (
+            f"insert into public.{table} ({fields}) "
+            f"select {select} from staging_{table} s {staging.joins} "
+            f"{staging.emitter.conflict};"
+        ),
+    ]
+
+
+def write_copy_pipeline(
+    output_dir: Path, build: PipelineBuild, report: Optional[OutputReport] = None, deterministic_ids: bool = False
+) -> None:
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rows_by_table = {emitter.table: rows for emitter, rows in build.tables}
+    statements = [
+        "-- Generated by scripts/build_studio_pipeline.py",
+        f"-- pipeline_version: {PIPELINE_VERSION}",
+        "-- Apply with psql from the repository root, e.g.",
+        f"--   psql \"$DATABASE_URL\" -v ON_ERROR_STOP=1 -f {display_path(output_dir / 'merge.sql')}",
+        "begin;",
+    ]
+    for run_id, source_system, source_hash in build.runs:
+        statements.append(insert_ingest_run_sql(run_id, source_system, source_hash))
+    for staging in STAGING_TABLES:
+        table = staging.emitter.table
+        data_path = output_dir / f"{table}.tsv"
+        rows = latest_by_source_key(rows_by_table.get(table, []))
+        write_copy_file(data_path, staging, rows, report, deterministic_ids)
+        statements.extend(build_merge_sql(staging, data_path, deterministic_ids))
+    statements.extend(build_removal_statements(build.removed))
+    statements.append("commit;")
+    write_pipeline_sql(output_dir / "merge.sql", statements, report)
+
+
+PIPELINE_HEADER = [
+    "-- Generated by scripts/build_studio_pipeline.py",
+    f"-- pipeline_version: {PIPELINE_VERSION}",
+]
+
+
+def write_pipeline_sql(path: Path, statements: List[str], report: Optional[OutputReport] = None) -> bool:
+    return write_text_if_changed(path, "\n".join(statements) + "\n", report)
+
+
+class PipelineSqlWriter:
+    def __init__(self, path: Path, report: Optional[OutputReport] = None) -> None:
+        self.path = path
+        self.handle = AtomicOutput(path, report)
+        self.handle.write("\n".join([*PIPELINE_HEADER, "begin;"]) + "\n")
+
+    def write(self, table: str, statement: str) -> None:
+        self.handle.write(statement)
+        self.handle.write("\n")
+
+    def close(self) -> None:
+        self.handle.write("commit;\n")
+        self.handle.close()
+
+    def discard(self) -> None:
+        self.handle.discard()
+
+    def paths(self) -> List[Path]:
+        return [self.path]
+
+
+def read_schema_sections(schema_path: Path) -> Tuple[str, Optional[str]]:
+    # Returns the text before and after the marker block without loading the
+    # (possibly large) embedded data between the markers.
+    before: List[str] = []
+    after: List[str] = []
+    state = "before"
+    with schema_path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if state == "before" and MARKER_START in line:
+                head, tail = line.split(MARKER_START, 1)
+                before.append(head)
+                state = "inside"
+                line = tail
+            if state == "inside":
+                if MARKER_END not in line:
+                    continue
+                line = line.split(MARKER_END, 1)[1]
+                state = "after"
+            (before if state == "before" else after).append(line)
+    if state != "after":
+        return schema_path.read_text(encoding="utf-8"), None
+    return "".join(before), "".join(after)
+
+
+class SchemaEmbedWriter:
+    def __init__(self, schema_path: Path, report: Optional[OutputReport] = None) -> None:
+        if not schema_path.exists():
+            raise FileNotFoundError(f"Schema file not found: {schema_path}")
+        self.schema_path = schema_path
+        self.report = report
+        self.tmp_path = schema_path.with_name(f".{schema_path.name}.tmp")
+        before, self.after = read_schema_sections(schema_path)
+        self.handle = self.tmp_path.open("w", encoding="utf-8")
+        if self.after is None:
+            separator = "" if before.endswith("\n") else "\n"
+            self.handle.write(f"{before}{separator}\n")
+        else:
+            self.handle.write(f"{before.rstrip()}\n\n")
+        self.handle.write("\n".join([MARKER_START, *self.block_header()]) + "\n")
+
+    def block_header(self) -> List[str]:
+        return [*PIPELINE_HEADER, "begin;"]
+
+    def block_footer(self) -> List[str]:
+        return ["commit;"]
+
+    def write(self, table: str, statement: str) -> None:
+        self.handle.write(statement)
+        self.handle.write("\n")
+
+    def close(self) -> None:
+        self.handle.write("\n".join([*self.block_footer(), MARKER_END]))
+        self.handle.write("\n" if self.after is None else f"\n\n{self.after.lstrip()}")
+        self.handle.close()
+        replace_if_changed(self.tmp_path, self.schema_path, self.report)
+
+    def discard(self) -> None:
+        self.handle.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def paths(self) -> List[Path]:
+        return [self.schema_path]
+
+
+# Keeps schema.sql small: the marker block only includes the pipeline SQL file
+# (psql \ir, relative to schema.sql) instead of carrying every statement.
+class SchemaReferenceWriter(SchemaEmbedWriter):
+    def __init__(self, schema_path: Path, data_path: Path, report: Optional[OutputReport] = None) -> None:
+        self.include_path = Path(os.path.relpath(data_path.resolve(), schema_path.resolve().parent)).as_posix()
+        super().__init__(schema_path, report)
+
+    def block_header(self) -> List[str]:
+        return [*PIPELINE_HEADER, f"\\ir {self.include_path}"]
+
+    def block_footer(self) -> List[str]:
+        return []
+
+    def write(self, table: str, statement: str) -> None:
+        return None
 
 
-def chunked(items: List[str], chunk_size: int) -> Iterable[List[str]]:
-    for start in range(0, len(items), chunk_size):
-        yield items[start : start + chunk_size]
+class ChunkWriter:
+    def __init__(
+        self, output_dir: Path, chunk_size: int, total_statements: int, report: Optional[OutputReport] = None
+    ) -> None:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.output_dir = output_dir
+        self.report = report
+        self.chunk_size = chunk_size
+        self.total = (total_statements + chunk_size - 1) // chunk_size
+        self.index = 0
+        self.count = 0
+        self.handle: Optional[Any] = None
+
+    def write(self, table: str, statement: str) -> None:
+        if self.handle is None or self.count >= self.chunk_size:
+            self.close_chunk()
+            self.index += 1
+            self.count = 0
+            self.handle = AtomicOutput(self.output_dir / f"chunk_{self.index:03d}.sql", self.report)
+            header = [*PIPELINE_HEADER, f"-- chunk: {self.index}/{self.total}", "begin;"]
+            self.handle.write("\n".join(header) + "\n")
+        self.handle.write(statement)
+        self.handle.write("\n")
+        self.count += 1
+
+    def close_chunk(self) -> None:
+        if self.handle is not None:
+            self.handle.write("commit;\n")
+            self.handle.close()
+            self.handle = None
+
+    def close(self) -> None:
+        self.close_chunk()
+        remove_stale(list(self.output_dir.glob("chunk_*.sql")), self.paths(), self.report)
+
+    def discard(self) -> None:
+        if self.handle is not None:
+            self.handle.discard()
+            self.handle = None
+
+    def paths(self) -> List[Path]:
+        return [self.output_dir / f"chunk_{index:03d}.sql" for index in range(1, self.index + 1)]
 
 
 def write_chunked_pipeline(
-    output_dir: Path, data_statements: List[str], chunk_size: int
+    output_dir: Path, data_statements: List[str], chunk_size: int, report: Optional[OutputReport] = None
 ) -> None:
-    output_dir.mkdir(parents=True, exist_ok=True)
-    for existing in output_dir.glob("chunk_*.sql"):
-        existing.unlink()
-
-    total = (len(data_statements) + chunk_size - 1) // chunk_size
-    for index, chunk in enumerate(chunked(data_statements, chunk_size), start=1):
-        statements = [
-            "-- Generated by scripts/build_studio_pipeline.py",
-            f"-- pipeline_version: {PIPELINE_VERSION}",
-            f"-- chunk: {index}/{total}",
-            "begin;",
-            *chunk,
-            "commit;",
-        ]
-        filename = output_dir / f"chunk_{index:03d}.sql"
-        write_pipeline_sql(filename, statements)
+    writer = ChunkWriter(output_dir, chunk_size, len(data_statements), report)
+    for statement in data_statements:
+        writer.write("", statement)
+    writer.close()
+
+
+# Tables in the same tier only reference tables from earlier tiers, so the
+# chunks of one tier can be applied in parallel once the previous tier is done.
+CHUNK_TIERS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("ingest_runs", ("ingest_runs",)),
+    ("items", ("study_items", "text_blobs")),
+    ("parts_choices", ("item_parts", "item_choices")),
+    ("answers_sources_assets", ("item_model_answers", "item_sources", "item_assets")),
+    ("annotations", ("asset_annotations",)),
+    ("removals", ("removals",)),
+    ("run_stats", ("run_stats",)),
+]
+TIER_BY_TABLE = {table: index for index, (_, tables) in enumerate(CHUNK_TIERS) for table in tables}
+CHUNK_FOOTER = "commit;\n"
+
+
+class TieredChunkWriter:
+    def __init__(
+        self,
+        output_dir: Path,
+        max_bytes: int,
+        max_statements: Optional[int] = None,
+        report: Optional[OutputReport] = None,
+    ) -> None:
+        if max_bytes < 1:
+            raise ValueError("max_bytes must be >= 1")
+        if max_statements is not None and max_statements < 1:
+            raise ValueError("max_statements must be >= 1")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        self.output_dir = output_dir
+        self.report = report
+        self.max_bytes = max_bytes
+        self.max_statements = max_statements
+        self.chunks: List[Dict[str, Any]] = []
+        self.handle: Optional[Any] = None
+        self.tier: Optional[int] = None
+
+    def open_chunk(self, tier: int) -> None:
+        self.close_chunk()
+        index = len(self.chunks) + 1
+        name = f"chunk_{index:03d}.sql"
+        header = "\n".join([*PIPELINE_HEADER, f"-- chunk: {index}", f"-- tier: {CHUNK_TIERS[tier][0]}", "begin;"]) + "\n"
+        self.handle = AtomicOutput(self.output_dir / name, self.report)
+        self.handle.write(header)
+        self.chunks.append(
+            {"file": name, "tier": tier, "tables": [], "statements": 0, "bytes": len(header.encode("utf-8"))}
+        )
+        self.tier = tier
+
+    def write(self, table: str, statement: str) -> None:
+        tier = TIER_BY_TABLE[table]
+        size = len(statement.encode("utf-8")) + 1
+        chunk = self.chunks[-1] if self.handle is not None else None
+        if (
+            chunk is None
+            or tier != self.tier
+            or chunk["bytes"] + size + len(CHUNK_FOOTER) > self.max_bytes
+            or (self.max_statements is not None and chunk["statements"] >= self.max_statements)
+        ):
+            self.open_chunk(tier)
+            chunk = self.chunks[-1]
+        self.handle.write(statement)
+        self.handle.write("\n")
+        chunk["statements"] += 1
+        chunk["bytes"] += size
+        if table not in chunk["tables"]:
+            chunk["tables"].append(table)
+
+    def close_chunk(self) -> None:
+        if self.handle is not None:
+            self.handle.write(CHUNK_FOOTER)
+            self.handle.close()
+            self.handle = None
+            self.chunks[-1]["bytes"] += len(CHUNK_FOOTER)
+
+    def discard(self) -> None:
+        if self.handle is not None:
+            self.handle.discard()
+            self.handle = None
+
+    def build_index(self) -> Dict[str, Any]:
+        tiers = []
+        for tier, (name, tables) in enumerate(CHUNK_TIERS):
+            chunks = [chunk for chunk in self.chunks if chunk["tier"] == tier]
+            if not chunks:
+                continue
+            # Removals rely on statement order.
+            ordered = name == "removals"
+            tiers.append(
+                {
+                    "tier": len(tiers) + 1,
+                    "name": name,
+                    "tables": list(tables),
+                    "parallel": len(chunks) > 1 and not ordered,
+                    "chunks": [
+                        {key: chunk[key] for key in ("file", "tables", "statements", "bytes")}
+                        for chunk in chunks
+                    ],
+                }
+            )
+        return {
+            "pipeline_version": PIPELINE_VERSION,
+            "max_bytes": self.max_bytes,
+            "total_chunks": len(self.chunks),
+            "tiers": tiers,
+        }
+
+    def close(self) -> None:
+        self.close_chunk()
+        remove_stale(list(self.output_dir.glob("chunk_*.sql")), self.paths(), self.report)
+        index_text = json.dumps(self.build_index(), ensure_ascii=False, indent=2) + "\n"
+        write_text_if_changed(self.output_dir / CHUNK_INDEX_NAME, index_text, self.report)
 
+    def paths(self) -> List[Path]:
+        return [*(self.output_dir / chunk["file"] for chunk in self.chunks), self.output_dir / CHUNK_INDEX_NAME]
 
-def build_pipeline_statements() -> List[str]:
-    mcq_text = RAW_MC_PATH.read_text(encoding="utf-8")
-    short_text = RAW_SHORT_PATH.read_text(encoding="utf-8")
-    disease_text = RAW_DISEASE_PATH.read_text(encoding="utf-8")
+
+def source_cache_key(source_system: str, source_hash: str, *extra: str) -> str:
+    return hash_text(
+        canonical_json(
+            {
+                "source": source_system,
+                "source_hash": source_hash,
+                "pipeline_version": PIPELINE_VERSION,
+                "source_versions": SOURCE_VERSIONS,
+                "code": files_fingerprint(PIPELINE_CODE_PATHS),
+                "extra": list(extra),
+            }
+        )
+    )
+
+
+# Row classes of each builder's result tuple; cached builds store plain value lists.
+SOURCE_ROW_TYPES: Dict[str, Tuple[type, ...]] = {
+    "rawdata-mc": (StudyItemRow, ItemChoiceRow),
+    "rawdata-kortsvar": (StudyItemRow, ItemPartRow, ModelAnswerRow, ItemSourceRow, ItemAssetRow),
+    "rawdata-sygdomslaere": (StudyItemRow, ItemPartRow, ModelAnswerRow),
+}
+
+
+def encode_cached_rows(rows: Tuple[List[PipelineRow], ...]) -> List[List[List[Any]]]:
+    return [[list(row.values_tuple()) for row in table_rows] for table_rows in rows]
+
+
+def decode_cached_rows(source_system: str, value: List[List[List[Any]]]) -> Tuple[List[PipelineRow], ...]:
+    return tuple(
+        [row_type.from_values(values) for values in table_rows]
+        for row_type, table_rows in zip(SOURCE_ROW_TYPES[source_system], value)
+    )
+
+
+def timed_build(builder: Callable[..., Any], *args: Any) -> Tuple[Any, int]:
+    started = time.perf_counter()
+    rows = builder(*args)
+    return rows, round((time.perf_counter() - started) * 1000)
+
+
+def build_pipeline_rows(
+    cache: Optional[ParseCache] = None, executor: Optional[Executor] = None
+) -> PipelineBuild:
+    with pipeline_metrics.stage("read sources"):
+        mcq_text = RAW_MC_PATH.read_text(encoding="utf-8")
+        short_text = RAW_SHORT_PATH.read_text(encoding="utf-8")
+        disease_text = RAW_DISEASE_PATH.read_text(encoding="utf-8")
 
     mcq_hash = hash_bytes(mcq_text.encode("utf-8"))
     short_hash = hash_bytes(short_text.encode("utf-8"))
@@ -903,11 +1811,45 @@ def build_pipeline_statements() -> List[str]:
     short_run_id = build_run_id("rawdata-kortsvar", short_hash)
     disease_run_id = build_run_id("rawdata-sygdomslaere", disease_hash)
 
-    mcq_items, mcq_choices = build_mcq_items(mcq_text, mcq_run_id, mcq_hash)
-    short_items, short_parts, short_answers, short_sources, short_assets = build_short_items(
-        short_text, short_run_id, short_hash
-    )
-    disease_items, disease_parts, disease_answers = build_disease_items(disease_run_id, disease_hash)
+    # Sources are independent; with an executor the cache misses build in parallel and
+    # are collected in a fixed order, so the result matches a serial build.
+    tasks: List[Tuple[str, List[str], Callable[..., Any], Tuple[Any, ...]]] = [
+        ("rawdata-mc", [mcq_hash], build_mcq_items, (mcq_text, mcq_run_id, mcq_hash)),
+        ("rawdata-kortsvar", [short_hash], build_short_items, (short_text, short_run_id, short_hash)),
+        ("rawdata-sygdomslaere", [disease_hash], build_disease_items, (disease_run_id, disease_hash)),
+    ]
+    results: Dict[str, Any] = {}
+    # Only sources built by this run have a build time; cache hits report none.
+    build_ms: Dict[str, int] = {}
+    pending: Dict[str, Tuple[Optional[str], Any]] = {}
+    for source_system, key_parts, builder, args in tasks:
+        key = None
+        if cache:
+            if source_system == "rawdata-kortsvar":
+                key_parts = key_parts + [directory_fingerprint(convert_kortsvar.IMAGES_PATH)]
+            key = source_cache_key(source_system, *key_parts)
+            cached = cache.load(source_system, key)
+            if cached is not None:
+                results[source_system] = decode_cached_rows(source_system, cached["rows"])
+                continue
+        if executor:
+            pending[source_system] = (key, executor.submit(timed_build, builder, *args))
+        else:
+            pending[source_system] = (key, timed_build(builder, *args))
+    for source_system, (key, outcome) in pending.items():
+        rows, elapsed_ms = outcome.result() if isinstance(outcome, Future) else outcome
+        if cache and key:
+            cache.store(source_system, key, {"rows": encode_cached_rows(rows)})
+        results[source_system] = rows
+        build_ms[source_system] = elapsed_ms
+
+    mcq_rows = results["rawdata-mc"]
+    short_rows = results["rawdata-kortsvar"]
+    disease_rows = results["rawdata-sygdomslaere"]
+
+    mcq_items, mcq_choices = mcq_rows
+    short_items, short_parts, short_answers, short_sources, short_assets = short_rows
+    disease_items, disease_parts, disease_answers = disease_rows
 
     items = mcq_items + short_items + disease_items
     parts = short_parts + disease_parts
@@ -919,63 +1861,394 @@ def build_pipeline_statements() -> List[str]:
     audits = load_json(FIGURE_AUDIT_PATH) or []
     annotations = build_annotations(assets, captions, audits)
 
-    validate_items(items)
-    validate_choices(mcq_choices)
-    validate_parts(parts)
-    validate_model_answers(model_answers)
-    validate_sources(sources)
-    validate_assets(assets)
-    validate_annotations(annotations)
+    validate_rows(
+        [
+            (ITEM_VALIDATOR, items),
+            (CHOICE_VALIDATOR, mcq_choices),
+            (PART_VALIDATOR, parts),
+            (MODEL_ANSWER_VALIDATOR, model_answers),
+            (SOURCE_VALIDATOR, sources),
+            (ASSET_VALIDATOR, assets),
+            (ANNOTATION_VALIDATOR, annotations),
+        ]
+    )
+
+    runs = [
+        (mcq_run_id, "rawdata-mc", mcq_hash),
+        (short_run_id, "rawdata-kortsvar", short_hash),
+        (disease_run_id, "rawdata-sygdomslaere", disease_hash),
+    ]
+    tables: List[Tuple[TableEmitter, List[PipelineRow]]] = [
+        (STUDY_ITEMS, items),
+        (ITEM_CHOICES, mcq_choices),
+        (ITEM_PARTS, parts),
+        (ITEM_MODEL_ANSWERS, model_answers),
+        (ITEM_SOURCES, sources),
+        (ITEM_ASSETS, assets),
+        (ASSET_ANNOTATIONS, annotations),
+    ]
+    repeats = check_references([(emitter.table, rows) for emitter, rows in tables], [run[0] for run in runs])
+    for table in sorted({violation.table for violation in repeats}):
+        repeated = [violation.source_key for violation in repeats if violation.table == table]
+        print(
+            f"Warning: {table} repeats {len(set(repeated))} source_keys in {len(repeated)} extra rows; "
+            "the last row wins.",
+            file=sys.stderr,
+        )
+
+    return PipelineBuild(runs=runs, tables=tables, build_ms=build_ms)
+
+
+@dataclass
+class StatementPlan:
+    runs: List[Tuple[str, str, str]]
+    tables: List[Tuple[TableEmitter, List[List[PipelineRow]]]]
+    removals: List[str]
+    run_stats: List[RunStats] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return (
+            len(self.runs)
+            + sum(len(batches) for _, batches in self.tables)
+            + len(self.removals)
+            + len(self.run_stats)
+        )
+
+
+def plan_pipeline_statements(
+    build: PipelineBuild, batch_size: int = 1, run_stats: Optional[List[RunStats]] = None
+) -> StatementPlan:
+    # Repeated source keys collapse to the row the per-row upserts would leave
+    # behind, so no key spans two chunks that a parallel tier applies at once.
+    return StatementPlan(
+        runs=build.runs,
+        tables=[(emitter, plan_batches(latest_by_source_key(rows), batch_size)) for emitter, rows in build.tables],
+        removals=build_removal_statements(build.removed),
+        run_stats=run_stats or [],
+    )
+
+
+def iter_pipeline_statements(
+    plan: StatementPlan,
+    deterministic_ids: bool = False,
+    executor: Optional[Executor] = None,
+) -> Iterator[Tuple[str, str]]:
+    # With run stats the runs start out pending and are completed, with their
+    # counts and the bytes of their data statements, after everything else.
+    stats_by_source = {stats.source_system: stats for stats in plan.run_stats}
+    status = "pending" if stats_by_source else "completed"
+    for run_id, source_system, source_hash in plan.runs:
+        yield "ingest_runs", insert_ingest_run_sql(run_id, source_system, source_hash, status)
+    for emitter, batches in plan.tables:
+        statements = iter_table_statements(emitter, batches, deterministic_ids, executor)
+        if not stats_by_source:
+            for statement in statements:
+                yield emitter.table, statement
+            continue
+        # One statement per batch; a batch that straddles two sources counts
+        # towards the source of its first row.
+        for batch, statement in zip(batches, statements):
+            stats = stats_by_source.get(key_source(batch[0].source_key))
+            if stats is not None:
+                stats.output_bytes += len(statement.encode("utf-8")) + 1
+            yield emitter.table, statement
+    for statement in plan.removals:
+        yield "removals", statement
+    for stats in plan.run_stats:
+        yield "run_stats", complete_ingest_run_sql(stats)
+
+
+def render_pipeline_statements(
+    build: PipelineBuild,
+    batch_size: int = 1,
+    deterministic_ids: bool = False,
+    executor: Optional[Executor] = None,
+) -> List[str]:
+    plan = plan_pipeline_statements(build, batch_size)
+    return [statement for _, statement in iter_pipeline_statements(plan, deterministic_ids, executor)]
+
+
+def build_pipeline_statements(batch_size: int = 1, deterministic_ids: bool = False) -> List[str]:
+    return render_pipeline_statements(build_pipeline_rows(), batch_size, deterministic_ids)
+
+
+@dataclass
+class TableDelta:
+    table: str
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    by_source: Dict[str, "TableDelta"] = field(default_factory=dict)
+
+    def summary(self) -> str:
+        return (
+            f"{self.table}: {self.new} new, {self.changed} changed, "
+            f"{self.unchanged} unchanged, {self.removed} removed"
+        )
+
+    def count(self, kind: str, source: Optional[str], amount: int = 1) -> None:
+        setattr(self, kind, getattr(self, kind) + amount)
+        if source is not None:
+            part = self.by_source.get(source)
+            if part is None:
+                part = self.by_source[source] = TableDelta(self.table)
+            setattr(part, kind, getattr(part, kind) + amount)
+
+    @property
+    def rows(self) -> int:
+        return self.new + self.changed + self.unchanged
+
+
+def key_source(source_key: str) -> Optional[str]:
+    return SOURCE_BY_KEY_PREFIX.get(source_key[: source_key.find(":", source_key.find(":") + 1)])
+
+
+@dataclass
+class RunStats:
+    run_id: str
+    source_system: str
+    source_hash: str
+    build_ms: Optional[int] = None
+    output_bytes: int = 0
+    tables: List[TableDelta] = field(default_factory=list)
+
+    @property
+    def row_count(self) -> int:
+        return sum(delta.rows for delta in self.tables)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            delta.table: {
+                "rows": delta.rows,
+                "new": delta.new,
+                "changed": delta.changed,
+                "unchanged": delta.unchanged,
+                "removed": delta.removed,
+            }
+            for delta in self.tables
+        }
+
+    def summary(self) -> str:
+        new = sum(delta.new for delta in self.tables)
+        changed = sum(delta.changed for delta in self.tables)
+        built = "from cache" if self.build_ms is None else f"built in {self.build_ms} ms"
+        return (
+            f"{self.source_system}: {self.row_count} rows ({new} new, {changed} changed), "
+            f"{built}, {self.output_bytes} bytes of SQL"
+        )
 
-    statements: List[str] = []
-    statements.append(insert_ingest_run_sql(mcq_run_id, "rawdata-mc", mcq_hash))
-    statements.append(insert_ingest_run_sql(short_run_id, "rawdata-kortsvar", short_hash))
-    statements.append(insert_ingest_run_sql(disease_run_id, "rawdata-sygdomslaere", disease_hash))
-
-    for item in items:
-        statements.append(build_item_insert_sql(item))
-    for choice in mcq_choices:
-        statements.append(build_choice_insert_sql(choice))
-    for part in parts:
-        statements.append(build_part_insert_sql(part))
-    for answer in model_answers:
-        statements.append(build_model_answer_insert_sql(answer))
-    for source in sources:
-        statements.append(build_source_insert_sql(source))
-    for asset in assets:
-        statements.append(build_asset_insert_sql(asset))
-    for annotation in annotations:
-        statements.append(build_annotation_insert_sql(annotation))
 
+def collect_run_stats(build: PipelineBuild, deltas: List[TableDelta]) -> List[RunStats]:
+    return [
+        RunStats(
+            run_id=run_id,
+            source_system=source_system,
+            source_hash=source_hash,
+            build_ms=build.build_ms.get(source_system),
+            tables=[delta.by_source[source_system] for delta in deltas if source_system in delta.by_source],
+        )
+        for run_id, source_system, source_hash in build.runs
+    ]
+
+
+def row_state_hash(row: PipelineRow) -> str:
+    # item_sources carries no content_hash; its upsert compares source_text instead.
+    if isinstance(row, ItemSourceRow):
+        return content_hash({"source_text": row.source_text})
+    return row.content_hash
+
+
+def build_state(build: PipelineBuild) -> Dict[str, Any]:
+    tables = {
+        emitter.table: {row.source_key: row_state_hash(row) for row in rows} for emitter, rows in build.tables
+    }
+    return PipelineManifest(
+        pipeline_version=PIPELINE_VERSION,
+        tables=tables,
+        sources={
+            source_system: {
+                "source_hash": source_hash,
+                "source_version": SOURCE_VERSIONS[source_system],
+                "ingest_run_id": run_id,
+            }
+            for run_id, source_system, source_hash in build.runs
+        },
+        table_digests={table: table_digest(keys) for table, keys in tables.items()},
+    ).to_dict()
+
+
+def load_state(path: Path) -> Optional[Dict[str, Any]]:
+    return load_json(path)
+
+
+def write_state(path: Path, state: Dict[str, Any], report: Optional[OutputReport] = None) -> bool:
+    return write_manifest(path, PipelineManifest.from_dict(state), report)
+
+
+def compute_delta(
+    build: PipelineBuild, previous: Optional[Dict[str, Any]]
+) -> Tuple[PipelineBuild, List[TableDelta]]:
+    previous_tables = (previous or {}).get("tables") or {}
+    # Rows written by another pipeline version may render differently, so re-emit them all.
+    same_version = bool(previous) and previous.get("pipeline_version") == PIPELINE_VERSION
+    tables: List[Tuple[TableEmitter, List[PipelineRow]]] = []
+    removed: Dict[str, List[str]] = {}
+    deltas: List[TableDelta] = []
+    for emitter, rows in build.tables:
+        known: Dict[str, str] = previous_tables.get(emitter.table) or {}
+        delta = TableDelta(emitter.table)
+        emitted: List[PipelineRow] = []
+        current_keys = set()
+        for row in latest_by_source_key(rows) if same_version else rows:
+            source_key = row.source_key
+            current_keys.add(source_key)
+            previous_hash = known.get(source_key)
+            if previous_hash is None:
+                delta.count("new", key_source(source_key))
+            elif previous_hash != row_state_hash(row):
+                delta.count("changed", key_source(source_key))
+            else:
+                delta.count("unchanged", key_source(source_key))
+                if same_version:
+                    continue
+            emitted.append(row)
+        gone = sorted(key for key in known if key not in current_keys)
+        for key in gone:
+            delta.count("removed", key_source(key))
+        if gone:
+            removed[emitter.table] = gone
+        tables.append((emitter, emitted))
+        deltas.append(delta)
+    return PipelineBuild(runs=build.runs, tables=tables, removed=removed, build_ms=build.build_ms), deltas
+
+
+def build_removal_statements(removed: Dict[str, List[str]], batch_size: int = 500) -> List[str]:
+    statements: List[str] = []
+    # Children first; study_items are deactivated rather than deleted so attempts keep their item.
+    # Attempts and rubrics reference item_parts with on delete cascade, so removed parts and
+    # every child of a deactivated item or removed part stay in place.
+    retained = tuple(f"{key}:" for table in ("study_items", "item_parts") for key in removed.get(table) or [])
+    for emitter in reversed(PIPELINE_TABLES):
+        if emitter.table == "item_parts":
+            continue
+        keys = removed.get(emitter.table) or []
+        if emitter.table != "study_items":
+            keys = [key for key in keys if not key.startswith(retained)]
+        for start in range(0, len(keys), batch_size):
+            key_list = ", ".join(sql_literal(key) for key in keys[start : start + batch_size])
+            if emitter.table == "study_items":
+                statements.append(
+                    f"update public.study_items set is_active = false "
+                    f"where source_key in ({key_list}) and is_active;"
+                )
+            else:
+                statements.append(f"delete from public.{emitter.table} where source_key in ({key_list});")
     return statements
 
 
+PROFILED_FUNCTIONS = [
+    pipeline_metrics.Instrument(convert_rawdata, "iter_questions"),
+    pipeline_metrics.Instrument(convert_kortsvar, "iter_questions"),
+    pipeline_metrics.Instrument(convert_kortsvar, "fill_missing_answers"),
+    pipeline_metrics.Instrument(convert_kortsvar, "assign_images", rows=lambda result, args: len(args[0])),
+    pipeline_metrics.Instrument(convert_sygdomslaere, "iter_tsv"),
+    pipeline_metrics.Instrument(convert_sygdomslaere, "iter_entries"),
+    pipeline_metrics.Instrument(
+        convert_sygdomslaere, "build_payload", rows=lambda result, args: len(result.get("diseases") or [])
+    ),
+    *(
+        pipeline_metrics.Instrument(sys.modules[__name__], name)
+        for name in (
+            "build_mcq_items",
+            "build_short_items",
+            "build_disease_items",
+            "build_annotations",
+        )
+    ),
+    pipeline_metrics.Instrument(
+        sys.modules[__name__], "validate_rows", rows=lambda result, args: sum(len(rows) for _, rows in args[0])
+    ),
+    pipeline_metrics.Instrument(
+        sys.modules[__name__], "check_references", rows=lambda result, args: sum(len(rows) for _, rows in args[0])
+    ),
+]
+
+
 def build_pipeline(
     output_path: Path,
     schema_path: Path,
     embed_schema: bool,
     chunk_size: Optional[int],
     chunk_dir: Optional[Path],
-) -> None:
-    data_statements = build_pipeline_statements()
-    full_statements = [
-        "-- Generated by scripts/build_studio_pipeline.py",
-        f"-- pipeline_version: {PIPELINE_VERSION}",
-        "begin;",
-        *data_statements,
-        "commit;",
-    ]
-    write_pipeline_sql(output_path, full_statements)
-
-    if embed_schema:
-        block = "\n".join([MARKER_START, *full_statements, MARKER_END])
-        replace_schema_section(schema_path, block)
-
-    if chunk_size:
-        if chunk_size < 1:
-            raise ValueError("chunk_size must be >= 1")
-        output_dir = chunk_dir or PIPELINE_CHUNK_DIR
-        write_chunked_pipeline(output_dir, data_statements, chunk_size)
+    batch_size: int = 1,
+    copy_dir: Optional[Path] = None,
+    deterministic_ids: bool = False,
+    state_path: Optional[Path] = None,
+    delta: bool = False,
+    cache: Optional[ParseCache] = None,
+    jobs: int = 1,
+    chunk_bytes: Optional[int] = None,
+    embed_mode: str = "inline",
+    report: Optional[OutputReport] = None,
+    text_blobs: bool = False,
+) -> Tuple[List[TableDelta], List[RunStats]]:
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    with executor or contextlib.nullcontext():
+        build = build_pipeline_rows(cache, executor)
+        with pipeline_metrics.stage("compute delta"):
+            state = build_state(build)
+            previous = load_state(state_path) if state_path else None
+            delta_build, deltas = compute_delta(build, previous)
+        if delta:
+            build = delta_build
+        run_stats = collect_run_stats(build, deltas)
+        statement_build = externalize_texts(build) if text_blobs else build
+        plan = plan_pipeline_statements(statement_build, batch_size, run_stats)
+        writers: List[Any] = []
+        try:
+            writers.append(PipelineSqlWriter(output_path, report))
+            if embed_schema and embed_mode == "reference":
+                writers.append(SchemaReferenceWriter(schema_path, output_path, report))
+            elif embed_schema:
+                writers.append(SchemaEmbedWriter(schema_path, report))
+            if chunk_bytes:
+                writers.append(
+                    TieredChunkWriter(
+                        chunk_dir or PIPELINE_CHUNK_DIR,
+                        chunk_bytes,
+                        chunk_size or None,
+                        report=report,
+                    )
+                )
+            elif chunk_size:
+                writers.append(ChunkWriter(chunk_dir or PIPELINE_CHUNK_DIR, chunk_size, len(plan), report))
+            with pipeline_metrics.stage("write statements", rows=len(plan)):
+                for table, statement in iter_pipeline_statements(plan, deterministic_ids, executor):
+                    for writer in writers:
+                        writer.write(table, statement)
+                for writer in writers:
+                    writer.close()
+        except BaseException:
+            # Same as AtomicOutput.__exit__: a failed build leaves no temp files.
+            for writer in writers:
+                writer.discard()
+            raise
+        if pipeline_metrics.ACTIVE:
+            written = sum(path.stat().st_size for writer in writers for path in writer.paths())
+            pipeline_metrics.record("write statements", bytes=written)
+
+        if copy_dir:
+            with pipeline_metrics.stage("write copy"):
+                write_copy_pipeline(copy_dir, build, report, deterministic_ids)
+            if pipeline_metrics.ACTIVE:
+                pipeline_metrics.record("write copy", bytes=sum(path.stat().st_size for path in copy_dir.iterdir()))
+
+        if state_path:
+            # The applied manifest is only replaced once this build is applied.
+            with pipeline_metrics.stage("write state", output=pending_path(state_path)):
+                write_state(pending_path(state_path), state, report)
+        return deltas, run_stats
 
 
 def main() -> None:
@@ -997,6 +2270,15 @@ def main() -> None:
         action="store_true",
         help="Embed pipeline SQL into supabase/schema.sql markers.",
     )
+    parser.add_argument(
+        "--embed-mode",
+        choices=("inline", "reference"),
+        default="inline",
+        help=(
+            "With --embed: inline copies every statement between the markers; reference only "
+            "writes a psql \\ir include of studio_pipeline.sql (not supported by the Supabase SQL Editor)."
+        ),
+    )
     parser.add_argument(
         "--chunk-size",
         type=int,
@@ -1007,25 +2289,157 @@ def main() -> None:
         "--chunk-dir",
         type=Path,
         default=PIPELINE_CHUNK_DIR,
-        help="Output directory for chunked SQL (used with --chunk-size).",
+        help="Output directory for chunked SQL (used with --chunk-size or --chunk-bytes).",
+    )
+    parser.add_argument(
+        "--chunk-bytes",
+        type=int,
+        default=0,
+        help=(
+            "Split data inserts into chunks of at most N bytes, grouped by dependency tier "
+            "and listed in chunk_index.json (--chunk-size then caps statements per chunk)."
+        ),
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=0,
+        help="Group rows per table into multi-row upserts with up to N rows each.",
     )
+    parser.add_argument(
+        "--copy",
+        action="store_true",
+        help="Also write COPY data files plus a set-based merge script.",
+    )
+    parser.add_argument(
+        "--copy-dir",
+        type=Path,
+        default=PIPELINE_COPY_DIR,
+        help="Output directory for COPY data and merge.sql (used with --copy).",
+    )
+    parser.add_argument(
+        "--text-blobs",
+        action="store_true",
+        help=(
+            "Store answer and source texts that occur more than once in text_blobs and reference "
+            "them by hash (smaller SQL and tables for large, repetitive corpora)."
+        ),
+    )
+    parser.add_argument(
+        "--deterministic-ids",
+        action="store_true",
+        help=(
+            "Write uuid5 ids derived from each row's source_key and reference parents by id "
+            "instead of source_key subqueries. Rows already loaded with random ids must be "
+            "reloaded first."
+        ),
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=PIPELINE_STATE_PATH,
+        help=(
+            "Manifest of the applied build (source_key -> content_hash per table, source hashes, "
+            "table digests), read by --delta. Each build writes <name>.pending.json next to it, "
+            "which replaces it once applied (apply_studio_pipeline_chunks.py, or "
+            "pipeline_manifest.py --promote)."
+        ),
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help=(
+            "Emit only rows that are new or changed since the --state build, deactivate items "
+            "whose source_key disappeared and delete other vanished rows (item_parts and the "
+            "children of removed items or parts are kept)."
+        ),
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        default=PIPELINE_CACHE_DIR,
+        help="Directory for cached per-source rows, keyed by source hash and pipeline version.",
+    )
+    parser.add_argument(
+        "--cache-max-entries",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        help="Maximum number of cached source builds to keep.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Parse every source from scratch and leave the cache untouched.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Worker processes for per-source builds and SQL rendering (0 = all cores).",
+    )
+    pipeline_metrics.add_arguments(parser)
     args = parser.parse_args()
+    if args.jobs < 0:
+        raise SystemExit("--jobs must be >= 0")
+    if args.batch_size < 0:
+        raise SystemExit("--batch-size must be >= 0")
+    if args.chunk_bytes < 0:
+        raise SystemExit("--chunk-bytes must be >= 0")
     if args.output.resolve() != PIPELINE_SQL_PATH.resolve():
         raise SystemExit("Output must be supabase/studio_pipeline.sql per repo policy.")
     if args.embed and args.schema.resolve() != SCHEMA_PATH.resolve():
         raise SystemExit("Schema output must be supabase/schema.sql per repo policy.")
-    build_pipeline(
-        output_path=args.output,
-        schema_path=args.schema,
-        embed_schema=args.embed,
-        chunk_size=args.chunk_size if args.chunk_size else None,
-        chunk_dir=args.chunk_dir,
-    )
-    print(f"Pipeline SQL written into {args.output}")
+    jobs = args.jobs or os.cpu_count() or 1
+    if pipeline_metrics.enabled(args) and jobs > 1:
+        # Stage timers only see work done in this process.
+        print("Profiling runs with --jobs 1.", file=sys.stderr)
+        jobs = 1
+    cache = None
+    if not args.no_cache:
+        cache = ParseCache(args.cache_dir, PIPELINE_VERSION, max_entries=args.cache_max_entries)
+    report = OutputReport()
+    started = time.perf_counter()
+    with pipeline_metrics.profiled(args, "build_studio_pipeline", PROFILED_FUNCTIONS):
+        deltas, run_stats = build_pipeline(
+            output_path=args.output,
+            schema_path=args.schema,
+            embed_schema=args.embed,
+            chunk_size=args.chunk_size if args.chunk_size else None,
+            chunk_dir=args.chunk_dir,
+            batch_size=args.batch_size or 1,
+            copy_dir=args.copy_dir if args.copy else None,
+            deterministic_ids=args.deterministic_ids,
+            state_path=args.state,
+            delta=args.delta,
+            cache=cache,
+            jobs=jobs,
+            chunk_bytes=args.chunk_bytes or None,
+            embed_mode=args.embed_mode,
+            report=report,
+            text_blobs=args.text_blobs,
+        )
+    print(f"Pipeline SQL written into {args.output} in {time.perf_counter() - started:.1f} s")
+    for table_delta in deltas:
+        print(f"- {table_delta.summary()}")
+    print("Ingest runs:")
+    for stats in run_stats:
+        print(f"- {stats.summary()}")
+    if cache:
+        print(f"Source cache: {cache.hits} hits, {cache.misses} misses ({args.cache_dir})")
     if args.embed:
         print(f"Schema updated at {args.schema}")
-    if args.chunk_size:
+    if args.chunk_bytes:
+        print(f"Tiered chunks and {CHUNK_INDEX_NAME} written into {args.chunk_dir}")
+    elif args.chunk_size:
         print(f"Chunked SQL written into {args.chunk_dir}")
+    if args.copy:
+        print(f"COPY data and merge script written into {args.copy_dir}")
+    print(
+        f"Build manifest pending at {pending_path(args.state)}; after applying the SQL by hand or with "
+        "import_studio_pipeline.js, run python3 scripts/pipeline_manifest.py --promote."
+    )
+    for line in report.lines(ROOT_PATH):
+        print(line)
 
 
 if __name__ == "__main__":
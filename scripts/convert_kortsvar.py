@@ -1,13 +1,20 @@
 from __future__ import annotations
 
 import argparse
-import json
 import re
+import sys
+from collections import deque
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from convert_rawdata import read_lines
 from human_categories import normalize_human_category
+import pipeline_metrics
+import pipeline_outputs
+from pipeline_outputs import JsonArtifact, OutputReport
+from pipeline_shards import parse_sharded
+
 ROOT_PATH = Path(__file__).resolve().parent.parent
 RAW_PATH = ROOT_PATH / "rawdata-kortsvar"
 OUTPUT_PATH = ROOT_PATH / "data" / "kortsvar.json"
@@ -28,6 +35,11 @@ HOVEDEMN_TITLE_RE = re.compile(r"^Hovedemne\s+\d+\s*[:–-]\s*", re.IGNORECASE)
 
 FIGURE_CUE_RE = re.compile(r"\b(figur|figurer|skitse|tegning|diagram|illustration)\b", re.IGNORECASE)
 REFERENCE_RE = re.compile(r"^(Pensum:|\(?P\.|\(?Fig\.|Fig\.|Figurer|Figur|p\.|P\.)", re.IGNORECASE)
+# Line kinds produced by classify_line, in the order the parser tries them: a
+# line is the first kind it matches. Tokens keep the raw line next to the
+# stripped one because indentation marks answer lines.
+BLANK, YEAR, OPGAVE, HOVEDEMNE, HEADING, UNDERSPOERG, SUBQ, TEXT = range(8)
+
 IMAGE_NAME_RE = re.compile(
     r"^(?P<year>\d{4})(?P<session>syg)?-(?P<opgave>\d{2})-(?P<label>[a-zA-Z])(?P<variant>\d+)?$",
     re.IGNORECASE,
@@ -110,13 +122,52 @@ def is_answer_line(raw_line: str, stripped_line: str) -> bool:
     return stripped_line.lower().startswith("svar:")
 
 
+Token = Tuple[int, str, str, Optional[re.Match]]
+
+
+def classify_line(line: str) -> Token:
+    stripped = line.strip()
+    if not stripped:
+        return BLANK, line, stripped, None
+    # The first character rules out most patterns before any regex runs.
+    first = stripped[0]
+    if first.isdecimal():
+        match = YEAR_RE.match(stripped)
+        if match:
+            return YEAR, line, stripped, match
+    elif first in "oO":
+        match = OPGAVE_RE.match(stripped)
+        if match:
+            return OPGAVE, line, stripped, match
+    elif first in "hH":
+        match = HOVEDEMN_RE.match(stripped)
+        if match:
+            return HOVEDEMNE, line, stripped, match
+    # Prompt and answer lines mostly end in punctuation, which is never a heading.
+    if stripped[-1] not in ":.?" and is_heading_line(stripped):
+        return HEADING, line, stripped, None
+    if first in "uU":
+        match = UNDERSPOERG_RE.match(stripped)
+        if match:
+            return UNDERSPOERG, line, stripped, match
+    if stripped[1:2] == ")":
+        match = SUBQ_RE.match(stripped)
+        if match:
+            return SUBQ, line, stripped, match
+    return TEXT, line, stripped, None
+
+
 def normalize_spaces(text: str) -> str:
     return re.sub(r"\s+", " ", text).strip()
 
 
-def parse_raw_data(raw_text: str) -> List[ShortQuestion]:
-    lines = raw_text.splitlines()
-
+def iter_questions(lines: Iterable[str]) -> Iterator[ShortQuestion]:
+    source = iter(lines)
+    tokens = map(classify_line, source)
+    # Lines read ahead by next_nonempty, replayed before the rest of tokens. It
+    # holds blank lines and at most one non-blank line, always the last one.
+    pending: Deque[Token] = deque()
+    # Questions completed while handling the current line.
     questions: List[ShortQuestion] = []
     current_year: Optional[int] = None
     current_session: Optional[str] = None
@@ -179,70 +230,74 @@ def parse_raw_data(raw_text: str) -> List[ShortQuestion]:
         sources = []
         answer_started = False
 
-    i = 0
-    previous_blank = False
-    while i < len(lines):
-        raw_line = lines[i]
-        line = raw_line.strip()
+    def next_nonempty_kind() -> Optional[int]:
+        if pending and pending[-1][0] != BLANK:
+            return pending[-1][0]
+        for token in tokens:
+            pending.append(token)
+            if token[0] != BLANK:
+                return token[0]
+        return None
 
-        if not line:
+    previous_blank = False
+    while True:
+        if questions:
+            yield from questions
+            questions.clear()
+        token = pending.popleft() if pending else next(tokens, None)
+        if token is None:
+            break
+        kind, raw_line, line, match = token
+
+        if kind == BLANK:
             if answer_started and answer_lines:
                 answer_lines.append("")
             previous_blank = True
-            i += 1
             continue
 
-        year_match = YEAR_RE.match(line)
-        if year_match:
+        if kind == YEAR:
             finalize_question()
-            current_year = int(year_match.group("year"))
-            current_session = normalize_session(year_match.group("session") or "")
+            current_year = int(match.group("year"))
+            current_session = normalize_session(match.group("session") or "")
             opgave_number = None
             opgave_title = None
             opgave_intro_lines = []
             auto_opgave_number = 0
-            i += 1
             continue
 
-        opgave_match = OPGAVE_RE.match(line)
-        if opgave_match:
+        if kind == OPGAVE:
             finalize_question()
-            opgave_number = int(opgave_match.group("number"))
+            opgave_number = int(match.group("number"))
             auto_opgave_number = max(auto_opgave_number, opgave_number)
-            opgave_title = opgave_match.group("title").strip() or f"Opgave {opgave_number}"
+            opgave_title = match.group("title").strip() or f"Opgave {opgave_number}"
             opgave_intro_lines = []
-            i += 1
             continue
 
-        hovedemne_match = HOVEDEMN_RE.match(line)
-        if hovedemne_match:
+        if kind == HOVEDEMNE:
             finalize_question()
-            opgave_number = int(hovedemne_match.group("number"))
+            opgave_number = int(match.group("number"))
             auto_opgave_number = max(auto_opgave_number, opgave_number)
-            opgave_title = hovedemne_match.group("title").strip() or f"Hovedemne {opgave_number}"
+            opgave_title = match.group("title").strip() or f"Hovedemne {opgave_number}"
             opgave_intro_lines = []
-            i += 1
             continue
 
-        if is_heading_line(line):
+        if kind == HEADING:
             # Treat as implicit opgave title when no explicit header is used
             finalize_question()
             auto_opgave_number += 1
             opgave_number = auto_opgave_number
             opgave_title = line
             opgave_intro_lines = []
-            i += 1
             continue
 
-        undersp_match = UNDERSPOERG_RE.match(line)
-        if undersp_match:
-            label = undersp_match.group("label")
-            text = undersp_match.group("text").strip()
+        if kind == UNDERSPOERG:
+            label = match.group("label")
+            text = match.group("text").strip()
 
             if label:
                 finalize_question()
                 if opgave_number is None:
-                    opgave_number = int(undersp_match.group("number"))
+                    opgave_number = int(match.group("number"))
                     auto_opgave_number = max(auto_opgave_number, opgave_number)
                     if opgave_title is None:
                         opgave_title = f"Opgave {opgave_number}"
@@ -251,22 +306,15 @@ def parse_raw_data(raw_text: str) -> List[ShortQuestion]:
                 answer_lines = []
                 sources = []
                 answer_started = False
-                i += 1
                 continue
 
-            next_nonempty = None
-            for j in range(i + 1, len(lines)):
-                if lines[j].strip():
-                    next_nonempty = lines[j].strip()
-                    break
-            if next_nonempty and SUBQ_RE.match(next_nonempty):
+            if next_nonempty_kind() == SUBQ:
                 opgave_intro_lines.append(line.rstrip(":"))
-                i += 1
                 continue
 
             finalize_question()
             if opgave_number is None:
-                opgave_number = int(undersp_match.group("number"))
+                opgave_number = int(match.group("number"))
                 auto_opgave_number = max(auto_opgave_number, opgave_number)
                 if opgave_title is None:
                     opgave_title = f"Opgave {opgave_number}"
@@ -275,38 +323,28 @@ def parse_raw_data(raw_text: str) -> List[ShortQuestion]:
             answer_lines = []
             sources = []
             answer_started = False
-            i += 1
             continue
 
-        subq_match = SUBQ_RE.match(line)
-        if subq_match:
+        if kind == SUBQ:
             finalize_question()
-            current_label = subq_match.group("label")
-            prompt_lines = [subq_match.group("text").strip()]
+            current_label = match.group("label")
+            prompt_lines = [match.group("text").strip()]
             answer_lines = []
             sources = []
             answer_started = False
-            i += 1
             continue
 
-        # Reference-only lines
-        ref = extract_reference(line)
-        if ref is not None and (prompt_lines or answer_started):
-            if ref:
-                sources.append(ref)
-            i += 1
-            continue
-
-        # Start a question if none exists in this opgave yet
-        if not prompt_lines and not answer_started:
-            next_nonempty = None
-            for j in range(i + 1, len(lines)):
-                if lines[j].strip():
-                    next_nonempty = lines[j].strip()
-                    break
-            if next_nonempty and SUBQ_RE.match(next_nonempty):
+        if prompt_lines or answer_started:
+            # Reference-only lines
+            ref = extract_reference(line)
+            if ref is not None:
+                if ref:
+                    sources.append(ref)
+                continue
+        else:
+            # Start a question if none exists in this opgave yet
+            if next_nonempty_kind() == SUBQ:
                 opgave_intro_lines.append(line.rstrip(":"))
-                i += 1
                 continue
 
             current_label = None
@@ -314,7 +352,6 @@ def parse_raw_data(raw_text: str) -> List[ShortQuestion]:
             answer_lines = []
             sources = []
             answer_started = False
-            i += 1
             continue
 
         # Decide if this line belongs to the answer
@@ -325,17 +362,23 @@ def parse_raw_data(raw_text: str) -> List[ShortQuestion]:
                 content = content.split(":", 1)[1].strip()
             if content:
                 answer_lines.append(content)
-            i += 1
             previous_blank = False
             continue
 
         # Otherwise, still in prompt
         prompt_lines.append(line)
-        i += 1
         previous_blank = False
 
     finalize_question()
-    return questions
+    yield from questions
+
+
+def parse_lines(lines: List[str]) -> List[ShortQuestion]:
+    return list(iter_questions(lines))
+
+
+def parse_raw_data(raw_text: str, jobs: int = 1) -> List[ShortQuestion]:
+    return parse_sharded(parse_lines, raw_text.splitlines(), YEAR_RE, jobs)
 
 
 def fill_missing_answers(questions: List[ShortQuestion]) -> None:
@@ -435,7 +478,13 @@ def assign_images(
     return missing_images, unmatched_images
 
 
-def write_output(questions: List[ShortQuestion], output_path: Path) -> None:
+def write_output(
+    questions: Iterable[ShortQuestion],
+    output_path: Path,
+    report: Optional[OutputReport] = None,
+    minified: bool = True,
+    precompress: bool = False,
+) -> bool:
     def normalize_category(question: ShortQuestion) -> str:
         cleaned = HOVEDEMN_TITLE_RE.sub("", question.opgave_title or "").strip()
         cleaned = cleaned or (question.opgave_title or "")
@@ -446,8 +495,8 @@ def write_output(questions: List[ShortQuestion], output_path: Path) -> None:
                 f"Unknown category '{cleaned}' for opgave {question.opgave} ({question.year})"
             ) from exc
 
-    serializable = [
-        {
+    def serializable(question: ShortQuestion) -> Dict[str, Any]:
+        return {
             "type": "short",
             "year": question.year,
             "session": question.session,
@@ -461,9 +510,10 @@ def write_output(questions: List[ShortQuestion], output_path: Path) -> None:
             "sources": question.sources,
             "images": question.images,
         }
-        for question in questions
-    ]
-    output_path.write_text(json.dumps(serializable, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    with JsonArtifact(output_path, report, minified, precompress) as artifact:
+        artifact.write_array(map(serializable, questions))
+    return artifact.changed
 
 
 def main() -> None:
@@ -471,6 +521,11 @@ def main() -> None:
     parser.add_argument("--input", type=Path, help="Path to raw kortsvar file.")
     parser.add_argument("--output", type=Path, help="Destination for kortsvar.json.")
     parser.add_argument("--images", type=Path, help="Folder with figure images.")
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="Worker processes; large files are parsed in shards split at year headers."
+    )
+    pipeline_outputs.add_json_arguments(parser)
+    pipeline_metrics.add_arguments(parser)
     args = parser.parse_args()
 
     input_path = args.input or RAW_PATH
@@ -481,17 +536,26 @@ def main() -> None:
     if not images_path.exists():
         raise FileNotFoundError(f"Images folder not found: {images_path}")
 
-    raw_text = input_path.read_text(encoding="utf-8")
-    questions = parse_raw_data(raw_text)
-    fill_missing_answers(questions)
-    missing_for_questions, unmatched_images = assign_images(questions, images_path=images_path)
-    write_output(questions, output_path)
+    module = sys.modules[__name__]
+    instruments = [
+        pipeline_metrics.Instrument(module, "iter_questions"),
+        pipeline_metrics.Instrument(module, "fill_missing_answers"),
+        pipeline_metrics.Instrument(module, "assign_images", rows=lambda result, args: len(args[0])),
+        pipeline_metrics.Instrument(module, "write_output", output=lambda args: args[1]),
+    ]
+    with pipeline_metrics.profiled(args, "convert_kortsvar", instruments):
+        # Answers are filled in and images assigned across the whole file, so
+        # the questions are collected.
+        questions = parse_sharded(parse_lines, list(read_lines(input_path)), YEAR_RE, args.jobs)
+        fill_missing_answers(questions)
+        missing_for_questions, unmatched_images = assign_images(questions, images_path=images_path)
+        changed = write_output(questions, output_path, None, args.minified, args.precompress)
     years = sorted({q.year for q in questions})
     print(
         f"Parsed {len(questions)} kortsvar-spørgsmål across {len(years)} years: "
         f"{', '.join(str(year) for year in years)}"
     )
-    print(f"Saved structured data to {output_path}")
+    print(f"Saved structured data to {output_path}" if changed else f"Unchanged: {output_path}")
 
     if missing_for_questions:
         print("Questions referencing figures without matched images:")
@@ -1,13 +1,17 @@
 from __future__ import annotations
 
 import argparse
-import json
 import re
+import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from human_categories import normalize_human_category
+import pipeline_metrics
+import pipeline_outputs
+from pipeline_outputs import JsonArtifact, OutputReport
+from pipeline_shards import parse_sharded
 
 ROOT_PATH = Path(__file__).resolve().parent.parent
 RAW_PATH = ROOT_PATH / "rawdata-mc"
@@ -42,120 +46,150 @@ class Question:
 QUESTION_HEADER_RE = re.compile(r"^Spørgsmål\s+(\d+)\s+[-–]\s+(.*)$", re.IGNORECASE)
 YEAR_HEADER_RE = re.compile(r"^(\d{4})(?:\s*(?:[-–]\s*|\s+)(.*\S.*))?\s*$")
 CORRECT_RE = re.compile(r"\(korrekt\)", re.IGNORECASE)
-
-
-def parse_raw_data(raw_text: str) -> List[Question]:
-    lines = [line.rstrip("\n") for line in raw_text.splitlines()]
-    questions: List[Question] = []
+OPTION_LABELS = ("A", "B", "C", "D")
+
+# Line kinds produced by classify_line. Every line is stripped and matched once;
+# the parser below only looks at the kinds.
+BLANK, TEXT, OPTION, YEAR, QUESTION = range(5)
+
+
+def classify_line(line: str) -> Tuple[int, str, Optional[re.Match]]:
+    stripped = line.strip()
+    if not stripped:
+        return BLANK, stripped, None
+    if stripped[0] in OPTION_LABELS and stripped[1:2] == ".":
+        return OPTION, stripped, None
+    match = YEAR_HEADER_RE.match(stripped)
+    if match:
+        return YEAR, stripped, match
+    match = QUESTION_HEADER_RE.match(stripped)
+    if match:
+        return QUESTION, stripped, match
+    return TEXT, stripped, None
+
+
+def normalize_session(label: str) -> Optional[str]:
+    cleaned = label.strip().lower()
+    if not cleaned:
+        return None
+    if "syge" in cleaned:
+        return "sygeeksamen"
+    if "ordin" in cleaned:
+        return "ordinær"
+    return cleaned
+
+
+def iter_lines(handle: Iterable[str]) -> Iterator[str]:
+    # Yields the lines str.splitlines() would give for the whole text, which
+    # also breaks on form feeds and the other Unicode line boundaries.
+    for chunk in handle:
+        yield from chunk.splitlines()
+
+
+def read_lines(path: Path) -> Iterator[str]:
+    with path.open("r", encoding="utf-8") as handle:
+        yield from iter_lines(handle)
+
+
+def iter_questions(lines: Iterable[str]) -> Iterator[Question]:
+    tokens = map(classify_line, lines)
+    categories: Dict[str, str] = {}
     current_year: Optional[int] = None
     current_session: Optional[str] = None
-    i = 0
-
-    def normalize_session(label: str) -> Optional[str]:
-        cleaned = label.strip().lower()
-        if not cleaned:
-            return None
-        if "syge" in cleaned:
-            return "sygeeksamen"
-        if "ordin" in cleaned:
-            return "ordinær"
-        return cleaned
-
-    while i < len(lines):
-        line = lines[i].strip()
-
-        if not line:
-            i += 1
-            continue
 
-        year_match = YEAR_HEADER_RE.match(line)
-        if year_match:
-            current_year = int(year_match.group(1))
-            current_session = normalize_session(year_match.group(2) or "")
-            i += 1
+    for kind, line, match in tokens:
+        if kind == YEAR:
+            current_year = int(match.group(1))
+            current_session = normalize_session(match.group(2) or "")
             continue
+        if kind != QUESTION:
+            continue
+        if current_year is None:
+            raise ValueError("Encountered a question header before a year header")
 
-        header_match = QUESTION_HEADER_RE.match(line)
-        if header_match:
-            if current_year is None:
-                raise ValueError("Encountered a question header before a year header")
-
-            number = int(header_match.group(1))
-            raw_category = header_match.group(2).strip()
+        number = int(match.group(1))
+        raw_category = match.group(2).strip()
+        category = categories.get(raw_category)
+        if category is None:
             try:
-                category = normalize_human_category(raw_category)
+                category = categories[raw_category] = normalize_human_category(raw_category)
             except ValueError as exc:
-                raise ValueError(
-                    f"Unknown category '{raw_category}' for question {number}"
-                ) from exc
-            i += 1
-
-            question_lines: List[str] = []
-            while i < len(lines):
-                possible_option = lines[i]
-                if re.match(r"^\s*[A-D]\.", possible_option):
-                    break
-                if possible_option.strip():
-                    question_lines.append(possible_option.strip())
-                i += 1
-
-            if not question_lines:
-                raise ValueError(f"Missing question text for question {number} ({category})")
-
-            options: List[Option] = []
-            correct_found = False
-            for expected_label in ["A", "B", "C", "D"]:
-                if i >= len(lines):
-                    raise ValueError(f"Missing option {expected_label} for question {number} ({category})")
-                option_line = lines[i].strip()
-                option_match = re.match(rf"^{expected_label}\.\s*(.*)$", option_line)
-                if not option_match:
-                    raise ValueError(f"Unexpected option format near question {number}: '{option_line}'")
-
-                option_text = option_match.group(1).strip()
-                is_correct = bool(CORRECT_RE.search(option_text))
+                raise ValueError(f"Unknown category '{raw_category}' for question {number}") from exc
+
+        # Everything up to the first option line is question text, including
+        # lines that would otherwise read as headers.
+        question_lines: List[str] = []
+        token = next(tokens, None)
+        while token is not None and token[0] != OPTION:
+            if token[0] != BLANK:
+                question_lines.append(token[1])
+            token = next(tokens, None)
+        if not question_lines:
+            raise ValueError(f"Missing question text for question {number} ({category})")
+
+        options: List[Option] = []
+        correct_found = False
+        for index, expected_label in enumerate(OPTION_LABELS):
+            if index:
+                token = next(tokens, None)
+            if token is None:
+                raise ValueError(f"Missing option {expected_label} for question {number} ({category})")
+            kind, option_line, _ = token
+            if kind != OPTION or option_line[0] != expected_label:
+                raise ValueError(f"Unexpected option format near question {number}: '{option_line}'")
+            option_text = option_line[2:].strip()
+            is_correct = CORRECT_RE.search(option_text) is not None
+            if is_correct:
                 option_text = CORRECT_RE.sub("", option_text).strip()
-                options.append(Option(label=expected_label, text=option_text, is_correct=is_correct))
-                correct_found = correct_found or is_correct
-                i += 1
-
-            if not correct_found:
-                raise ValueError(f"No correct option flagged for question {number} ({category})")
-
-            questions.append(
-                Question(
-                    year=current_year,
-                    number=number,
-                    session=current_session,
-                    category=category,
-                    text=" ".join(question_lines),
-                    options=options,
-                )
-            )
-            continue
+            options.append(Option(label=expected_label, text=option_text, is_correct=is_correct))
+            correct_found = correct_found or is_correct
+
+        if not correct_found:
+            raise ValueError(f"No correct option flagged for question {number} ({category})")
+
+        yield Question(
+            year=current_year,
+            number=number,
+            session=current_session,
+            category=category,
+            text=" ".join(question_lines),
+            options=options,
+        )
 
-        i += 1
-
-    return questions
-
-
-def write_questions(questions: List[Question], output_path: Path) -> None:
-    serializable = [
-        {
-            "year": question.year,
-            "number": question.number,
-            "session": question.session,
-            "category": question.category,
-            "text": question.text,
-            "options": [
-                {"label": option.label, "text": option.text, "isCorrect": option.is_correct}
-                for option in question.options
-            ],
-            "correctLabel": question.correct_label,
-        }
-        for question in questions
-    ]
-    output_path.write_text(json.dumps(serializable, ensure_ascii=False, indent=2), encoding="utf-8")
+
+def parse_lines(lines: List[str]) -> List[Question]:
+    return list(iter_questions(lines))
+
+
+def parse_raw_data(raw_text: str, jobs: int = 1) -> List[Question]:
+    return parse_sharded(parse_lines, raw_text.splitlines(), YEAR_HEADER_RE, jobs)
+
+
+def question_json(question: Question) -> Dict[str, Any]:
+    return {
+        "year": question.year,
+        "number": question.number,
+        "session": question.session,
+        "category": question.category,
+        "text": question.text,
+        "options": [
+            {"label": option.label, "text": option.text, "isCorrect": option.is_correct}
+            for option in question.options
+        ],
+        "correctLabel": question.correct_label,
+    }
+
+
+def write_questions(
+    questions: Iterable[Question],
+    output_path: Path,
+    report: Optional[OutputReport] = None,
+    minified: bool = True,
+    precompress: bool = False,
+) -> bool:
+    with JsonArtifact(output_path, report, minified, precompress) as artifact:
+        artifact.write_array(map(question_json, questions))
+    return artifact.changed
 
 
 def resolve_input_path(candidate: Optional[Path]) -> Path:
@@ -172,6 +206,11 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Convert raw MCQ data to JSON.")
     parser.add_argument("--input", type=Path, help="Path to raw MCQ file.")
     parser.add_argument("--output", type=Path, help="Destination for questions.json.")
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="Worker processes; large files are parsed in shards split at year headers."
+    )
+    pipeline_outputs.add_json_arguments(parser)
+    pipeline_metrics.add_arguments(parser)
     args = parser.parse_args()
 
     input_path = resolve_input_path(args.input)
@@ -179,15 +218,33 @@ def main() -> None:
     if not input_path.exists():
         raise FileNotFoundError(f"Raw data not found: {input_path}")
 
-    raw_text = input_path.read_text(encoding="utf-8")
-    questions = parse_raw_data(raw_text)
-    write_questions(questions, output_path)
-    unique_years = sorted({q.year for q in questions})
+    module = sys.modules[__name__]
+    instruments = [
+        pipeline_metrics.Instrument(module, "iter_questions"),
+        pipeline_metrics.Instrument(module, "write_questions", output=lambda args: args[1]),
+    ]
+    # Questions are parsed from the file and written as they complete; only
+    # the per-year counts are kept for the summary.
+    per_year: Dict[int, int] = {}
+
+    def counted(questions: Iterable[Question]) -> Iterator[Question]:
+        for question in questions:
+            per_year[question.year] = per_year.get(question.year, 0) + 1
+            yield question
+
+    with pipeline_metrics.profiled(args, "convert_rawdata", instruments):
+        lines = read_lines(input_path)
+        if args.jobs > 1:
+            questions = parse_sharded(parse_lines, list(lines), YEAR_HEADER_RE, args.jobs)
+        else:
+            questions = iter_questions(lines)
+        changed = write_questions(counted(questions), output_path, None, args.minified, args.precompress)
+    unique_years = sorted(per_year)
     print(
-        f"Parsed {len(questions)} questions across {len(unique_years)} years: "
+        f"Parsed {sum(per_year.values())} questions across {len(unique_years)} years: "
         f"{', '.join(str(year) for year in unique_years)}"
     )
-    print(f"Saved structured data to {output_path}")
+    print(f"Saved structured data to {output_path}" if changed else f"Unchanged: {output_path}")
 
 
 if __name__ == "__main__":
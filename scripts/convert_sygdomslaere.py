@@ -4,10 +4,15 @@ import argparse
 import csv
 import json
 import re
+import sys
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pipeline_metrics
+import pipeline_outputs
+from pipeline_outputs import JsonArtifact, OutputReport
 
 
 ROOT_PATH = Path(__file__).resolve().parent.parent
@@ -103,11 +108,15 @@ def normalize_header(header: str) -> str:
     return clean_text(header).lower()
 
 
+def iter_tsv(handle: Iterable[str]) -> Iterator[List[str]]:
+    for row in csv.reader(handle, delimiter="\t"):
+        if any(cell.strip() for cell in row):
+            yield row
+
+
 def read_tsv(path: Path) -> List[List[str]]:
     with path.open("r", encoding="utf-8") as handle:
-        reader = csv.reader(handle, delimiter="\t")
-        rows = [row for row in reader if any(cell.strip() for cell in row)]
-    return rows
+        return list(iter_tsv(handle))
 
 
 def align_row(row: List[str], header_len: int) -> List[str]:
@@ -119,18 +128,21 @@ def align_row(row: List[str], header_len: int) -> List[str]:
     return merged
 
 
-def parse_rows(rows: List[List[str]]) -> tuple[List[str], List[Dict[str, str]]]:
-    if not rows:
-        return [], []
-    header = [normalize_header(cell) for cell in rows[0]]
-    mapped_rows: List[Dict[str, str]] = []
-    for raw_row in rows[1:]:
+def read_header(rows: Iterator[List[str]]) -> List[str]:
+    first = next(rows, None)
+    return [normalize_header(cell) for cell in first] if first is not None else []
+
+
+def iter_entries(rows: Iterable[List[str]], header: List[str]) -> Iterator[Dict[str, str]]:
+    for raw_row in rows:
         aligned = align_row(raw_row, len(header))
-        entry = {
-            header[idx]: clean_text(cell) for idx, cell in enumerate(aligned) if idx < len(header)
-        }
-        mapped_rows.append(entry)
-    return header, mapped_rows
+        yield {header[idx]: clean_text(cell) for idx, cell in enumerate(aligned) if idx < len(header)}
+
+
+def parse_rows(rows: List[List[str]]) -> tuple[List[str], List[Dict[str, str]]]:
+    source = iter(rows)
+    header = read_header(source)
+    return header, list(iter_entries(source, header))
 
 
 def extract_sections(entry: Dict[str, str], header: List[str]) -> List[Section]:
@@ -159,7 +171,7 @@ def sort_sections(sections: List[Section]) -> List[Section]:
     )
 
 
-def build_payload(rows: List[Dict[str, str]], header: List[str]) -> Dict[str, object]:
+def build_payload(rows: Iterable[Dict[str, str]], header: List[str]) -> Dict[str, object]:
     diseases: List[Dict[str, object]] = []
     weights: Dict[str, int] = {}
     categories: Dict[str, int] = {}
@@ -198,7 +210,7 @@ def build_payload(rows: List[Dict[str, str]], header: List[str]) -> Dict[str, ob
     payload = {
         "meta": {
             "source": RAW_PATH.name,
-            "generatedAt": datetime.now(timezone.utc).isoformat(),
+            "generatedAt": None,
             "sectionOrder": SECTION_ORDER,
             "priorities": list(PRIORITY_LABELS.keys()),
             "weights": sorted(weights.keys(), key=str.lower),
@@ -209,10 +221,48 @@ def build_payload(rows: List[Dict[str, str]], header: List[str]) -> Dict[str, ob
     return payload
 
 
+def read_payload(path: Path) -> Dict[str, object]:
+    # Rows are mapped and folded into the payload as they are read.
+    with path.open("r", encoding="utf-8") as handle:
+        rows = iter_tsv(handle)
+        header = read_header(rows)
+        return build_payload(iter_entries(rows, header), header)
+
+
+def previous_generated_at(payload: Dict[str, Any], output_path: Path) -> Optional[str]:
+    try:
+        previous = json.loads(output_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+    if not isinstance(previous, dict) or not isinstance(previous.get("meta"), dict):
+        return None
+    generated_at = previous["meta"].get("generatedAt")
+    unstamped = {**previous, "meta": {**previous["meta"], "generatedAt": None}}
+    return generated_at if unstamped == payload else None
+
+
+def write_payload(
+    payload: Dict[str, Any],
+    output_path: Path,
+    report: Optional[OutputReport] = None,
+    minified: bool = True,
+    precompress: bool = False,
+) -> bool:
+    # generatedAt only moves when the content does, so reruns over the same
+    # source leave the file (and everything cached from it) untouched.
+    generated_at = previous_generated_at(payload, output_path) or datetime.now(timezone.utc).isoformat()
+    stamped = {**payload, "meta": {**payload["meta"], "generatedAt": generated_at}}
+    with JsonArtifact(output_path, report, minified, precompress) as artifact:
+        artifact.write_value(stamped)
+    return artifact.changed
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Convert sygdomslære TSV to JSON.")
     parser.add_argument("--input", type=Path, help="Path to raw sygdomslære txt file.")
     parser.add_argument("--output", type=Path, help="Destination for sygdomslære.json.")
+    pipeline_outputs.add_json_arguments(parser)
+    pipeline_metrics.add_arguments(parser)
     args = parser.parse_args()
 
     input_path = args.input or RAW_PATH
@@ -220,15 +270,24 @@ def main() -> None:
     if not input_path.exists():
         raise FileNotFoundError(f"Raw data not found: {input_path}")
 
-    rows = read_tsv(input_path)
-    header, mapped = parse_rows(rows)
-    payload = build_payload(mapped, header)
-    output_path.write_text(
-        json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    module = sys.modules[__name__]
+    instruments = [
+        pipeline_metrics.Instrument(module, "iter_tsv"),
+        pipeline_metrics.Instrument(module, "iter_entries"),
+        pipeline_metrics.Instrument(
+            module, "build_payload", rows=lambda result, args: len(result.get("diseases") or [])
+        ),
+    ]
+    with pipeline_metrics.profiled(args, "convert_sygdomslaere", instruments):
+        payload = read_payload(input_path)
+        with pipeline_metrics.stage("write output", output=output_path):
+            changed = write_payload(payload, output_path, None, args.minified, args.precompress)
 
     print(f"Parsed {len(payload['diseases'])} diseases.")
-    print(f"Saved structured data to {output_path}")
+    if changed:
+        print(f"Saved structured data to {output_path}")
+    else:
+        print(f"Unchanged: {output_path}")
 
 
 if __name__ == "__main__":
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import argparse
-import json
 import sys
 from pathlib import Path
 from typing import Optional
@@ -12,6 +11,9 @@ sys.path.insert(0, str(ROOT_PATH / "scripts"))
 import convert_rawdata  # type: ignore
 import convert_kortsvar  # type: ignore
 import convert_sygdomslaere  # type: ignore
+import pipeline_metrics
+import pipeline_outputs
+from pipeline_outputs import OutputReport, write_text_if_changed
 
 IMPORT_PATHS = {
     "mcq": ROOT_PATH / "imports" / "rawdata-mc.txt",
@@ -101,7 +103,7 @@ def merge_append(existing: str, new_text: str, gap_lines: int) -> str:
     return ensure_trailing_newline(f"{existing_clean}{gap}{new_clean}")
 
 
-def update_rawdata(dataset: str, mode: str, import_text: str) -> None:
+def update_rawdata(dataset: str, mode: str, import_text: str, report: Optional[OutputReport] = None) -> None:
     raw_path = RAW_PATHS[dataset]
     existing = raw_path.read_text(encoding="utf-8") if raw_path.exists() else ""
 
@@ -121,25 +123,25 @@ def update_rawdata(dataset: str, mode: str, import_text: str) -> None:
     else:
         merged = ensure_trailing_newline(import_text)
 
-    raw_path.write_text(merged, encoding="utf-8")
+    write_text_if_changed(raw_path, merged, report)
 
 
-def run_converter(dataset: str) -> None:
+def run_converter(
+    dataset: str, report: Optional[OutputReport] = None, minified: bool = True, precompress: bool = False
+) -> None:
     if dataset == "mcq":
-        raw_text = RAW_PATHS[dataset].read_text(encoding="utf-8")
-        questions = convert_rawdata.parse_raw_data(raw_text)
-        convert_rawdata.write_questions(questions, convert_rawdata.OUTPUT_PATH)
+        questions = list(convert_rawdata.iter_questions(convert_rawdata.read_lines(RAW_PATHS[dataset])))
+        convert_rawdata.write_questions(questions, convert_rawdata.OUTPUT_PATH, report, minified, precompress)
         print(f"Converted MCQ: {len(questions)} questions -> {convert_rawdata.OUTPUT_PATH}")
         return
 
     if dataset == "kortsvar":
         if not convert_kortsvar.IMAGES_PATH.exists():
             raise FileNotFoundError(f"Images folder not found: {convert_kortsvar.IMAGES_PATH}")
-        raw_text = RAW_PATHS[dataset].read_text(encoding="utf-8")
-        questions = convert_kortsvar.parse_raw_data(raw_text)
+        questions = list(convert_kortsvar.iter_questions(convert_rawdata.read_lines(RAW_PATHS[dataset])))
         convert_kortsvar.fill_missing_answers(questions)
         missing, unmatched = convert_kortsvar.assign_images(questions)
-        convert_kortsvar.write_output(questions, convert_kortsvar.OUTPUT_PATH)
+        convert_kortsvar.write_output(questions, convert_kortsvar.OUTPUT_PATH, report, minified, precompress)
         print(f"Converted kortsvar: {len(questions)} questions -> {convert_kortsvar.OUTPUT_PATH}")
         if missing:
             print(f"Warnings: {len(missing)} kortsvar items reference missing figures")
@@ -148,13 +150,11 @@ def run_converter(dataset: str) -> None:
         return
 
     if dataset == "sygdomslaere":
-        rows = convert_sygdomslaere.read_tsv(RAW_PATHS[dataset])
-        header, mapped = convert_sygdomslaere.parse_rows(rows)
-        payload = convert_sygdomslaere.build_payload(mapped, header)
-        convert_sygdomslaere.OUTPUT_PATH.write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2),
-            encoding="utf-8",
-        )
+        payload = convert_sygdomslaere.read_payload(RAW_PATHS[dataset])
+        with pipeline_metrics.stage("write sygdomslaere output", output=convert_sygdomslaere.OUTPUT_PATH):
+            convert_sygdomslaere.write_payload(
+                payload, convert_sygdomslaere.OUTPUT_PATH, report, minified, precompress
+            )
         print(
             f"Converted sygdomslaere: {len(payload.get('diseases', []))} diseases -> {convert_sygdomslaere.OUTPUT_PATH}"
         )
@@ -163,14 +163,40 @@ def run_converter(dataset: str) -> None:
     raise ValueError(f"Unknown dataset: {dataset}")
 
 
-def import_dataset(dataset: str, mode: str, allow_empty: bool) -> None:
+PROFILED_FUNCTIONS = [
+    pipeline_metrics.Instrument(sys.modules[__name__], "read_text"),
+    pipeline_metrics.Instrument(
+        sys.modules[__name__], "update_rawdata", output=lambda args: RAW_PATHS[args[0]]
+    ),
+    pipeline_metrics.Instrument(convert_rawdata, "iter_questions"),
+    pipeline_metrics.Instrument(convert_rawdata, "write_questions", output=lambda args: args[1]),
+    pipeline_metrics.Instrument(convert_kortsvar, "iter_questions"),
+    pipeline_metrics.Instrument(convert_kortsvar, "fill_missing_answers"),
+    pipeline_metrics.Instrument(convert_kortsvar, "assign_images", rows=lambda result, args: len(args[0])),
+    pipeline_metrics.Instrument(convert_kortsvar, "write_output", output=lambda args: args[1]),
+    pipeline_metrics.Instrument(convert_sygdomslaere, "iter_tsv"),
+    pipeline_metrics.Instrument(convert_sygdomslaere, "iter_entries"),
+    pipeline_metrics.Instrument(
+        convert_sygdomslaere, "build_payload", rows=lambda result, args: len(result.get("diseases") or [])
+    ),
+]
+
+
+def import_dataset(
+    dataset: str,
+    mode: str,
+    allow_empty: bool,
+    report: Optional[OutputReport] = None,
+    minified: bool = True,
+    precompress: bool = False,
+) -> None:
     import_path = IMPORT_PATHS[dataset]
     import_text = read_text(import_path, allow_empty=allow_empty)
     if import_text is None:
         print(f"Skip {dataset}: import file empty")
         return
-    update_rawdata(dataset, mode, import_text)
-    run_converter(dataset)
+    update_rawdata(dataset, mode, import_text, report)
+    run_converter(dataset, report, minified, precompress)
 
 
 def main() -> None:
@@ -187,13 +213,26 @@ def main() -> None:
         required=True,
         help="Import mode.",
     )
+    pipeline_outputs.add_json_arguments(parser)
+    pipeline_metrics.add_arguments(parser)
     args = parser.parse_args()
 
     datasets = ["mcq", "kortsvar", "sygdomslaere"] if args.type == "all" else [args.type]
     allow_empty = args.type == "all"
 
-    for dataset in datasets:
-        import_dataset(dataset, args.mode, allow_empty=allow_empty)
+    report = OutputReport()
+    with pipeline_metrics.profiled(args, "import_rawdata", PROFILED_FUNCTIONS):
+        for dataset in datasets:
+            import_dataset(
+                dataset,
+                args.mode,
+                allow_empty=allow_empty,
+                report=report,
+                minified=args.minified,
+                precompress=args.precompress,
+            )
+    for line in report.lines(ROOT_PATH):
+        print(line)
 
 
 if __name__ == "__main__":
@@ -3,15 +3,11 @@
 
 const fs = require("fs");
 const path = require("path");
-const { createClient } = require("@supabase/supabase-js");
-const dotenv = require("dotenv");
-
-dotenv.config();
-
 const DEFAULT_CHUNK_SIZE = 200;
 const PIPELINE_PATH = path.resolve(__dirname, "..", "supabase", "studio_pipeline.sql");
 const EXPECTED_TABLES = new Set([
   "ingest_runs",
+  "text_blobs",
   "study_items",
   "item_choices",
   "item_parts",
@@ -71,11 +67,13 @@ function parseSqlString(text) {
   return trimmed.replace(/''/g, "'");
 }
 
-function findNextInsert(sqlText, startIndex) {
-  const needle = "insert into public.";
-  const needleLength = needle.length;
+// Statements the importer applies: upserts, and the removals a --delta build
+// appends (deactivated study_items, deleted child rows).
+const STATEMENT_PREFIXES = ["insert into public.", "update public.", "delete from public."];
+
+function findNextStatement(sqlText, startIndex) {
   let inString = false;
-  for (let i = startIndex; i <= sqlText.length - needleLength; i += 1) {
+  for (let i = startIndex; i < sqlText.length; i += 1) {
     const ch = sqlText[i];
     if (ch === "'") {
       if (inString) {
@@ -89,9 +87,10 @@ function findNextInsert(sqlText, startIndex) {
       }
     }
     if (!inString) {
-      const slice = sqlText.slice(i, i + needleLength).toLowerCase();
-      if (slice === needle) {
-        return i;
+      for (const prefix of STATEMENT_PREFIXES) {
+        if (sqlText.slice(i, i + prefix.length).toLowerCase() === prefix) {
+          return i;
+        }
       }
     }
   }
@@ -184,6 +183,14 @@ function findKeywordOutsideString(text, keyword, startIndex) {
   return -1;
 }
 
+function skipWhitespace(text, startIndex) {
+  let i = startIndex;
+  while (i < text.length && /\s/.test(text[i])) {
+    i += 1;
+  }
+  return i;
+}
+
 function splitColumns(columnsText) {
   return columnsText
     .split(",")
@@ -267,6 +274,9 @@ function parseValueToken(token) {
   if (/^-?\d+(\.\d+)?$/.test(trimmed)) {
     return Number(trimmed);
   }
+  if (trimmed.startsWith("'") && /::jsonb$/i.test(trimmed)) {
+    return JSON.parse(parseSqlString(trimmed.slice(0, -"::jsonb".length)));
+  }
   if (trimmed.startsWith("'")) {
     if (!trimmed.endsWith("'")) {
       throw new Error(`Unterminated string literal: ${trimmed.slice(0, 32)}...`);
@@ -297,20 +307,48 @@ function parseInsertStatement(statement) {
   if (valuesKeywordIndex === -1) {
     throw new Error(`Missing VALUES clause for ${table}`);
   }
-  const valuesStart = statement.indexOf("(", valuesKeywordIndex);
-  const valuesEnd = findMatchingParen(statement, valuesStart);
-  const valuesRaw = statement.slice(valuesStart + 1, valuesEnd);
-  const values = splitValues(valuesRaw);
-  if (columns.length !== values.length) {
-    throw new Error(
-      `Column/value mismatch for ${table}: ${columns.length} columns, ${values.length} values`
-    );
+  // --batch-size writes several tuples per statement: values (...), (...), ...
+  const rows = [];
+  let cursor = valuesKeywordIndex + "values".length;
+  while (true) {
+    const valuesStart = skipWhitespace(statement, cursor);
+    if (statement[valuesStart] !== "(") {
+      throw new Error(`Expected a value tuple for ${table} at offset ${valuesStart}`);
+    }
+    const valuesEnd = findMatchingParen(statement, valuesStart);
+    const values = splitValues(statement.slice(valuesStart + 1, valuesEnd));
+    if (columns.length !== values.length) {
+      throw new Error(
+        `Column/value mismatch for ${table}: ${columns.length} columns, ${values.length} values`
+      );
+    }
+    const row = {};
+    for (let i = 0; i < columns.length; i += 1) {
+      row[columns[i]] = parseValueToken(values[i]);
+    }
+    rows.push(row);
+    const next = skipWhitespace(statement, valuesEnd + 1);
+    if (statement[next] !== ",") {
+      break;
+    }
+    cursor = next + 1;
   }
-  const row = {};
-  for (let i = 0; i < columns.length; i += 1) {
-    row[columns[i]] = parseValueToken(values[i]);
+  return { table, rows };
+}
+
+function parseRemovalStatement(statement) {
+  const match =
+    statement.match(
+      /^update\s+public\.(study_items)\s+set\s+is_active\s*=\s*false\s+where\s+source_key\s+in\s*\(/i
+    ) || statement.match(/^delete\s+from\s+public\.([a-z_]+)\s+where\s+source_key\s+in\s*\(/i);
+  if (!match) {
+    throw new Error(`Unsupported statement: ${statement.slice(0, 80)}`);
   }
-  return { table, row };
+  const table = match[1];
+  const listStart = match[0].length - 1;
+  const listEnd = findMatchingParen(statement, listStart);
+  const keys = splitValues(statement.slice(listStart + 1, listEnd)).map(parseValueToken);
+  return { table, action: /^update/i.test(statement) ? "deactivate" : "delete", keys };
 }
 
 function parsePipelineSql(sqlText) {
@@ -318,24 +356,36 @@ function parsePipelineSql(sqlText) {
   for (const table of EXPECTED_TABLES) {
     rowsByTable[table] = [];
   }
+  const removals = [];
   let cursor = 0;
   while (true) {
-    const start = findNextInsert(sqlText, cursor);
+    const start = findNextStatement(sqlText, cursor);
     if (start === -1) {
       break;
     }
     const end = findStatementEnd(sqlText, start);
     const statement = sqlText.slice(start, end + 1);
+    if (!/^insert/i.test(statement)) {
+      const removal = parseRemovalStatement(statement);
+      if (!EXPECTED_TABLES.has(removal.table)) {
+        throw new Error(`Unexpected table in SQL: ${removal.table}`);
+      }
+      removals.push(removal);
+      cursor = end + 1;
+      continue;
+    }
     const parsed = parseInsertStatement(statement);
     if (parsed) {
       if (!EXPECTED_TABLES.has(parsed.table)) {
         throw new Error(`Unexpected table in SQL: ${parsed.table}`);
       }
-      rowsByTable[parsed.table].push(parsed.row);
+      for (const row of parsed.rows) {
+        rowsByTable[parsed.table].push(row);
+      }
     }
     cursor = end + 1;
   }
-  return rowsByTable;
+  return { rowsByTable, removals };
 }
 
 function isRef(value) {
@@ -458,6 +508,30 @@ async function upsertInChunks(supabase, table, rows, onConflict, chunkSize) {
   }
 }
 
+async function applyRemovals(supabase, removals, chunkSize) {
+  for (const { table, action, keys } of removals) {
+    for (let i = 0; i < keys.length; i += chunkSize) {
+      const chunk = keys.slice(i, i + chunkSize);
+      await withRetry(
+        async () => {
+          const query =
+            action === "deactivate"
+              ? supabase.from(table).update({ is_active: false }).in("source_key", chunk).eq("is_active", true)
+              : supabase.from(table).delete().in("source_key", chunk);
+          const { error } = await query;
+          if (error) {
+            throw new Error(error.message);
+          }
+        },
+        `${action} ${table} chunk ${Math.floor(i / chunkSize) + 1}`,
+        3,
+        700
+      );
+    }
+    console.log(`[${table}] ${action} ${keys.length} rows`);
+  }
+}
+
 async function countRows(supabase, table) {
   const { count } = await withRetry(
     async () => {
@@ -477,6 +551,9 @@ async function countRows(supabase, table) {
 }
 
 async function main() {
+  // Loaded here so the SQL parser can be required (by tests) without them.
+  require("dotenv").config();
+  const { createClient } = require("@supabase/supabase-js");
   const args = parseArgs(process.argv.slice(2));
   const supabaseUrl = requireEnv("SUPABASE_URL");
   const serviceKey = requireEnv("SUPABASE_SERVICE_ROLE_KEY");
@@ -486,12 +563,16 @@ async function main() {
   }
 
   const sqlText = fs.readFileSync(PIPELINE_PATH, "utf-8");
-  const rowsByTable = parsePipelineSql(sqlText);
+  const { rowsByTable, removals } = parsePipelineSql(sqlText);
 
   const totals = Object.fromEntries(
     Object.entries(rowsByTable).map(([table, rows]) => [table, rows.length])
   );
   console.log("Parsed pipeline rows:", totals);
+  if (removals.length) {
+    const removed = removals.reduce((sum, removal) => sum + removal.keys.length, 0);
+    console.log(`Parsed removals: ${removed} rows in ${removals.length} statements`);
+  }
 
   if (args.dryRun) {
     console.log("Dry run complete.");
@@ -573,6 +654,14 @@ async function main() {
     args.chunkSize
   );
 
+  await upsertInChunks(
+    supabase,
+    "text_blobs",
+    rowsByTable.text_blobs,
+    "hash",
+    args.chunkSize
+  );
+
   await upsertInChunks(
     supabase,
     "study_items",
@@ -656,9 +745,13 @@ async function main() {
     args.chunkSize
   );
 
+  // Removals come last in the SQL too, children before study_items.
+  await applyRemovals(supabase, removals, fetchChunkSize);
+
   if (args.verify) {
     const tableOrder = [
       "ingest_runs",
+      "text_blobs",
       "study_items",
       "item_choices",
       "item_parts",
@@ -676,7 +769,11 @@ async function main() {
   console.log("Import complete.");
 }
 
-main().catch((error) => {
-  console.error(error.message || error);
-  process.exit(1);
-});
+module.exports = { parseInsertStatement, parseRemovalStatement, parsePipelineSql };
+
+if (require.main === module) {
+  main().catch((error) => {
+    console.error(error.message || error);
+    process.exit(1);
+  });
+}
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Iterable, List, Optional
+
+DEFAULT_MAX_ENTRIES = 12
+
+
+def fingerprint(parts: Iterable[Any]) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def directory_fingerprint(path: Path) -> str:
+    if not path.exists():
+        return fingerprint(["missing", str(path)])
+    names = sorted(p.name for p in path.iterdir() if p.is_file() and p.name != ".DS_Store")
+    return fingerprint(names)
+
+
+def files_fingerprint(paths: Iterable[Path]) -> str:
+    return fingerprint(hashlib.sha256(path.read_bytes()).hexdigest() for path in paths)
+
+
+# One JSON file per source and key. Files from other versions are evicted on the
+# next store, and at most max_entries files are kept (least recently used go first).
+class ParseCache:
+    def __init__(self, directory: Path, version: str, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        if max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+        self.directory = directory
+        self.version = version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def entry_path(self, source: str, key: str) -> Path:
+        return self.directory / f"{source}--{self.version}--{key[:32]}.json"
+
+    def load(self, source: str, key: str) -> Optional[Any]:
+        path = self.entry_path(source, key)
+        entry = None
+        if path.exists():
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                entry = None
+        if not entry or entry.get("key") != key or entry.get("version") != self.version:
+            self.misses += 1
+            return None
+        self.hits += 1
+        os.utime(path)
+        return entry.get("value")
+
+    def store(self, source: str, key: str, value: Any) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.entry_path(source, key)
+        tmp_path = path.with_suffix(".tmp")
+        payload = {"key": key, "version": self.version, "value": value}
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> List[Path]:
+        removed: List[Path] = []
+        entries = []
+        for path in self.directory.glob("*.json"):
+            if f"--{self.version}--" not in path.name:
+                path.unlink(missing_ok=True)
+                removed.append(path)
+                continue
+            entries.append((path.stat().st_mtime_ns, path.name, path))
+        entries.sort(reverse=True)
+        for _, _, path in entries[self.max_entries :]:
+            path.unlink(missing_ok=True)
+            removed.append(path)
+        return removed
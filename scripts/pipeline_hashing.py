@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+from json.encoder import encode_basestring
+from typing import Any, Callable, Dict, Sequence
+
+DEFAULT_CACHE_SIZE = 4096
+
+# Same settings as json.dumps(ensure_ascii=False, sort_keys=True, separators=(",", ":")),
+# but built once instead of on every call.
+CANONICAL_ENCODER = json.JSONEncoder(ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def canonical_json(payload: Any) -> str:
+    return CANONICAL_ENCODER.encode(payload)
+
+
+def encode_null(value: Any) -> str:
+    return "null"
+
+
+def encode_bool(value: bool) -> str:
+    return "true" if value else "false"
+
+
+# Exact types only: subclasses, floats and containers go through CANONICAL_ENCODER.
+SCALAR_ENCODERS: Dict[type, Callable[[Any], str]] = {
+    str: encode_basestring,
+    int: int.__repr__,
+    bool: encode_bool,
+    type(None): encode_null,
+}
+
+
+# Hashes a flat payload with a fixed set of fields. The digest is the sha256 of
+# canonical_json({field: value, ...}), so it matches hashes already stored in
+# content_hash columns, but the key order and "key": prefixes are worked out
+# once per row type instead of per row. Repeated payloads (the same caption or
+# asset path on several parts) are served from a bounded LRU cache.
+class RowHasher:
+    def __init__(self, fields: Sequence[str], cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        if len(set(fields)) != len(fields):
+            raise ValueError("fields must be unique")
+        self.fields = tuple(fields)
+        self.cache_size = cache_size
+        self.order = tuple(sorted(range(len(self.fields)), key=lambda index: self.fields[index]))
+        self.pairs = tuple((encode_basestring(self.fields[index]) + ":", index) for index in self.order)
+        self.cached = functools.lru_cache(maxsize=cache_size, typed=True)(self.digest)
+
+    def __call__(self, *values: Any) -> str:
+        try:
+            return self.cached(*values)
+        except TypeError:
+            # Unhashable values (lists of issues) skip the cache.
+            return self.digest(*values)
+
+    def text(self, *values: Any) -> str:
+        if len(values) != len(self.fields):
+            raise ValueError(f"expected {len(self.fields)} values for {self.fields}, got {len(values)}")
+        encoders = SCALAR_ENCODERS
+        fallback = CANONICAL_ENCODER.encode
+        parts = []
+        for prefix, index in self.pairs:
+            value = values[index]
+            parts.append(prefix + encoders.get(type(value), fallback)(value))
+        return "{" + ",".join(parts) + "}"
+
+    def digest(self, *values: Any) -> str:
+        return hashlib.sha256(self.text(*values).encode("utf-8")).hexdigest()
+
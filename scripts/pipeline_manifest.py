@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pipeline_hashing import canonical_json
+from pipeline_outputs import OutputReport, write_text_if_changed
+from pipeline_paths import PIPELINE_STATE_PATH as MANIFEST_PATH
+
+
+def table_digest(keys: Dict[str, str]) -> str:
+    return hashlib.sha256(canonical_json(keys).encode("utf-8")).hexdigest()
+
+
+# The manifest is the state file build_studio_pipeline.py rewrites after every
+# build: source_key -> content_hash per table, the source hashes the build read,
+# and one digest per table so unchanged tables are skipped without a key walk.
+@dataclass
+class PipelineManifest:
+    pipeline_version: Optional[str]
+    tables: Dict[str, Dict[str, str]]
+    sources: Dict[str, Dict[str, str]] = field(default_factory=dict)
+    table_digests: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PipelineManifest":
+        return cls(
+            pipeline_version=data.get("pipeline_version"),
+            tables=data.get("tables") or {},
+            sources=data.get("sources") or {},
+            table_digests=data.get("table_digests") or {},
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pipeline_version": self.pipeline_version,
+            "sources": self.sources,
+            "table_digests": self.table_digests,
+            "tables": self.tables,
+        }
+
+    def content_hash(self, table: str, source_key: str) -> Optional[str]:
+        return self.tables.get(table, {}).get(source_key)
+
+    def digest(self, table: str) -> str:
+        # Manifests written before table digests existed are hashed on demand.
+        if table not in self.table_digests:
+            self.table_digests[table] = table_digest(self.tables.get(table, {}))
+        return self.table_digests[table]
+
+
+# A build writes its manifest next to the applied one as <name>.pending.json.
+# It only replaces the applied manifest once its SQL is in the database, so a
+# --delta build after a build that was never applied still includes that
+# build's changes.
+def pending_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.pending{path.suffix}")
+
+
+def promote_pending(path: Path, report: Optional[OutputReport] = None) -> bool:
+    pending = pending_path(path)
+    if not pending.exists():
+        return False
+    os.replace(pending, path)
+    if report is not None:
+        report.add(path, True)
+    return True
+
+
+def load_manifest(path: Path) -> Optional[PipelineManifest]:
+    if not path.exists():
+        return None
+    return PipelineManifest.from_dict(json.loads(path.read_text(encoding="utf-8")))
+
+
+def write_manifest(path: Path, manifest: PipelineManifest, report: Optional[OutputReport] = None) -> bool:
+    return write_text_if_changed(path, canonical_json(manifest.to_dict()) + "\n", report)
+
+
+@dataclass
+class TableDiff:
+    table: str
+    added: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        return f"{self.table}: {len(self.added)} added, {len(self.changed)} changed, {len(self.removed)} removed"
+
+
+def diff_manifests(old: PipelineManifest, new: PipelineManifest) -> List[TableDiff]:
+    diffs: List[TableDiff] = []
+    for table in sorted(set(old.tables) | set(new.tables)):
+        if old.digest(table) == new.digest(table):
+            continue
+        before = old.tables.get(table, {})
+        after = new.tables.get(table, {})
+        diffs.append(
+            TableDiff(
+                table=table,
+                added=sorted(key for key in after if key not in before),
+                changed=sorted(key for key, value in after.items() if key in before and before[key] != value),
+                removed=sorted(key for key in before if key not in after),
+            )
+        )
+    return diffs
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Look up keys in, or diff, studio pipeline build manifests.")
+    parser.add_argument("--manifest", type=Path, default=MANIFEST_PATH, help="Manifest of the build to inspect.")
+    parser.add_argument("--against", type=Path, help="Older manifest; print the keys that changed since it.")
+    parser.add_argument("--table", help="Table to look up (with --key).")
+    parser.add_argument("--key", help="source_key to look up; prints its content_hash.")
+    parser.add_argument("--keys", action="store_true", help="With --against, list every changed key.")
+    parser.add_argument(
+        "--promote",
+        action="store_true",
+        help="Mark the last build as applied: its pending manifest replaces --manifest.",
+    )
+    args = parser.parse_args()
+
+    if args.promote:
+        if not promote_pending(args.manifest):
+            raise SystemExit(f"No pending manifest: {pending_path(args.manifest)}")
+        print(f"Promoted {pending_path(args.manifest).name} to {args.manifest}")
+        return
+
+    manifest = load_manifest(args.manifest)
+    if manifest is None:
+        raise SystemExit(f"Manifest not found: {args.manifest}")
+    if args.key:
+        if not args.table:
+            raise SystemExit("--key needs --table")
+        value = manifest.content_hash(args.table, args.key)
+        if value is None:
+            raise SystemExit(f"{args.table}: {args.key} not in manifest")
+        print(value)
+        return
+    if args.against:
+        old = load_manifest(args.against)
+        if old is None:
+            raise SystemExit(f"Manifest not found: {args.against}")
+        if old.pipeline_version != manifest.pipeline_version:
+            print(f"pipeline_version: {old.pipeline_version} -> {manifest.pipeline_version}")
+        for source, info in sorted(manifest.sources.items()):
+            previous = old.sources.get(source, {}).get("source_hash")
+            if previous != info.get("source_hash"):
+                print(f"{source}: source changed")
+        diffs = diff_manifests(old, manifest)
+        for table_diff in diffs:
+            print(table_diff.summary())
+            if args.keys:
+                for label, keys in (("+", table_diff.added), ("~", table_diff.changed), ("-", table_diff.removed)):
+                    for key in keys:
+                        print(f"  {label} {key}")
+        if not diffs:
+            print("No table changes.")
+        return
+    print(f"pipeline_version: {manifest.pipeline_version}")
+    for source, info in sorted(manifest.sources.items()):
+        print(f"{source}: {info.get('source_hash')}")
+    for table, keys in sorted(manifest.tables.items()):
+        print(f"{table}: {len(keys)} keys, digest {manifest.digest(table)[:12]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import inspect
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+ACTIVE: Optional["Metrics"] = None
+
+
+@dataclass
+class StageStats:
+    name: str
+    calls: int = 0
+    wall: float = 0.0
+    self_wall: float = 0.0
+    cpu: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    peak_memory: Optional[int] = None
+
+
+@dataclass
+class Instrument:
+    module: Any
+    attribute: str
+    stage: Optional[str] = None
+    rows: Optional[Callable[[Any, tuple], int]] = None
+    output: Optional[Callable[[tuple], Path]] = None
+
+    def stage_name(self) -> str:
+        if self.stage:
+            return self.stage
+        module_name = self.module.__name__
+        if module_name == "__main__":
+            module_name = Path(self.module.__file__).stem
+        return f"{module_name}.{self.attribute}"
+
+
+@dataclass
+class Frame:
+    child_wall: float = 0.0
+    peak: int = 0
+
+
+def count_rows(result: Any, args: tuple) -> int:
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, tuple) and result and all(isinstance(part, list) for part in result):
+        return sum(len(part) for part in result)
+    if result is None and args and isinstance(args[0], list):
+        return len(args[0])
+    return 0
+
+
+# Wall and CPU times include nested stages; self_wall excludes them, so the
+# self times of all stages add up to the instrumented part of the run.
+class Metrics:
+    def __init__(self, trace_memory: bool = False) -> None:
+        self.trace_memory = trace_memory
+        self.stages: Dict[str, StageStats] = {}
+        self.stack: List[Frame] = []
+        self.outer_peak = 0
+        self.started = time.perf_counter()
+        self.started_cpu = time.process_time()
+
+    def get(self, name: str) -> StageStats:
+        if name not in self.stages:
+            self.stages[name] = StageStats(name)
+        return self.stages[name]
+
+    def record(self, name: str, rows: int = 0, bytes: int = 0) -> None:
+        stats = self.get(name)
+        stats.rows += rows
+        stats.bytes += bytes
+
+    @contextlib.contextmanager
+    def stage(self, name: str, rows: int = 0, output: Optional[Path] = None) -> Iterator[StageStats]:
+        stats = self.get(name)
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            self.fold_peak(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        frame = Frame()
+        self.stack.append(frame)
+        started = time.perf_counter()
+        started_cpu = time.process_time()
+        try:
+            yield stats
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stack.pop()
+            stats.calls += 1
+            stats.wall += elapsed
+            stats.self_wall += elapsed - frame.child_wall
+            stats.cpu += time.process_time() - started_cpu
+            stats.rows += rows
+            if output is not None and output.exists():
+                stats.bytes += output.stat().st_size
+            if tracing:
+                peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+                stats.peak_memory = max(stats.peak_memory or 0, peak)
+                self.fold_peak(peak)
+            if self.stack:
+                self.stack[-1].child_wall += elapsed
+
+    def fold_peak(self, peak: int) -> None:
+        if self.stack:
+            self.stack[-1].peak = max(self.stack[-1].peak, peak)
+        else:
+            self.outer_peak = max(self.outer_peak, peak)
+
+    def wrap(self, function: Callable[..., Any], instrument: Instrument) -> Callable[..., Any]:
+        name = instrument.stage_name()
+        counter = instrument.rows or count_rows
+        if inspect.isgeneratorfunction(function):
+            return self.wrap_generator(function, name)
+
+        def measured(*args: Any, **kwargs: Any) -> Any:
+            output = instrument.output(args) if instrument.output else None
+            with self.stage(name, output=output) as stats:
+                result = function(*args, **kwargs)
+                stats.rows += counter(result, args)
+            return result
+
+        return measured
+
+    def wrap_generator(self, function: Callable[..., Iterator[Any]], name: str) -> Callable[..., Iterator[Any]]:
+        # A generator runs in slices between the caller's next() calls; each
+        # slice is timed as one call of the stage and each yielded item is a row.
+        def measured(*args: Any, **kwargs: Any) -> Iterator[Any]:
+            iterator = function(*args, **kwargs)
+            while True:
+                with self.stage(name) as stats:
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    stats.rows += 1
+                yield item
+
+        return measured
+
+    @contextlib.contextmanager
+    def patched(self, instruments: Iterable[Instrument]) -> Iterator["Metrics"]:
+        instruments = list(instruments)
+        originals = [getattr(item.module, item.attribute) for item in instruments]
+        for item, original in zip(instruments, originals):
+            setattr(item.module, item.attribute, self.wrap(original, item))
+        try:
+            yield self
+        finally:
+            for item, original in zip(instruments, originals):
+                setattr(item.module, item.attribute, original)
+
+    def as_dict(self, script: str) -> Dict[str, Any]:
+        peak = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            peak = max([self.outer_peak, tracemalloc.get_traced_memory()[1], *(frame.peak for frame in self.stack)])
+        return {
+            "script": script,
+            "wall": round(time.perf_counter() - self.started, 6),
+            "cpu": round(time.process_time() - self.started_cpu, 6),
+            "peak_memory": peak,
+            "stages": [
+                {
+                    **asdict(stats),
+                    "wall": round(stats.wall, 6),
+                    "self_wall": round(stats.self_wall, 6),
+                    "cpu": round(stats.cpu, 6),
+                }
+                for stats in self.stages.values()
+            ],
+        }
+
+
+def format_metrics(report: Dict[str, Any]) -> List[str]:
+    lines = [f"{'stage':<44} {'calls':>6} {'wall s':>9} {'self s':>9} {'cpu s':>9} {'rows':>9} {'bytes':>11} {'peak MiB':>9}"]
+    for stats in report["stages"]:
+        peak = stats["peak_memory"]
+        lines.append(
+            f"{stats['name']:<44} {stats['calls']:>6} {stats['wall']:>9.3f} {stats['self_wall']:>9.3f} "
+            f"{stats['cpu']:>9.3f} {stats['rows']:>9} {stats['bytes']:>11} "
+            f"{(peak / 2**20 if peak is not None else 0):>9.1f}"
+        )
+    peak = report["peak_memory"]
+    peak_text = f", peak {peak / 2**20:.1f} MiB" if peak is not None else ""
+    lines.append(f"total: {report['wall']:.3f}s wall, {report['cpu']:.3f}s cpu{peak_text}")
+    return lines
+
+
+def stage(name: str, rows: int = 0, output: Optional[Path] = None) -> Any:
+    if ACTIVE is None:
+        return contextlib.nullcontext()
+    return ACTIVE.stage(name, rows=rows, output=output)
+
+
+def record(name: str, rows: int = 0, bytes: int = 0) -> None:
+    if ACTIVE is not None:
+        ACTIVE.record(name, rows=rows, bytes=bytes)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print wall/CPU time, rows, bytes written and peak memory per stage to stderr.",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=Path,
+        help="Write the per-stage metrics as JSON to this path.",
+    )
+
+
+def enabled(args: argparse.Namespace) -> bool:
+    return bool(getattr(args, "profile", False) or getattr(args, "metrics_json", None))
+
+
+@contextlib.contextmanager
+def profiled(args: argparse.Namespace, script: str, instruments: Iterable[Instrument]) -> Iterator[Optional[Metrics]]:
+    global ACTIVE
+    if not enabled(args):
+        yield None
+        return
+    metrics = Metrics(trace_memory=True)
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    ACTIVE = metrics
+    try:
+        with metrics.patched(instruments):
+            yield metrics
+    finally:
+        ACTIVE = None
+        report = metrics.as_dict(script)
+        if started_tracing:
+            tracemalloc.stop()
+        if args.profile:
+            for line in format_metrics(report):
+                print(line, file=sys.stderr)
+        if args.metrics_json:
+            args.metrics_json.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import argparse
+import filecmp
+import gzip
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Iterable, List, Optional
+
+# Separators json.dumps uses for the smallest output.
+MINIFIED_SEPARATORS = (",", ":")
+COPY_CHUNK_BYTES = 1 << 16
+
+
+def temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.tmp")
+
+
+# Records which build outputs were rewritten so callers (and the CDN/deploy
+# steps after them) can tell real changes from reruns over the same sources.
+@dataclass
+class OutputReport:
+    written: List[Path] = field(default_factory=list)
+    unchanged: List[Path] = field(default_factory=list)
+    removed: List[Path] = field(default_factory=list)
+
+    def add(self, path: Path, changed: bool) -> None:
+        (self.written if changed else self.unchanged).append(path)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.written or self.removed)
+
+    def summary(self) -> str:
+        return f"{len(self.written)} written, {len(self.unchanged)} unchanged, {len(self.removed)} removed"
+
+    def lines(self, root: Optional[Path] = None) -> List[str]:
+        def show(path: Path) -> str:
+            try:
+                return str(path.resolve().relative_to(root)) if root else str(path)
+            except ValueError:
+                return str(path)
+
+        return [
+            f"Outputs: {self.summary()}",
+            *(f"  + {show(path)}" for path in self.written),
+            *(f"  - {show(path)}" for path in self.removed),
+        ]
+
+
+def replace_if_changed(tmp_path: Path, path: Path, report: Optional[OutputReport] = None) -> bool:
+    # Keeps the existing file (and its mtime) when the new content is identical;
+    # otherwise the rename makes the update atomic for readers.
+    changed = not path.exists() or not filecmp.cmp(tmp_path, path, shallow=False)
+    if changed:
+        os.replace(tmp_path, path)
+    else:
+        tmp_path.unlink()
+    if report is not None:
+        report.add(path, changed)
+    return changed
+
+
+def write_text_if_changed(path: Path, text: str, report: Optional[OutputReport] = None) -> bool:
+    data = text.encode("utf-8")
+    try:
+        changed = path.read_bytes() != data
+    except FileNotFoundError:
+        changed = True
+    if changed:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = temp_path(path)
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+    if report is not None:
+        report.add(path, changed)
+    return changed
+
+
+# Streaming counterpart of write_text_if_changed: writes go to a temp sibling
+# that replaces the target on close only if the bytes differ.
+class AtomicOutput:
+    def __init__(self, path: Path, report: Optional[OutputReport] = None, newline: Optional[str] = None) -> None:
+        self.path = path
+        self.report = report
+        self.tmp_path = temp_path(path)
+        self.handle: IO[str] = self.tmp_path.open("w", encoding="utf-8", newline=newline)
+        self.changed: Optional[bool] = None
+
+    def write(self, text: str) -> None:
+        self.handle.write(text)
+
+    def close(self) -> bool:
+        if self.changed is None:
+            self.handle.close()
+            self.changed = replace_if_changed(self.tmp_path, self.path, self.report)
+        return self.changed
+
+    def discard(self) -> None:
+        self.handle.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "AtomicOutput":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class JsonArrayStream:
+    # Writes the text json.dumps(list(items), ensure_ascii=False) would return
+    # with indent=2 (or minified separators), one item at a time. JSON strings
+    # escape newlines, so the replace only re-indents structure.
+    def __init__(self, output: AtomicOutput, minified: bool = False) -> None:
+        self.output = output
+        self.minified = minified
+        self.separator: Optional[str] = None
+
+    def add(self, item: Any) -> None:
+        if self.minified:
+            self.output.write(self.separator or "[")
+            self.output.write(json.dumps(item, ensure_ascii=False, separators=MINIFIED_SEPARATORS))
+            self.separator = ","
+        else:
+            self.output.write(self.separator or "[\n  ")
+            self.output.write(json.dumps(item, ensure_ascii=False, indent=2).replace("\n", "\n  "))
+            self.separator = ",\n  "
+
+    def finish(self) -> None:
+        if self.separator is None:
+            self.output.write("[]")
+        else:
+            self.output.write("]" if self.minified else "\n]")
+
+
+def write_json_array(output: AtomicOutput, items: Iterable[Any], minified: bool = False) -> None:
+    stream = JsonArrayStream(output, minified)
+    for item in items:
+        stream.add(item)
+    stream.finish()
+
+
+def write_json_value(output: AtomicOutput, value: Any, minified: bool = False) -> None:
+    # Same text as json.dumps with the same options, written chunk by chunk.
+    if minified:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=MINIFIED_SEPARATORS)
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False, indent=2)
+    for chunk in encoder.iterencode(value):
+        output.write(chunk)
+
+
+def minified_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.min{path.suffix}")
+
+
+def brotli_compressor() -> Optional[Any]:
+    try:
+        import brotli  # type: ignore
+    except ImportError:
+        return None
+    return brotli.Compressor(quality=11)
+
+
+def read_chunks(handle: IO[bytes]) -> Iterable[bytes]:
+    return iter(lambda: handle.read(COPY_CHUNK_BYTES), b"")
+
+
+def write_precompressed(path: Path, report: Optional[OutputReport] = None) -> bool:
+    # .gz and .br siblings for hosts that serve precompressed files as they
+    # are. gzip gets no name or mtime in its header, so unchanged input gives
+    # unchanged bytes. Without the optional brotli package a .br sibling would
+    # go stale, so it is removed instead.
+    gz_path = path.with_name(f"{path.name}.gz")
+    tmp_path = temp_path(gz_path)
+    with path.open("rb") as source, tmp_path.open("wb") as raw:
+        with gzip.GzipFile(filename="", mode="wb", fileobj=raw, compresslevel=9, mtime=0) as target:
+            for chunk in read_chunks(source):
+                target.write(chunk)
+    changed = replace_if_changed(tmp_path, gz_path, report)
+
+    br_path = path.with_name(f"{path.name}.br")
+    compressor = brotli_compressor()
+    if compressor is None:
+        if br_path.exists():
+            br_path.unlink()
+            if report is not None:
+                report.removed.append(br_path)
+            changed = True
+        return changed
+    tmp_path = temp_path(br_path)
+    with path.open("rb") as source, tmp_path.open("wb") as target:
+        for chunk in read_chunks(source):
+            target.write(compressor.process(chunk))
+        target.write(compressor.finish())
+    return replace_if_changed(tmp_path, br_path, report) or changed
+
+
+# Writes a JSON artifact, optionally with a minified <name>.min.json next to
+# it and precompressed siblings of both. Items stream to every variant at once,
+# so a generator is only consumed once.
+class JsonArtifact:
+    def __init__(
+        self, path: Path, report: Optional[OutputReport] = None, minified: bool = False, precompress: bool = False
+    ) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.outputs = [(AtomicOutput(path, report, newline="\n"), False)]
+        if minified:
+            self.outputs.append((AtomicOutput(minified_path(path), report, newline="\n"), True))
+        self.report = report
+        self.precompress = precompress
+        self.changed: Optional[bool] = None
+
+    def write_array(self, items: Iterable[Any]) -> None:
+        streams = [JsonArrayStream(output, minified) for output, minified in self.outputs]
+        for item in items:
+            for stream in streams:
+                stream.add(item)
+        for stream in streams:
+            stream.finish()
+
+    def write_value(self, value: Any) -> None:
+        for output, minified in self.outputs:
+            write_json_value(output, value, minified)
+
+    def close(self) -> bool:
+        if self.changed is None:
+            self.changed = False
+            for output, _ in self.outputs:
+                self.changed = output.close() or self.changed
+                if self.precompress:
+                    self.changed = write_precompressed(output.path, self.report) or self.changed
+        return self.changed
+
+    def discard(self) -> None:
+        for output, _ in self.outputs:
+            output.discard()
+
+    def __enter__(self) -> "JsonArtifact":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def add_json_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--minified",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Also write a minified <name>.min.json next to the output, the file app.js loads (default: on).",
+    )
+    parser.add_argument(
+        "--precompress",
+        action="store_true",
+        help="Write .gz (and, with the brotli package, .br) siblings of every JSON output.",
+    )
+
+
+def remove_stale(paths: List[Path], keep: List[Path], report: Optional[OutputReport] = None) -> None:
+    kept = set(keep)
+    for path in sorted(paths):
+        if path not in kept:
+            path.unlink(missing_ok=True)
+            if report is not None:
+                report.removed.append(path)
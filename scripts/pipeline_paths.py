@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+ROOT_PATH = Path(__file__).resolve().parent.parent
+PIPELINE_CHUNK_DIR = ROOT_PATH / "supabase" / "studio_pipeline_chunks"
+PIPELINE_STATE_PATH = ROOT_PATH / "supabase" / "studio_pipeline_state.json"
+CHUNK_INDEX_NAME = "chunk_index.json"
+
+
+def load_env() -> None:
+    env_path = ROOT_PATH / ".env"
+    if not env_path.exists():
+        return
+    for line in env_path.read_text(encoding="utf-8").splitlines():
+        raw = line.strip()
+        if not raw or raw.startswith("#") or "=" not in raw:
+            continue
+        key, value = raw.split("=", 1)
+        key = key.strip()
+        value = value.strip().strip('"').strip("'")
+        if key and key not in os.environ:
+            os.environ[key] = value
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Any, ClassVar, Dict, FrozenSet, Iterator, Optional, Sequence, Tuple, Type, TypeVar
+
+RowType = TypeVar("RowType", bound="PipelineRow")
+
+
+# Base for the per-table row records. Builders and emitters use attributes;
+# the read-only mapping methods serve table-generic code that looks fields up
+# by name (COPY columns, state hashes, ad-hoc tools).
+class PipelineRow:
+    __slots__ = ()
+    FIELDS: ClassVar[Tuple[str, ...]] = ()
+    FIELD_SET: ClassVar[FrozenSet[str]] = frozenset()
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self.FIELD_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key not in self.FIELD_SET:
+            return default
+        return getattr(self, key)
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def values_tuple(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, name) for name in self.FIELDS)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    @classmethod
+    def from_values(cls: Type[RowType], values: Sequence[Any]) -> RowType:
+        return cls(*values)
+
+
+def row_record(cls: Type[RowType]) -> Type[RowType]:
+    record = dataclass(slots=True)(cls)
+    record.FIELDS = tuple(item.name for item in fields(record))
+    record.FIELD_SET = frozenset(record.FIELDS)
+    return record
+
+
+@row_record
+class StudyItemRow(PipelineRow):
+    study_slug: str
+    item_type: str
+    source_system: str
+    source_key: str
+    source_version: str
+    source_hash: Optional[str]
+    content_hash: str
+    ingest_run_id: Optional[str]
+    year: Optional[int]
+    session: Optional[str]
+    category: Optional[str]
+    title: Optional[str]
+    stem: str
+    priority: Optional[str]
+    weight: Optional[str]
+    is_active: bool
+
+
+@row_record
+class ItemChoiceRow(PipelineRow):
+    item_source_key: str
+    label: str
+    choice_text: str
+    is_correct: bool
+    sort_order: Optional[int]
+    source_key: str
+    content_hash: str
+
+
+@row_record
+class ItemPartRow(PipelineRow):
+    item_source_key: str
+    part_type: str
+    label: Optional[str]
+    domain_key: Optional[str]
+    prompt: str
+    sort_order: Optional[int]
+    source_key: str
+    content_hash: str
+
+
+@row_record
+class ModelAnswerRow(PipelineRow):
+    item_source_key: str
+    part_source_key: Optional[str]
+    answer_text: Optional[str]
+    version: str
+    source_key: str
+    source_type: Optional[str]
+    source_system: Optional[str]
+    source_version: Optional[str]
+    content_hash: str
+    answer_blob: Optional[str] = None
+
+
+@row_record
+class ItemSourceRow(PipelineRow):
+    item_source_key: Optional[str]
+    part_source_key: Optional[str]
+    source_text: Optional[str]
+    source_key: str
+    source_blob: Optional[str] = None
+
+
+@row_record
+class ItemAssetRow(PipelineRow):
+    item_source_key: str
+    part_source_key: Optional[str]
+    asset_type: str
+    asset_path: str
+    source_key: str
+    content_hash: str
+
+
+@row_record
+class AssetAnnotationRow(PipelineRow):
+    asset_source_key: str
+    annotation_type: str
+    text: Optional[str]
+    match: Optional[bool]
+    confidence: Optional[float]
+    issues: Any
+    source_type: Optional[str]
+    llm_model: Optional[str]
+    llm_prompt_version: Optional[str]
+    llm_output_version: str
+    source_key: str
+    source_system: Optional[str]
+    source_version: Optional[str]
+    content_hash: str
+
+
+# A shared answer or source text; source_key is the sha256 of body and the
+# text_blobs primary key.
+@row_record
+class TextBlobRow(PipelineRow):
+    source_key: str
+    body: str
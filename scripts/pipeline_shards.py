@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import math
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Optional, TypeVar
+
+Parsed = TypeVar("Parsed")
+
+# Shards smaller than this cost more to ship to a worker than to parse.
+MIN_SHARD_LINES = 10_000
+
+
+def split_at_years(
+    lines: List[str], year_re: re.Pattern, shards: int, min_lines: Optional[int] = None
+) -> List[List[str]]:
+    # The raw exam files reset all parser state at a year header. Shards start
+    # at the blank line before one, so the parser enters each shard the way it
+    # would have reached that line in a serial run.
+    size = max(MIN_SHARD_LINES if min_lines is None else min_lines, math.ceil(len(lines) / max(shards, 1)))
+    cuts = [0]
+    for index in range(1, len(lines)):
+        if index - cuts[-1] >= size and not lines[index - 1].strip() and year_re.match(lines[index].strip()):
+            cuts.append(index - 1)
+    return [lines[start:end] for start, end in zip(cuts, cuts[1:] + [len(lines)])]
+
+
+def parse_sharded(
+    parse_lines: Callable[[List[str]], List[Parsed]], lines: List[str], year_re: re.Pattern, jobs: int = 1
+) -> List[Parsed]:
+    shards = split_at_years(lines, year_re, jobs) if jobs > 1 else [lines]
+    if len(shards) == 1:
+        return parse_lines(lines)
+    results: Optional[List[List[Parsed]]] = None
+    with ProcessPoolExecutor(max_workers=min(jobs, len(shards))) as executor:
+        futures = [executor.submit(parse_lines, shard) for shard in shards]
+        try:
+            results = [future.result() for future in futures]
+        except ValueError:
+            for future in futures:
+                future.cancel()
+    if results is None:
+        # A year-like line inside a question's text is not a real boundary and
+        # leaves its shard unfinished. The serial parse gives the right result
+        # or, for a genuinely broken file, the first error.
+        return parse_lines(lines)
+    return [item for result in results for item in result]
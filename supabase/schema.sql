@@ -576,11 +576,21 @@ create table if not exists public.ingest_runs (
   status text not null default 'completed' check (status in ('pending', 'completed', 'failed')),
   started_at timestamptz not null default now(),
   completed_at timestamptz,
+  row_count integer,
+  output_bytes bigint,
+  stats jsonb not null default '{}'::jsonb,
   check (char_length(source_system) <= 64),
   check (char_length(source_version) <= 64),
   check (char_length(pipeline_version) <= 64)
 );
 
+alter table if exists public.ingest_runs
+  add column if not exists row_count integer;
+alter table if exists public.ingest_runs
+  add column if not exists output_bytes bigint;
+alter table if exists public.ingest_runs
+  add column if not exists stats jsonb not null default '{}'::jsonb;
+
 create unique index if not exists idx_ingest_runs_source on public.ingest_runs
   (source_system, source_hash, pipeline_version);
 
@@ -593,6 +603,23 @@ create policy "Ingest runs are not accessible to clients"
   using (false)
   with check (false);
 
+create table if not exists public.pipeline_chunk_ledger (
+  chunk_hash text primary key,
+  chunk_file text not null,
+  pipeline_version text,
+  duration_ms integer not null,
+  applied_at timestamptz not null default now()
+);
+
+alter table if exists public.pipeline_chunk_ledger enable row level security;
+
+drop policy if exists "Pipeline chunk ledger is not accessible to clients" on public.pipeline_chunk_ledger;
+create policy "Pipeline chunk ledger is not accessible to clients"
+  on public.pipeline_chunk_ledger
+  for all
+  using (false)
+  with check (false);
+
 -- Item bank
 create table if not exists public.study_items (
   id uuid primary key default gen_random_uuid(),
@@ -761,12 +788,31 @@ create policy "Item parts are readable"
   to anon, authenticated
   using (true);
 
+-- Shared texts: answers and sources repeated across items are stored once
+-- and referenced by sha256 (build_studio_pipeline.py --text-blobs).
+create table if not exists public.text_blobs (
+  hash text primary key,
+  body text not null,
+  created_at timestamptz not null default now(),
+  check (char_length(hash) = 64)
+);
+
+alter table if exists public.text_blobs enable row level security;
+
+drop policy if exists "Text blobs are readable" on public.text_blobs;
+create policy "Text blobs are readable"
+  on public.text_blobs
+  for select
+  to anon, authenticated
+  using (true);
+
 -- Model answers
 create table if not exists public.item_model_answers (
   id uuid primary key default gen_random_uuid(),
   item_id uuid not null references public.study_items(id) on delete cascade,
   part_id uuid references public.item_parts(id) on delete cascade,
-  answer_text text not null,
+  answer_text text,
+  answer_blob text references public.text_blobs(hash),
   version text not null,
   source_key text not null unique,
   source_type public.source_type not null default 'human',
@@ -776,10 +822,30 @@ create table if not exists public.item_model_answers (
   created_at timestamptz not null default now(),
   updated_at timestamptz not null default now(),
   check (part_id is not null or item_id is not null),
+  constraint item_model_answers_text_present check (answer_text is not null or answer_blob is not null),
   check (char_length(version) <= 64),
   check (source_type <> 'llm' or (source_system is not null and source_version is not null))
 );
 
+alter table if exists public.item_model_answers
+  add column if not exists answer_blob text references public.text_blobs(hash);
+alter table if exists public.item_model_answers
+  alter column answer_text drop not null;
+
+-- Tables created before text_blobs get the check that replaces not null.
+do $$
+begin
+  if not exists (
+    select 1 from pg_constraint
+    where conname = 'item_model_answers_text_present'
+      and conrelid = 'public.item_model_answers'::regclass
+  ) then
+    alter table public.item_model_answers
+      add constraint item_model_answers_text_present
+      check (answer_text is not null or answer_blob is not null);
+  end if;
+end $$;
+
 create index if not exists idx_item_model_answers_item_id on public.item_model_answers (item_id);
 create index if not exists idx_item_model_answers_part_id on public.item_model_answers (part_id);
 
@@ -869,13 +935,33 @@ create table if not exists public.item_sources (
   id uuid primary key default gen_random_uuid(),
   item_id uuid references public.study_items(id) on delete cascade,
   part_id uuid references public.item_parts(id) on delete cascade,
-  source_text text not null,
+  source_text text,
+  source_blob text references public.text_blobs(hash),
   source_key text not null unique,
   created_at timestamptz not null default now(),
   updated_at timestamptz not null default now(),
-  check (item_id is not null or part_id is not null)
+  check (item_id is not null or part_id is not null),
+  constraint item_sources_text_present check (source_text is not null or source_blob is not null)
 );
 
+alter table if exists public.item_sources
+  add column if not exists source_blob text references public.text_blobs(hash);
+alter table if exists public.item_sources
+  alter column source_text drop not null;
+
+do $$
+begin
+  if not exists (
+    select 1 from pg_constraint
+    where conname = 'item_sources_text_present'
+      and conrelid = 'public.item_sources'::regclass
+  ) then
+    alter table public.item_sources
+      add constraint item_sources_text_present
+      check (source_text is not null or source_blob is not null);
+  end if;
+end $$;
+
 create index if not exists idx_item_sources_item_id on public.item_sources (item_id);
 create index if not exists idx_item_sources_part_id on public.item_sources (part_id);
 
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import apply_studio_pipeline_chunks as applier  # noqa: E402
+import build_studio_pipeline as pipeline  # noqa: E402
+
+TEST_DSN = os.environ.get("STUDIO_PIPELINE_TEST_DSN")
+
+
+class RecordingCursor:
+    def __init__(self, connection: "RecordingConnection") -> None:
+        self.connection = connection
+
+    def __enter__(self) -> "RecordingCursor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+    def execute(self, sql, params=None) -> None:
+        if "fail" in sql:
+            raise RuntimeError("boom")
+        self.connection.executed.append(sql)
+        if sql.startswith("insert into public.pipeline_chunk_ledger"):
+            self.connection.ledger.append(params[0])
+
+    def fetchall(self):
+        return [(digest,) for digest in self.connection.ledger]
+
+
+class RecordingConnection:
+    def __init__(self) -> None:
+        self.executed = []
+        self.ledger = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self) -> RecordingCursor:
+        return RecordingCursor(self)
+
+    def commit(self) -> None:
+        self.commits += 1
+
+    def rollback(self) -> None:
+        self.rollbacks += 1
+
+    def close(self) -> None:
+        return None
+
+
+def write_tiered_chunks(output_dir: Path, statements) -> None:
+    writer = pipeline.TieredChunkWriter(output_dir, 10_000, max_statements=1)
+    for table, statement in statements:
+        writer.write(table, statement)
+    writer.close()
+
+
+class ChunkPlanTest(unittest.TestCase):
+    def test_plan_follows_chunk_index_tiers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            write_tiered_chunks(
+                output_dir,
+                [
+                    ("study_items", "select 1;"),
+                    ("item_choices", "select 2;"),
+                    ("item_parts", "select 3;"),
+                ],
+            )
+            plan = applier.load_chunk_plan(output_dir)
+        self.assertEqual([tier.name for tier in plan], ["items", "parts_choices"])
+        self.assertEqual([path.name for path in plan[1].chunks], ["chunk_002.sql", "chunk_003.sql"])
+        self.assertTrue(plan[1].parallel)
+        self.assertFalse(plan[0].parallel)
+
+    def test_plan_without_index_is_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            pipeline.write_chunked_pipeline(output_dir, ["select 1;", "select 2;"], 1)
+            plan = applier.load_chunk_plan(output_dir)
+        self.assertEqual(len(plan), 1)
+        self.assertFalse(plan[0].parallel)
+        self.assertEqual(len(plan[0].chunks), 2)
+
+    def test_chunk_body_drops_transaction_wrapper(self):
+        text = "-- Generated\n-- pipeline_version: v1\nbegin;\nselect 1;\ncommit;\n"
+        self.assertEqual(applier.chunk_body(text), "-- Generated\n-- pipeline_version: v1\nselect 1;\n")
+        self.assertEqual(applier.chunk_pipeline_version(text), "v1")
+
+    def test_chunk_body_keeps_statements_without_wrapper(self):
+        text = "-- Generated\nBEGIN;\nselect 1;\nCOMMIT;\n\n"
+        self.assertEqual(applier.chunk_body(text), "-- Generated\nselect 1;\n")
+        self.assertEqual(applier.chunk_body("select 1;\nselect 2;"), "select 1;\nselect 2;\n")
+
+
+class ApplyChunksTest(unittest.TestCase):
+    def test_skips_ledger_hashes_and_stops_after_failed_tier(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            write_tiered_chunks(
+                output_dir,
+                [
+                    ("study_items", "select 1;"),
+                    ("item_choices", "select 2;"),
+                    ("item_parts", "select fail;"),
+                    ("asset_annotations", "select 4;"),
+                ],
+            )
+            plan = applier.load_chunk_plan(output_dir)
+            done = applier.chunk_hash((output_dir / "chunk_001.sql").read_text(encoding="utf-8"))
+            connection = RecordingConnection()
+            pool = applier.ConnectionPool(lambda: connection, 1)
+            results = list(applier.apply_chunks(plan, pool, 2, {done}))
+        statuses = {result.path.name: result.status for result in results}
+        self.assertEqual(
+            statuses, {"chunk_001.sql": "skipped", "chunk_002.sql": "applied", "chunk_003.sql": "failed"}
+        )
+        self.assertEqual(connection.rollbacks, 1)
+        self.assertTrue(any("pipeline_chunk_ledger" in sql for sql in connection.executed))
+
+    def test_rerun_skips_chunks_recorded_in_the_ledger(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            write_tiered_chunks(
+                output_dir,
+                [("study_items", "select 1;"), ("item_choices", "select 2;"), ("item_parts", "select 3;")],
+            )
+            plan = applier.load_chunk_plan(output_dir)
+            connection = RecordingConnection()
+            pool = applier.ConnectionPool(lambda: connection, 1)
+            first = list(applier.apply_chunks(plan, pool, 2, set()))
+            executed = len(connection.executed)
+            second = list(applier.apply_chunks(plan, pool, 2, applier.applied_hashes(connection)))
+        self.assertEqual([result.status for result in first], ["applied"] * 3)
+        self.assertEqual([result.status for result in second], ["skipped"] * 3)
+        self.assertEqual(connection.executed[executed:], ["select chunk_hash from public.pipeline_chunk_ledger"])
+        chunk_sql = [sql for sql in connection.executed if "select " in sql and "ledger" not in sql]
+        self.assertEqual(len(chunk_sql), 3)
+        for sql in chunk_sql:
+            self.assertNotIn("begin;", sql)
+            self.assertNotIn("commit;", sql)
+
+
+@unittest.skipUnless(TEST_DSN, "set STUDIO_PIPELINE_TEST_DSN to run against a local Postgres")
+class PostgresApplyTest(unittest.TestCase):
+    def test_rerun_skips_applied_chunks(self):
+        table = "pipeline_chunk_apply_test"
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            write_tiered_chunks(
+                output_dir,
+                [
+                    ("study_items", f"create table if not exists public.{table} (id int primary key);"),
+                    ("item_choices", f"insert into public.{table} values (1) on conflict do nothing;"),
+                    ("item_parts", f"insert into public.{table} values (2) on conflict do nothing;"),
+                ],
+            )
+            plan = applier.load_chunk_plan(output_dir)
+            pool = applier.ConnectionPool(lambda: applier.connect(TEST_DSN), 2)
+            try:
+                connection = pool.acquire()
+                applier.ensure_ledger(connection)
+                with connection.cursor() as cursor:
+                    cursor.execute(f"drop table if exists public.{table}")
+                    cursor.execute("delete from public.pipeline_chunk_ledger")
+                connection.commit()
+                pool.release(connection)
+
+                first = list(applier.apply_chunks(plan, pool, 2, set()))
+                connection = pool.acquire()
+                skip = applier.applied_hashes(connection)
+                pool.release(connection)
+                second = list(applier.apply_chunks(plan, pool, 2, skip))
+
+                connection = pool.acquire()
+                with connection.cursor() as cursor:
+                    cursor.execute(f"select count(*) from public.{table}")
+                    count = cursor.fetchone()[0]
+                    cursor.execute(f"drop table public.{table}")
+                connection.commit()
+                pool.release(connection)
+            finally:
+                pool.close()
+        self.assertEqual([result.status for result in first], ["applied"] * 3)
+        self.assertEqual([result.status for result in second], ["skipped"] * 3)
+        self.assertEqual(count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import benchmark_pipeline as benchmark  # noqa: E402
+import convert_kortsvar  # noqa: E402
+import convert_rawdata  # noqa: E402
+
+
+class StageTimesTest(unittest.TestCase):
+    def test_stage_times_use_self_time_per_group(self):
+        metrics = benchmark.Metrics()
+        with metrics.stage("rows"):
+            time.sleep(0.01)
+            with metrics.stage("hashing"):
+                time.sleep(0.02)
+        times = benchmark.stage_times(metrics)
+        self.assertEqual(list(times), benchmark.STAGES)
+        self.assertGreaterEqual(times["hashing"], 0.02)
+        self.assertLess(times["rows"], 0.02)
+        self.assertEqual(times["parse"], 0.0)
+
+
+class CorpusTest(unittest.TestCase):
+    def test_year_lines_shift_into_separate_blocks(self):
+        text = "2024 ordinær\n\nSpørgsmål 1 - Cellebiologi\n2025 er ikke en overskrift her\n\n2025\n"
+        offsets = benchmark.replica_offsets(3, 2024, 2025)
+        self.assertEqual(offsets, [0, 2, 4])
+        shifted = benchmark.shift_year_lines(text, convert_rawdata.YEAR_HEADER_RE, 4)
+        self.assertTrue(shifted.startswith("2028 ordinær\n"))
+        self.assertIn("\n2029\n", shifted)
+        self.assertIn("2025 er ikke en overskrift her", benchmark.shift_year_lines(text, convert_rawdata.YEAR_HEADER_RE, 0))
+
+    def test_replicas_must_fit_four_digit_years(self):
+        with self.assertRaises(ValueError):
+            benchmark.replica_offsets(1000, 2010, 2025)
+
+
+class PathologicalInputTest(unittest.TestCase):
+    def test_shapes_parse_at_the_requested_size(self):
+        for shape in benchmark.PATHOLOGICAL_SHORT:
+            with self.subTest(shape=shape):
+                text = benchmark.pathological_text(shape, 3000)
+                self.assertGreaterEqual(text.count("\n"), 3000)
+                self.assertTrue(convert_kortsvar.parse_raw_data(text))
+
+
+class CompareResultsTest(unittest.TestCase):
+    def make_results(self, parse: float, memory: int) -> dict:
+        stages = {stage: 0.1 for stage in benchmark.STAGES}
+        stages["parse"] = parse
+        return {"scales": {"10": {"stages": stages, "total": sum(stages.values()), "peak_memory": memory}}}
+
+    def test_flags_slow_stages_and_memory_growth(self):
+        baseline = self.make_results(1.0, 100 * 2**20)
+        current = self.make_results(1.5, 200 * 2**20)
+        regressions = benchmark.compare_results(current, baseline, 1.25, 1.25, 0.05)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(regressions[0].startswith("x10 parse: 1.000s -> 1.500s"))
+        self.assertTrue(regressions[-1].startswith("x10 peak memory"))
+
+    def test_ignores_small_absolute_changes(self):
+        baseline = self.make_results(0.01, 100)
+        current = self.make_results(0.03, 100)
+        self.assertEqual(benchmark.compare_results(current, baseline, 1.25, 1.25, 0.05), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
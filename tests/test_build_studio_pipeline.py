@@ -0,0 +1,539 @@
+from __future__ import annotations
+
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+import unittest
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import build_studio_pipeline as pipeline  # noqa: E402
+from pipeline_rows import ItemAssetRow, ItemChoiceRow, ItemSourceRow, ModelAnswerRow  # noqa: E402
+
+
+def make_choice(item_key: str, label: str, text: str = "Svar") -> ItemChoiceRow:
+    return ItemChoiceRow(
+        item_source_key=item_key,
+        label=label,
+        choice_text=text,
+        is_correct=label == "A",
+        sort_order=ord(label) - ord("A"),
+        source_key=f"{item_key}:choice:{label}",
+        content_hash=pipeline.content_hash({"label": label, "text": text}),
+    )
+
+
+class TableStatementsTest(unittest.TestCase):
+    def test_single_row_batches_match_per_row_builder(self):
+        choices = [make_choice("human:mcq:2025:na:1", label) for label in "ABCD"]
+        statements = pipeline.build_table_statements(pipeline.ITEM_CHOICES, choices, 1)
+        self.assertEqual(statements, [pipeline.build_choice_insert_sql(choice) for choice in choices])
+
+    def test_batches_group_rows_in_order(self):
+        choices = [make_choice("human:mcq:2025:na:1", label) for label in "ABCD"]
+        statements = pipeline.build_table_statements(pipeline.ITEM_CHOICES, choices, 3)
+        self.assertEqual(len(statements), 2)
+        self.assertIn(":choice:A", statements[0])
+        self.assertIn(":choice:C", statements[0])
+        self.assertIn(":choice:D", statements[1])
+        self.assertTrue(statements[0].endswith("excluded.content_hash;"))
+        self.assertIn("is distinct from excluded.content_hash", statements[1])
+
+    def test_repeated_source_key_starts_new_batch(self):
+        first = make_choice("human:mcq:2025:na:1", "A", "Gammel")
+        second = make_choice("human:mcq:2025:na:1", "A", "Ny")
+        statements = pipeline.build_table_statements(pipeline.ITEM_CHOICES, [first, second], 10)
+        self.assertEqual(len(statements), 2)
+        self.assertIn("'Gammel'", statements[0])
+        self.assertIn("'Ny'", statements[1])
+
+    def test_parallel_rendering_matches_serial_output(self):
+        choices = [make_choice(f"human:mcq:2025:na:{number}", label) for number in range(40) for label in "ABCD"]
+        choices.append(make_choice("human:mcq:2025:na:0", "A", "Dublet"))
+        serial = pipeline.build_table_statements(pipeline.ITEM_CHOICES, choices, 7)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            parallel = pipeline.build_table_statements(pipeline.ITEM_CHOICES, choices, 7, False, executor)
+        self.assertEqual(parallel, serial)
+
+    def test_deterministic_ids_reference_parent_ids_directly(self):
+        choice = make_choice("human:mcq:2025:na:1", "A")
+        statement = pipeline.build_table_statements(pipeline.ITEM_CHOICES, [choice], 1, True)[0]
+        item_id = pipeline.build_row_id("study_items", "human:mcq:2025:na:1")
+        choice_id = pipeline.build_row_id("item_choices", choice["source_key"])
+        self.assertIn("(id, item_id, label,", statement)
+        self.assertIn(f"values ('{choice_id}', '{item_id}', 'A',", statement)
+        self.assertNotIn("select id", statement)
+        self.assertEqual(item_id, pipeline.build_row_id("study_items", "human:mcq:2025:na:1"))
+
+
+def parse_with_importer(sql_path: Path) -> dict:
+    script = (
+        "const { parsePipelineSql } = require(process.argv[1]);"
+        "const rows = parsePipelineSql(require('fs').readFileSync(process.argv[2], 'utf-8'));"
+        "process.stdout.write(JSON.stringify(rows));"
+    )
+    importer = str(ROOT / "scripts" / "import_studio_pipeline.js")
+    result = subprocess.run(
+        ["node", "-e", script, importer, str(sql_path)], capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout)
+
+
+@unittest.skipUnless(shutil.which("node"), "node is not installed")
+class ImporterRoundTripTest(unittest.TestCase):
+    def test_importer_reads_every_row_of_batched_statements(self):
+        item_key = "human:mcq:2025:na:1"
+        choices = [make_choice(item_key, label, f"Svar ({label}), 'citeret'") for label in "ABCDE"]
+        build = pipeline.PipelineBuild(runs=[], tables=[(pipeline.ITEM_CHOICES, choices)])
+        with tempfile.TemporaryDirectory() as tmp:
+            sql_path = Path(tmp) / "pipeline.sql"
+            writer = pipeline.PipelineSqlWriter(sql_path)
+            for table, statement in pipeline.iter_pipeline_statements(pipeline.plan_pipeline_statements(build, 2)):
+                writer.write(table, statement)
+            writer.close()
+            statements = sql_path.read_text(encoding="utf-8").count("insert into public.item_choices")
+            rows = parse_with_importer(sql_path)["rowsByTable"]["item_choices"]
+        self.assertEqual(statements, 3)
+        self.assertEqual([row["source_key"] for row in rows], [choice.source_key for choice in choices])
+        self.assertEqual(rows[4]["choice_text"], "Svar (E), 'citeret'")
+        self.assertEqual(rows[0]["item_id"], {"__ref": {"table": "study_items", "column": "source_key", "value": item_key}})
+
+    def test_importer_reads_delta_removals(self):
+        removed = {"study_items": ["human:mcq:2025:na:9"], "item_choices": ["a:choice:A", "it's:choice:B"]}
+        with tempfile.TemporaryDirectory() as tmp:
+            sql_path = Path(tmp) / "pipeline.sql"
+            sql_path.write_text("\n".join(pipeline.build_removal_statements(removed)) + "\n", encoding="utf-8")
+            removals = parse_with_importer(sql_path)["removals"]
+            sql_path.write_text("truncate public.item_choices;\nupdate public.item_parts set sort_order = 1;\n")
+            with self.assertRaises(subprocess.CalledProcessError) as failure:
+                parse_with_importer(sql_path)
+        self.assertEqual(
+            removals,
+            [
+                {"table": "item_choices", "action": "delete", "keys": ["a:choice:A", "it's:choice:B"]},
+                {"table": "study_items", "action": "deactivate", "keys": ["human:mcq:2025:na:9"]},
+            ],
+        )
+        self.assertIn("Unsupported statement", failure.exception.stderr)
+
+
+class CopyPipelineTest(unittest.TestCase):
+    def test_copy_literal_escapes_text_format(self):
+        self.assertEqual(pipeline.copy_literal(None), "\\N")
+        self.assertEqual(pipeline.copy_literal(True), "t")
+        self.assertEqual(pipeline.copy_literal(3), "3")
+        self.assertEqual(pipeline.copy_literal("a\tb\nc\\d"), "a\\tb\\nc\\\\d")
+
+    def test_write_copy_pipeline_keeps_last_row_per_key(self):
+        first = make_choice("human:mcq:2025:na:1", "A", "Gammel")
+        second = make_choice("human:mcq:2025:na:1", "B")
+        third = make_choice("human:mcq:2025:na:1", "A", "Ny")
+        build = pipeline.PipelineBuild(
+            runs=[("run-id", "rawdata-mc", "abc")],
+            tables=[(pipeline.ITEM_CHOICES, [first, second, third])],
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            pipeline.write_copy_pipeline(output_dir, build)
+            lines = (output_dir / "item_choices.tsv").read_text(encoding="utf-8").splitlines()
+            merge = (output_dir / "merge.sql").read_text(encoding="utf-8")
+        self.assertEqual([line.split("\t")[2] for line in lines], ["Svar", "Ny"])
+        self.assertIn("\\copy staging_item_choices", merge)
+        self.assertIn("from staging_item_choices s left join public.study_items items", merge)
+        self.assertIn("where public.item_choices.content_hash is distinct from excluded.content_hash;", merge)
+
+    def test_write_copy_pipeline_uses_deterministic_ids(self):
+        choice = make_choice("human:mcq:2025:na:1", "A")
+        build = pipeline.PipelineBuild(runs=[], tables=[(pipeline.ITEM_CHOICES, [choice])])
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            pipeline.write_copy_pipeline(output_dir, build, deterministic_ids=True)
+            line = (output_dir / "item_choices.tsv").read_text(encoding="utf-8").splitlines()[0]
+            merge = (output_dir / "merge.sql").read_text(encoding="utf-8")
+        sql = pipeline.build_table_statements(pipeline.ITEM_CHOICES, [choice], 1, True)[0]
+        row_id = pipeline.build_row_id("item_choices", choice.source_key)
+        self.assertEqual(line.split("\t")[0], row_id)
+        self.assertIn(f"'{row_id}'", sql)
+        self.assertIn("create temp table staging_item_choices (id uuid, ", merge)
+        self.assertIn("insert into public.item_choices (id, item_id, ", merge)
+        self.assertIn("select s.id, items.id, ", merge)
+
+
+class StreamingWriterTest(unittest.TestCase):
+    def test_chunk_writer_streams_numbered_chunks(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            (output_dir / "chunk_009.sql").write_text("stale", encoding="utf-8")
+            writer = pipeline.ChunkWriter(output_dir, 2, 3)
+            for statement in ("select 1;", "select 2;", "select 3;"):
+                writer.write("item_choices", statement)
+            writer.close()
+            names = sorted(path.name for path in output_dir.glob("chunk_*.sql"))
+            last = (output_dir / "chunk_002.sql").read_text(encoding="utf-8")
+        self.assertEqual(names, ["chunk_001.sql", "chunk_002.sql"])
+        self.assertIn("-- chunk: 2/2\nbegin;\nselect 3;\ncommit;\n", last)
+
+    def test_schema_embed_writer_replaces_marker_block(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            schema_path = Path(tmp) / "schema.sql"
+            schema_path.write_text(
+                f"create table a ();\n\n{pipeline.MARKER_START}\nold;\n{pipeline.MARKER_END}\n\ncreate table b ();\n",
+                encoding="utf-8",
+            )
+            writer = pipeline.SchemaEmbedWriter(schema_path)
+            writer.write("study_items", "select 1;")
+            writer.close()
+            content = schema_path.read_text(encoding="utf-8")
+            leftovers = list(Path(tmp).glob(".*.tmp"))
+        self.assertNotIn("old;", content)
+        self.assertTrue(content.startswith(f"create table a ();\n\n{pipeline.MARKER_START}\n"))
+        self.assertTrue(content.endswith(f"select 1;\ncommit;\n{pipeline.MARKER_END}\n\ncreate table b ();\n"))
+        self.assertEqual(leftovers, [])
+
+    def test_schema_reference_writer_includes_data_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            schema_path = Path(tmp) / "supabase" / "schema.sql"
+            schema_path.parent.mkdir()
+            schema_path.write_text(
+                f"create table a ();\n\n{pipeline.MARKER_START}\nold;\n{pipeline.MARKER_END}\n", encoding="utf-8"
+            )
+            writer = pipeline.SchemaReferenceWriter(schema_path, Path(tmp) / "supabase" / "data" / "pipeline.sql")
+            writer.write("study_items", "select 1;")
+            writer.close()
+            content = schema_path.read_text(encoding="utf-8")
+        self.assertNotIn("select 1;", content)
+        self.assertIn("\\ir data/pipeline.sql\n" + pipeline.MARKER_END, content)
+        self.assertNotIn("begin;", content)
+
+    def test_tiered_chunks_respect_byte_budget_and_tiers(self):
+        statements = [
+            ("ingest_runs", "insert into public.ingest_runs values (1);"),
+            ("study_items", "insert into public.study_items values (1);"),
+            ("study_items", "insert into public.study_items values (2);"),
+            ("item_choices", "insert into public.item_choices values (1);"),
+            ("item_parts", "insert into public.item_parts values (1);"),
+            ("asset_annotations", "insert into public.asset_annotations values (1);"),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            writer = pipeline.TieredChunkWriter(output_dir, 200)
+            for table, statement in statements:
+                writer.write(table, statement)
+            writer.close()
+            index = json.loads((output_dir / pipeline.CHUNK_INDEX_NAME).read_text(encoding="utf-8"))
+            sizes = {path.name: path.stat().st_size for path in output_dir.glob("chunk_*.sql")}
+        tiers = {tier["name"]: tier for tier in index["tiers"]}
+        self.assertEqual(list(tiers), ["ingest_runs", "items", "parts_choices", "annotations"])
+        self.assertEqual(len(tiers["items"]["chunks"]), 2)
+        self.assertTrue(tiers["items"]["parallel"])
+        self.assertEqual(
+            [table for chunk in tiers["parts_choices"]["chunks"] for table in chunk["tables"]],
+            ["item_choices", "item_parts"],
+        )
+        self.assertFalse(tiers["annotations"]["parallel"])
+        self.assertEqual(index["total_chunks"], len(sizes))
+        for tier in index["tiers"]:
+            for chunk in tier["chunks"]:
+                self.assertEqual(chunk["bytes"], sizes[chunk["file"]])
+                self.assertLessEqual(chunk["bytes"], 200)
+
+    def test_plan_length_matches_streamed_statements(self):
+        choices = [make_choice("human:mcq:2025:na:1", label) for label in "ABCDE"]
+        build = pipeline.PipelineBuild(
+            runs=[("run-id", "rawdata-mc", "abc")],
+            tables=[(pipeline.ITEM_CHOICES, choices)],
+            removed={"study_items": ["human:mcq:2025:na:9"]},
+        )
+        plan = pipeline.plan_pipeline_statements(build, 2)
+        self.assertEqual(len(plan), len(list(pipeline.iter_pipeline_statements(plan))))
+
+    def test_repeated_keys_stay_out_of_parallel_chunks(self):
+        choices = [make_choice(f"human:mcq:2025:na:{number}", label) for number in range(6) for label in "AB"]
+        choices.append(make_choice("human:mcq:2025:na:0", "A", "Ny"))
+        build = pipeline.PipelineBuild(runs=[], tables=[(pipeline.ITEM_CHOICES, choices)])
+        plan = pipeline.plan_pipeline_statements(build, 1)
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            writer = pipeline.TieredChunkWriter(output_dir, 10_000, max_statements=4)
+            for table, statement in pipeline.iter_pipeline_statements(plan):
+                writer.write(table, statement)
+            writer.close()
+            index = json.loads((output_dir / pipeline.CHUNK_INDEX_NAME).read_text(encoding="utf-8"))
+            chunks = [path.read_text(encoding="utf-8") for path in sorted(output_dir.glob("chunk_*.sql"))]
+        self.assertTrue(index["tiers"][0]["parallel"])
+        repeated = [chunk for chunk in chunks if "'human:mcq:2025:na:0:choice:A'" in chunk]
+        self.assertEqual(len(repeated), 1)
+        self.assertIn("'Ny'", repeated[0])
+        self.assertEqual(sum(chunk.count("insert into") for chunk in chunks), 12)
+
+    def test_failed_build_leaves_no_temp_files(self):
+        build = pipeline.PipelineBuild(
+            runs=[("run-id", "rawdata-mc", "abc")],
+            tables=[(pipeline.ITEM_CHOICES, [make_choice("human:mcq:2025:na:1", label) for label in "ABC"])],
+        )
+
+        def failing_statements(plan, *args):
+            yield from list(pipeline.iter_pipeline_statements(plan))[:2]
+            raise RuntimeError("render failed")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            schema_path = root / "schema.sql"
+            schema_path.write_text("create table a ();\n", encoding="utf-8")
+            with mock.patch.object(pipeline, "build_pipeline_rows", return_value=build), mock.patch.object(
+                pipeline, "iter_pipeline_statements", failing_statements
+            ):
+                for chunk_bytes in (None, 4096):
+                    with self.subTest(chunk_bytes=chunk_bytes), self.assertRaises(RuntimeError):
+                        pipeline.build_pipeline(
+                            root / "pipeline.sql", schema_path, True, 1, root / "chunks", chunk_bytes=chunk_bytes
+                        )
+            leftovers = [path.name for path in root.rglob(".*.tmp")]
+            schema = schema_path.read_text(encoding="utf-8")
+        self.assertEqual(leftovers, [])
+        self.assertEqual(schema, "create table a ();\n")
+
+
+class RowValidatorTest(unittest.TestCase):
+    def test_reports_every_bad_row_across_tables(self):
+        choices = [make_choice("human:mcq:2025:na:1", label) for label in "ABCD"]
+        choices[1].choice_text = None
+        choices[2].is_correct = "ja"
+        choices[3] = choices[3].to_dict()
+        assets = [ItemAssetRow("x", None, "image", None, "x:asset", "h")]
+        with self.assertRaises(pipeline.RowValidationError) as caught:
+            pipeline.validate_rows([(pipeline.CHOICE_VALIDATOR, choices), (pipeline.ASSET_VALIDATOR, assets)])
+        violations = caught.exception.violations
+        self.assertEqual(
+            [(violation.table, violation.index) for violation in violations],
+            [("item_choices", 1), ("item_choices", 2), ("item_choices", 3), ("item_assets", 0)],
+        )
+        self.assertEqual(violations[0].source_key, "human:mcq:2025:na:1:choice:B")
+        self.assertEqual(violations[1].problem, "is_correct: expected bool, got str")
+        self.assertIn("4 problems in 4 rows", str(caught.exception))
+
+    def test_valid_rows_pass(self):
+        pipeline.validate_choices([make_choice("human:mcq:2025:na:1", label) for label in "AB"])
+
+
+def make_item(source_key: str, run_id: str = "run") -> pipeline.StudyItemRow:
+    return pipeline.StudyItemRow("human", "mcq", "rawdata-mc", source_key, "v1", None, "h", run_id, *[None] * 7, True)
+
+
+class ReferenceCheckTest(unittest.TestCase):
+    def test_reports_dangling_references_and_duplicate_keys(self):
+        item_key = "human:mcq:2025:na:1"
+        items = [make_item(item_key)]
+        choices = [make_choice(item_key, "A"), make_choice(item_key, "A"), make_choice("human:mcq:2025:na:2", "A")]
+        assets = [ItemAssetRow(item_key, "missing-part", "image", "a.png", f"{item_key}:asset", "h")]
+        with self.assertRaises(pipeline.IntegrityError) as caught:
+            pipeline.check_references(
+                [("study_items", items), ("item_choices", choices), ("item_assets", assets)], ["other-run"]
+            )
+        self.assertEqual(
+            [(violation.table, violation.index, violation.problem) for violation in caught.exception.violations],
+            [
+                ("item_choices", 1, "duplicate source_key (first at row 0)"),
+                ("study_items", 0, "ingest_run_id 'run' has no ingest_runs row"),
+                ("item_choices", 2, "item_source_key 'human:mcq:2025:na:2' has no study_items row"),
+                ("item_assets", 0, "part_source_key 'missing-part' has no item_parts row"),
+            ],
+        )
+
+    def test_repeated_annotation_keys_are_returned_not_raised(self):
+        asset = ItemAssetRow("item", None, "image", "a.png", "item:asset", "h")
+        annotation = pipeline.AssetAnnotationRow(
+            "item:asset", "audit", None, None, None, None, None, None, None, "legacy", "item:asset:audit", None, None, "h"
+        )
+        repeats = pipeline.check_references(
+            [
+                ("study_items", [make_item("item")]),
+                ("item_assets", [asset]),
+                ("asset_annotations", [annotation, annotation]),
+            ],
+            ["run"],
+        )
+        self.assertEqual([(violation.table, violation.index) for violation in repeats], [("asset_annotations", 1)])
+
+
+class PipelineRowTest(unittest.TestCase):
+    def test_rows_read_like_mappings_and_survive_the_parse_cache(self):
+        choices = [make_choice("human:mcq:2025:na:1", label) for label in "AB"]
+        self.assertEqual(choices[0]["label"], "A")
+        self.assertIsNone(choices[0].get("missing"))
+        self.assertEqual(list(choices[0].to_dict()), list(ItemChoiceRow.FIELDS))
+        items = []
+        cached = json.loads(json.dumps(pipeline.encode_cached_rows((items, choices))))
+        self.assertEqual(pipeline.decode_cached_rows("rawdata-mc", cached), (items, choices))
+
+
+class DeltaPipelineTest(unittest.TestCase):
+    def test_delta_emits_changed_rows_and_removes_missing_keys(self):
+        item_key = "human:mcq:2025:na:1"
+        previous_build = pipeline.PipelineBuild(
+            runs=[],
+            tables=[(pipeline.ITEM_CHOICES, [make_choice(item_key, label) for label in "ABC"])],
+        )
+        previous = pipeline.build_state(previous_build)
+        current = pipeline.PipelineBuild(
+            runs=[],
+            tables=[
+                (
+                    pipeline.ITEM_CHOICES,
+                    [make_choice(item_key, "A"), make_choice(item_key, "B", "Ændret"), make_choice(item_key, "D")],
+                )
+            ],
+        )
+        delta_build, deltas = pipeline.compute_delta(current, previous)
+        emitted = [row["source_key"] for row in delta_build.tables[0][1]]
+        self.assertEqual(emitted, [f"{item_key}:choice:B", f"{item_key}:choice:D"])
+        self.assertEqual(
+            deltas[0].summary(), "item_choices: 1 new, 1 changed, 1 unchanged, 1 removed"
+        )
+        statements = pipeline.build_removal_statements(delta_build.removed)
+        self.assertEqual(
+            statements,
+            [f"delete from public.item_choices where source_key in ('{item_key}:choice:C');"],
+        )
+
+    def test_removed_items_are_deactivated(self):
+        statements = pipeline.build_removal_statements({"study_items": ["human:mcq:2025:na:9"]})
+        self.assertEqual(
+            statements,
+            [
+                "update public.study_items set is_active = false "
+                "where source_key in ('human:mcq:2025:na:9') and is_active;"
+            ],
+        )
+
+    def test_removals_never_delete_parts_or_children_of_removed_rows(self):
+        item_key = "human:short:2025:na:1"
+        kept_key = "human:short:2025:na:2"
+        removed = {
+            "study_items": [item_key],
+            "item_parts": [f"{item_key}:part:p1", f"{kept_key}:part:p2"],
+            "item_model_answers": [f"{item_key}:part:p1:model_answer:v1", f"{kept_key}:part:p2:model_answer:v1"],
+            "item_sources": [f"{kept_key}:part:p1:source:0"],
+        }
+        statements = pipeline.build_removal_statements(removed)
+        self.assertFalse(any("item_parts" in statement for statement in statements))
+        self.assertEqual(
+            statements,
+            [
+                f"delete from public.item_sources where source_key in ('{kept_key}:part:p1:source:0');",
+                "update public.study_items set is_active = false "
+                f"where source_key in ('{item_key}') and is_active;",
+            ],
+        )
+
+    def test_readded_items_are_reactivated_by_both_apply_paths(self):
+        guard = "or not public.study_items.is_active"
+        self.assertTrue(pipeline.STUDY_ITEMS.conflict.endswith(guard))
+        staging = next(table for table in pipeline.STAGING_TABLES if table.emitter is pipeline.STUDY_ITEMS)
+        merge = pipeline.build_merge_sql(staging, Path("study_items.tsv"))[-1]
+        self.assertTrue(merge.endswith(f"{guard};"))
+
+    def test_state_from_other_pipeline_version_emits_everything(self):
+        build = pipeline.PipelineBuild(
+            runs=[], tables=[(pipeline.ITEM_CHOICES, [make_choice("human:mcq:2025:na:1", "A")])]
+        )
+        previous = pipeline.build_state(build)
+        previous["pipeline_version"] = "old"
+        delta_build, deltas = pipeline.compute_delta(build, previous)
+        self.assertEqual(len(delta_build.tables[0][1]), 1)
+        self.assertEqual(deltas[0].unchanged, 1)
+
+
+class RunStatsTest(unittest.TestCase):
+    def test_runs_are_completed_with_per_source_stats(self):
+        mcq_key = "human:mcq:2025:na:1"
+        short_key = "human:short:2025:na:1"
+        previous = pipeline.build_state(
+            pipeline.PipelineBuild(
+                runs=[],
+                tables=[(pipeline.ITEM_CHOICES, [make_choice(mcq_key, "A"), make_choice(short_key, "Z")])],
+            )
+        )
+        build = pipeline.PipelineBuild(
+            runs=[("mcq-run", "rawdata-mc", "abc"), ("short-run", "rawdata-kortsvar", "def")],
+            tables=[(pipeline.ITEM_CHOICES, [make_choice(mcq_key, "A"), make_choice(mcq_key, "B")])],
+            build_ms={"rawdata-mc": 12},
+        )
+        _, deltas = pipeline.compute_delta(build, previous)
+        run_stats = pipeline.collect_run_stats(build, deltas)
+        plan = pipeline.plan_pipeline_statements(build, 1, run_stats)
+        statements = list(pipeline.iter_pipeline_statements(plan))
+        self.assertEqual(len(plan), len(statements))
+        self.assertTrue(statements[0][1].endswith("'pending') on conflict (id) do nothing;"))
+        self.assertEqual([table for table, _ in statements[-2:]], ["run_stats", "run_stats"])
+
+        mcq, short = run_stats
+        self.assertEqual((mcq.row_count, mcq.build_ms), (2, 12))
+        self.assertEqual(mcq.to_dict()["item_choices"], {"rows": 2, "new": 1, "changed": 0, "unchanged": 1, "removed": 0})
+        self.assertEqual(short.to_dict()["item_choices"]["removed"], 1)
+        choice_bytes = sum(len(sql.encode("utf-8")) + 1 for table, sql in statements if table == "item_choices")
+        self.assertEqual((mcq.output_bytes, short.output_bytes), (choice_bytes, 0))
+        self.assertIn(f"'completed', 2, {choice_bytes}, ", statements[-2][1])
+        self.assertNotIn("build_ms", statements[-2][1])
+        self.assertIn("built in 12 ms", mcq.summary())
+        self.assertIn("from cache", short.summary())
+        self.assertEqual(pipeline.complete_ingest_run_sql(replace(mcq, build_ms=40)), statements[-2][1])
+        self.assertTrue(statements[-2][1].endswith("where ingest_runs.status = 'pending';"))
+
+    def test_plan_without_stats_keeps_completed_runs(self):
+        build = pipeline.PipelineBuild(runs=[("run-id", "rawdata-mc", "abc")], tables=[])
+        statements = list(pipeline.iter_pipeline_statements(pipeline.plan_pipeline_statements(build)))
+        self.assertEqual(statements, [("ingest_runs", pipeline.insert_ingest_run_sql("run-id", "rawdata-mc", "abc"))])
+        self.assertIn("'completed')", statements[0][1])
+
+
+class TextBlobTest(unittest.TestCase):
+    def test_only_repeated_long_texts_become_blobs(self):
+        shared = "Samme svar " * 20
+        answers = [
+            ModelAnswerRow(f"item:{index}", None, text, "v1", f"item:{index}:answer", "human", None, None, "h")
+            for index, text in enumerate([shared, shared, "Eget svar", "Kort", "Kort"])
+        ]
+        sources = [ItemSourceRow("item:0", None, shared, "item:0:source")]
+        build = pipeline.PipelineBuild(
+            runs=[], tables=[(pipeline.ITEM_MODEL_ANSWERS, answers), (pipeline.ITEM_SOURCES, sources)]
+        )
+        tables = pipeline.externalize_texts(build).tables
+        self.assertEqual(
+            [emitter for emitter, _ in tables],
+            [
+                pipeline.TEXT_BLOBS,
+                pipeline.ITEM_MODEL_ANSWERS,
+                pipeline.ITEM_MODEL_ANSWERS_BLOBS,
+                pipeline.ITEM_SOURCES,
+                pipeline.ITEM_SOURCES_BLOBS,
+            ],
+        )
+        key = pipeline.hash_text(shared)
+        blobs, inline_answers, blob_answers, inline_sources, blob_sources = [rows for _, rows in tables]
+        self.assertEqual([(blob.source_key, blob.body) for blob in blobs], [(key, shared)])
+        self.assertEqual([answer.answer_text for answer in inline_answers], ["Eget svar", "Kort", "Kort"])
+        self.assertEqual([(answer.answer_text, answer.answer_blob) for answer in blob_answers], [(None, key)] * 2)
+        self.assertEqual((inline_sources, blob_sources[0].source_blob), ([], key))
+
+        blob_sql = pipeline.TEXT_BLOBS.insert_sql(
+            [pipeline.TEXT_BLOBS.values_sql(blob, True) for blob in blobs], deterministic_ids=True
+        )
+        self.assertEqual(
+            blob_sql,
+            f"insert into public.text_blobs (hash, body) values ('{key}', '{shared}') on conflict (hash) do nothing;",
+        )
+        answer_sql = pipeline.build_table_statements(pipeline.ITEM_MODEL_ANSWERS_BLOBS, blob_answers[:1], 1)[0]
+        self.assertIn(f"null, '{key}', 'v1'", answer_sql)
+        self.assertNotIn(shared, answer_sql)
+
+
+if __name__ == "__main__":
+    unittest.main()
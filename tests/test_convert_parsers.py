@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import io
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import convert_kortsvar  # noqa: E402
+import convert_rawdata  # noqa: E402
+import convert_sygdomslaere  # noqa: E402
+import pipeline_shards  # noqa: E402
+
+MCQ_TEXT = """
+2025 - Sygeeksamen
+
+Spørgsmål 1 - Cellebiologi
+Hvilken struktur
+2024
+indeholder DNA?
+  A. Cellekernen (korrekt)
+B. Ribosomet
+C. Lysosomet
+D.Golgiapparatet
+
+Spørgsmål 2 - Bevægeapparatet
+Hvilket led?
+A. Albueleddet
+B. Knæleddet (KORREKT)
+C. Hofteleddet
+D. Skulderleddet
+"""
+
+
+class McqParserTest(unittest.TestCase):
+    def test_question_text_runs_until_the_first_option(self):
+        first, second = convert_rawdata.parse_raw_data(MCQ_TEXT)
+        self.assertEqual((first.year, first.session, first.number), (2025, "sygeeksamen", 1))
+        self.assertEqual(first.text, "Hvilken struktur 2024 indeholder DNA?")
+        self.assertEqual(
+            [(option.label, option.text, option.is_correct) for option in first.options],
+            [
+                ("A", "Cellekernen", True),
+                ("B", "Ribosomet", False),
+                ("C", "Lysosomet", False),
+                ("D", "Golgiapparatet", False),
+            ],
+        )
+        self.assertEqual((second.year, second.correct_label, second.options[1].text), (2025, "B", "Knæleddet"))
+
+    def test_options_must_follow_in_order(self):
+        text = MCQ_TEXT.replace("C. Hofteleddet", "\nC. Hofteleddet")
+        with self.assertRaisesRegex(ValueError, "Unexpected option format near question 2: ''"):
+            convert_rawdata.parse_raw_data(text)
+
+    def test_question_before_year_is_rejected(self):
+        with self.assertRaisesRegex(ValueError, "before a year header"):
+            convert_rawdata.parse_raw_data(MCQ_TEXT.replace("2025 - Sygeeksamen", ""))
+
+
+class StreamingParseTest(unittest.TestCase):
+    def test_file_lines_match_splitlines(self):
+        text = "2025\r\nlinje\x0cmed sideskift\n\nsidste"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "raw"
+            path.write_text(text, encoding="utf-8", newline="")
+            self.assertEqual(list(convert_rawdata.read_lines(path)), path.read_text(encoding="utf-8").splitlines())
+
+    def test_questions_are_yielded_as_they_complete(self):
+        text = MCQ_TEXT + "Spørgsmål 3 - Cellebiologi\nHvad?"
+        questions = convert_rawdata.iter_questions(convert_rawdata.iter_lines(io.StringIO(text)))
+        self.assertEqual(next(questions).number, 1)
+        self.assertEqual(next(questions).number, 2)
+        with self.assertRaises(ValueError):
+            next(questions)
+
+    def test_kortsvar_lookahead_reads_past_blank_lines(self):
+        text = "2025\nOpgave 1 Cellebiologi\nIntro til opgaven:\n\n\na) Hvad?\n  Svar her.\nb) Hvorfor?\n  Fordi.\n"
+        questions = list(convert_kortsvar.iter_questions(io.StringIO(text)))
+        self.assertEqual(questions, convert_kortsvar.parse_raw_data(text))
+        self.assertEqual(
+            [(question.label, question.opgave_intro, question.answer) for question in questions],
+            [("a", "Intro til opgaven", "Svar her."), ("b", "Intro til opgaven", "Fordi.")],
+        )
+
+    def test_kortsvar_lines_take_the_first_kind_they_match(self):
+        cases = {
+            "2025 - Ordinær": convert_kortsvar.YEAR,
+            "Hovedemne 2: Cellebiologi": convert_kortsvar.HOVEDEMNE,
+            "Cellebiologi": convert_kortsvar.HEADING,
+            "Underspørgsmål 1 - a) Hvad?": convert_kortsvar.UNDERSPOERG,
+            "h) Hvad?": convert_kortsvar.SUBQ,
+            "(p. 12)": convert_kortsvar.TEXT,
+            "   ": convert_kortsvar.BLANK,
+        }
+        for line, kind in cases.items():
+            with self.subTest(line=line):
+                self.assertEqual(convert_kortsvar.classify_line(line)[0], kind)
+        self.assertEqual(convert_kortsvar.classify_line("  Svar.")[:3], (convert_kortsvar.TEXT, "  Svar.", "Svar."))
+
+    def test_disease_payload_streams_rows(self):
+        text = "Sygdom\tEmne\tSymptomer\n\nAstma\tLunger\tHoste\nKOL\tLunger\n"
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "raw.txt"
+            path.write_text(text, encoding="utf-8")
+            header, rows = convert_sygdomslaere.parse_rows(convert_sygdomslaere.read_tsv(path))
+            self.assertEqual(convert_sygdomslaere.read_payload(path), convert_sygdomslaere.build_payload(rows, header))
+
+
+class ShardedParseTest(unittest.TestCase):
+    def test_shards_start_at_the_blank_line_before_a_year(self):
+        lines = ["2024", "a", "", "b", "", "2025", "c", "", "2026", "d"]
+        shards = pipeline_shards.split_at_years(lines, convert_rawdata.YEAR_HEADER_RE, 3, min_lines=2)
+        self.assertEqual(shards, [["2024", "a", "", "b"], ["", "2025", "c"], ["", "2026", "d"]])
+        self.assertEqual(pipeline_shards.split_at_years(lines, convert_rawdata.YEAR_HEADER_RE, 3), [lines])
+
+    def test_sharded_parse_matches_serial(self):
+        mcq = "\n".join(MCQ_TEXT.replace("2025", str(year)) for year in range(2015, 2025))
+        kortsvar = "\n".join(
+            f"{year}\nOpgave 1 Cellebiologi\nIntro til opgaven:\n\na) Hvad?\n  Svar her.\n" for year in range(2015, 2025)
+        )
+        for module, text in ((convert_rawdata, mcq), (convert_kortsvar, kortsvar)):
+            with self.subTest(module=module.__name__), mock.patch.object(pipeline_shards, "MIN_SHARD_LINES", 1):
+                self.assertEqual(module.parse_raw_data(text, jobs=3), module.parse_raw_data(text))
+
+    def test_year_inside_question_text_falls_back_to_serial(self):
+        text = MCQ_TEXT.replace("Hvilken struktur\n2024", "Hvilken struktur\n\n2024")
+        with mock.patch.object(pipeline_shards, "MIN_SHARD_LINES", 1):
+            questions = convert_rawdata.parse_raw_data(text, jobs=4)
+        self.assertEqual(questions, convert_rawdata.parse_raw_data(text))
+        self.assertEqual(questions[0].text, "Hvilken struktur 2024 indeholder DNA?")
+
+
+if __name__ == "__main__":
+    unittest.main()
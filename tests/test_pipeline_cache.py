@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+from pipeline_cache import ParseCache  # noqa: E402
+
+
+class ParseCacheTest(unittest.TestCase):
+    def test_load_returns_stored_rows(self):
+        rows = [[{"source_key": "a", "year": 2025, "is_active": True}], []]
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ParseCache(Path(tmp), "v1")
+            self.assertIsNone(cache.load("rawdata-mc", "abc"))
+            cache.store("rawdata-mc", "abc", rows)
+            reader = ParseCache(Path(tmp), "v1")
+            self.assertEqual(reader.load("rawdata-mc", "abc"), rows)
+            self.assertIsNone(reader.load("rawdata-mc", "other"))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual((reader.hits, reader.misses), (1, 1))
+
+    def test_store_evicts_other_versions_and_old_entries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            directory = Path(tmp)
+            ParseCache(directory, "v1").store("rawdata-mc", "old", [])
+            cache = ParseCache(directory, "v2", max_entries=2)
+            for key in ("k1", "k2", "k3"):
+                cache.store("rawdata-mc", key, [key])
+            names = sorted(path.name for path in directory.glob("*.json"))
+            self.assertEqual(len(names), 2)
+            self.assertTrue(all("--v2--" in name for name in names))
+            self.assertIsNone(cache.load("rawdata-mc", "old"))
+
+
+if __name__ == "__main__":
+    unittest.main()
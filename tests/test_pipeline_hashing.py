@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import build_studio_pipeline as pipeline  # noqa: E402
+from pipeline_hashing import RowHasher  # noqa: E402
+
+FIELDS = ("text", "match", "confidence", "issues", "sort_order")
+SAMPLES = [
+    ("Mitokondrie – ATP", True, 0.75, ["lav kontrast"], 0),
+    ('Citat "med" \\ og\nlinjeskift\t\x01', False, 1.0, None, 12),
+    ("emoji 🧬 og æøå", None, None, {"b": 1, "a": [True, None]}, -3),
+    ("", 1, 1, [], 10**20),
+    (None, False, float("nan"), "ja", 0),
+]
+
+
+class RowHasherTest(unittest.TestCase):
+    def test_matches_content_hash(self):
+        hasher = RowHasher(FIELDS)
+        for values in SAMPLES:
+            with self.subTest(values=values):
+                payload = dict(zip(FIELDS, values))
+                self.assertEqual(hasher.text(*values), pipeline.canonical_json(payload))
+                self.assertEqual(hasher(*values), pipeline.content_hash(payload))
+
+    def test_cache_keeps_int_and_bool_apart(self):
+        hasher = RowHasher(("value",))
+        self.assertEqual(hasher(True), pipeline.content_hash({"value": True}))
+        self.assertEqual(hasher(1), pipeline.content_hash({"value": 1}))
+        self.assertEqual(hasher(1.0), pipeline.content_hash({"value": 1.0}))
+        self.assertEqual(hasher.cached.cache_info().currsize, 3)
+
+    def test_rejects_wrong_arity(self):
+        with self.assertRaises(ValueError):
+            RowHasher(("a", "b"))("only one")
+        with self.assertRaises(ValueError):
+            RowHasher(("a", "a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import build_studio_pipeline as pipeline  # noqa: E402
+import pipeline_manifest  # noqa: E402
+from pipeline_rows import ItemChoiceRow  # noqa: E402
+
+
+def make_choice(label: str, text: str) -> ItemChoiceRow:
+    return ItemChoiceRow("human:mcq:2025:na:1", label, text, label == "A", 0, f"human:mcq:2025:na:1:choice:{label}", text)
+
+
+class ManifestTest(unittest.TestCase):
+    def build_manifest(self, choices) -> pipeline_manifest.PipelineManifest:
+        build = pipeline.PipelineBuild(
+            runs=[("run-id", "rawdata-mc", "abc")],
+            tables=[(pipeline.STUDY_ITEMS, []), (pipeline.ITEM_CHOICES, choices)],
+        )
+        return pipeline_manifest.PipelineManifest.from_dict(pipeline.build_state(build))
+
+    def test_state_lists_sources_keys_and_table_digests(self):
+        build = pipeline.PipelineBuild(
+            runs=[("run-id", "rawdata-mc", "abc")],
+            tables=[(pipeline.ITEM_CHOICES, [make_choice("A", "h1")])],
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "state.json"
+            pipeline.write_state(path, pipeline.build_state(build))
+            manifest = pipeline_manifest.load_manifest(path)
+        self.assertEqual(manifest.pipeline_version, pipeline.PIPELINE_VERSION)
+        self.assertEqual(manifest.sources["rawdata-mc"]["source_hash"], "abc")
+        self.assertEqual(manifest.content_hash("item_choices", "human:mcq:2025:na:1:choice:A"), "h1")
+        self.assertIsNone(manifest.content_hash("item_choices", "missing"))
+        self.assertEqual(
+            manifest.table_digests["item_choices"],
+            pipeline_manifest.table_digest({"human:mcq:2025:na:1:choice:A": "h1"}),
+        )
+
+    def test_pending_manifest_replaces_state_only_when_promoted(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "state.json"
+            pending = pipeline_manifest.pending_path(path)
+            self.assertEqual(pending.name, "state.pending.json")
+            self.assertFalse(pipeline_manifest.promote_pending(path))
+            pipeline.write_state(pending, pipeline.build_state(pipeline.PipelineBuild(runs=[], tables=[])))
+            self.assertFalse(path.exists())
+            self.assertTrue(pipeline_manifest.promote_pending(path))
+            self.assertEqual(pipeline_manifest.load_manifest(path).pipeline_version, pipeline.PIPELINE_VERSION)
+            self.assertFalse(pending.exists())
+
+    def test_diff_skips_tables_with_equal_digests(self):
+        old = self.build_manifest([make_choice("A", "h1"), make_choice("B", "h2")])
+        new = self.build_manifest([make_choice("A", "h1"), make_choice("B", "h3"), make_choice("C", "h4")])
+        diffs = pipeline_manifest.diff_manifests(old, new)
+        self.assertEqual([diff.table for diff in diffs], ["item_choices"])
+        self.assertEqual(diffs[0].added, ["human:mcq:2025:na:1:choice:C"])
+        self.assertEqual(diffs[0].changed, ["human:mcq:2025:na:1:choice:B"])
+        self.assertEqual(diffs[0].removed, [])
+
+    def test_manifest_without_digests_is_hashed_on_demand(self):
+        legacy = pipeline_manifest.PipelineManifest.from_dict(
+            {"pipeline_version": "old", "tables": {"item_choices": {"k": "h"}}}
+        )
+        current = pipeline_manifest.PipelineManifest.from_dict(
+            {"pipeline_version": "new", "tables": {"item_choices": {"k": "h"}}, "table_digests": {}}
+        )
+        self.assertEqual(pipeline_manifest.diff_manifests(legacy, current), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import convert_rawdata  # noqa: E402
+import pipeline_metrics  # noqa: E402
+
+
+class MetricsTest(unittest.TestCase):
+    def test_nested_stages_report_inclusive_and_self_time(self):
+        metrics = pipeline_metrics.Metrics()
+        with metrics.stage("outer"):
+            time.sleep(0.01)
+            with metrics.stage("inner", rows=3):
+                time.sleep(0.02)
+        outer, inner = metrics.stages["outer"], metrics.stages["inner"]
+        self.assertGreaterEqual(outer.wall, 0.03)
+        self.assertLess(outer.self_wall, 0.02)
+        self.assertEqual((inner.calls, inner.rows), (1, 3))
+
+    def test_patched_functions_count_rows_and_are_restored(self):
+        original = convert_rawdata.parse_raw_data
+        metrics = pipeline_metrics.Metrics()
+        instrument = pipeline_metrics.Instrument(convert_rawdata, "parse_raw_data")
+        with metrics.patched([instrument]):
+            self.assertIsNot(convert_rawdata.parse_raw_data, original)
+            convert_rawdata.parse_raw_data("2025\n\nSpørgsmål 1 - Cellebiologi\nHvad?\nA. Ja (korrekt)\nB. Nej\nC. Måske\nD. Aldrig\n")
+        self.assertIs(convert_rawdata.parse_raw_data, original)
+        stats = metrics.stages["convert_rawdata.parse_raw_data"]
+        self.assertEqual((stats.calls, stats.rows), (1, 1))
+
+    def test_generators_are_timed_per_slice(self):
+        metrics = pipeline_metrics.Metrics()
+        instrument = pipeline_metrics.Instrument(convert_rawdata, "iter_questions")
+        text = "2025\n\nSpørgsmål 1 - Cellebiologi\nHvad?\nA. Ja (korrekt)\nB. Nej\nC. Måske\nD. Aldrig\n"
+        with metrics.patched([instrument]):
+            questions = convert_rawdata.parse_raw_data(text + text.replace("Spørgsmål 1", "Spørgsmål 2"))
+        self.assertEqual([question.number for question in questions], [1, 2])
+        stats = metrics.stages["convert_rawdata.iter_questions"]
+        self.assertEqual((stats.calls, stats.rows), (3, 2))
+
+    def test_profiled_writes_json_and_deactivates(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "out.txt"
+            metrics_path = Path(tmp) / "metrics.json"
+            args = argparse.Namespace(profile=False, metrics_json=metrics_path)
+            with pipeline_metrics.profiled(args, "test", []):
+                with pipeline_metrics.stage("write", output=output):
+                    output.write_text("x" * 100, encoding="utf-8")
+            report = json.loads(metrics_path.read_text(encoding="utf-8"))
+        self.assertIsNone(pipeline_metrics.ACTIVE)
+        self.assertEqual(report["script"], "test")
+        self.assertEqual(report["stages"][0]["bytes"], 100)
+        self.assertIsNotNone(report["stages"][0]["peak_memory"])
+
+    def test_disabled_stage_is_a_no_op(self):
+        with pipeline_metrics.stage("anything"):
+            pass
+        self.assertIsNone(pipeline_metrics.ACTIVE)
+
+
+if __name__ == "__main__":
+    unittest.main()
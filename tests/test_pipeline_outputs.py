@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+from unittest import mock
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import build_studio_pipeline as pipeline  # noqa: E402
+import convert_sygdomslaere  # noqa: E402
+import pipeline_outputs  # noqa: E402
+from pipeline_outputs import (  # noqa: E402
+    AtomicOutput,
+    JsonArtifact,
+    OutputReport,
+    write_json_array,
+    write_text_if_changed,
+)
+
+
+def set_old_mtime(path: Path) -> None:
+    os.utime(path, (1_000_000, 1_000_000))
+
+
+class WriteIfChangedTest(unittest.TestCase):
+    def test_identical_text_leaves_file_untouched(self):
+        report = OutputReport()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "out.json"
+            self.assertTrue(write_text_if_changed(path, "a", report))
+            set_old_mtime(path)
+            self.assertFalse(write_text_if_changed(path, "a", report))
+            self.assertEqual(path.stat().st_mtime, 1_000_000)
+            self.assertTrue(write_text_if_changed(path, "b", report))
+            self.assertEqual(path.read_text(encoding="utf-8"), "b")
+            leftovers = list(Path(tmp).glob(".*.tmp"))
+        self.assertEqual(report.summary(), "2 written, 1 unchanged, 0 removed")
+        self.assertEqual(leftovers, [])
+
+    def test_atomic_output_discards_on_error(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "out.sql"
+            path.write_text("old", encoding="utf-8")
+            with self.assertRaises(RuntimeError):
+                with AtomicOutput(path) as handle:
+                    handle.write("new")
+                    raise RuntimeError("boom")
+            self.assertEqual(path.read_text(encoding="utf-8"), "old")
+            self.assertEqual(list(Path(tmp).glob(".*.tmp")), [])
+
+    def test_streamed_json_array_matches_json_dumps(self):
+        cases = [[], [{"a": [1, {"b": "linje\nto"}], "c": {}, "d": []}, "æ", 2]]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "out.json"
+            for items in cases:
+                with AtomicOutput(path, newline="\n") as handle:
+                    write_json_array(handle, iter(items))
+                self.assertEqual(path.read_text(encoding="utf-8"), json.dumps(items, ensure_ascii=False, indent=2))
+                with AtomicOutput(path, newline="\n") as handle:
+                    write_json_array(handle, iter(items), minified=True)
+                self.assertEqual(
+                    path.read_text(encoding="utf-8"), json.dumps(items, ensure_ascii=False, separators=(",", ":"))
+                )
+
+    def test_json_artifact_writes_minified_and_precompressed_siblings(self):
+        items = [{"navn": "Astma", "afsnit": ["Symptomer", "Behandling"]}] * 20
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(
+            pipeline_outputs, "brotli_compressor", return_value=None
+        ):
+            path = Path(tmp) / "data.json"
+            path.with_name("data.json.br").write_bytes(b"stale")
+            with JsonArtifact(path, minified=True, precompress=True) as artifact:
+                artifact.write_array(iter(items))
+            self.assertTrue(artifact.changed)
+            names = sorted(child.name for child in Path(tmp).iterdir())
+            minified = path.with_name("data.min.json").read_bytes()
+            unpacked = gzip.decompress(path.with_name("data.min.json.gz").read_bytes())
+
+            report = OutputReport()
+            with JsonArtifact(path, report, minified=True, precompress=True) as artifact:
+                artifact.write_array(iter(items))
+        self.assertEqual(names, ["data.json", "data.json.gz", "data.min.json", "data.min.json.gz"])
+        self.assertEqual(json.loads(minified), items)
+        self.assertEqual(unpacked, minified)
+        self.assertFalse(artifact.changed)
+        self.assertEqual(report.summary(), "0 written, 4 unchanged, 0 removed")
+
+    def test_chunk_rerun_only_rewrites_changed_chunks(self):
+        def write_chunks(output_dir: Path, statements) -> OutputReport:
+            report = OutputReport()
+            writer = pipeline.ChunkWriter(output_dir, 2, len(statements), report)
+            for statement in statements:
+                writer.write("item_choices", statement)
+            writer.close()
+            return report
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output_dir = Path(tmp)
+            write_chunks(output_dir, ["select 1;", "select 2;", "select 3;", "select 4;"])
+            (output_dir / "chunk_003.sql").write_text("stale", encoding="utf-8")
+            report = write_chunks(output_dir, ["select 1;", "select 2;", "select 9;", "select 4;"])
+            names = sorted(path.name for path in output_dir.glob("chunk_*.sql"))
+        self.assertEqual(names, ["chunk_001.sql", "chunk_002.sql"])
+        self.assertEqual([path.name for path in report.unchanged], ["chunk_001.sql"])
+        self.assertEqual([path.name for path in report.written], ["chunk_002.sql"])
+        self.assertEqual([path.name for path in report.removed], ["chunk_003.sql"])
+
+
+class GeneratedAtTest(unittest.TestCase):
+    def test_generated_at_only_moves_with_content(self):
+        payload = {"meta": {"source": "x", "generatedAt": None}, "diseases": [{"name": "A"}]}
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "sygdomslaere.json"
+            self.assertTrue(convert_sygdomslaere.write_payload(payload, path))
+            first = json.loads(path.read_text(encoding="utf-8"))["meta"]["generatedAt"]
+            self.assertIsNotNone(first)
+            self.assertFalse(convert_sygdomslaere.write_payload(payload, path))
+            changed = {**payload, "diseases": [{"name": "B"}]}
+            self.assertTrue(convert_sygdomslaere.write_payload(changed, path))
+            data = json.loads(path.read_text(encoding="utf-8"))
+        self.assertEqual(data["diseases"], [{"name": "B"}])
+        self.assertIsNotNone(data["meta"]["generatedAt"])
+
+
+if __name__ == "__main__":
+    unittest.main()